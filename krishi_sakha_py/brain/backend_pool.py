@@ -0,0 +1,197 @@
+"""
+Pool of Ollama inference backends.
+Routes each generation to the healthy backend with the fewest outstanding
+requests, keeps a conversation on the same backend while it is not
+overloaded (so Ollama's prompt cache stays warm), and ejects backends that
+fail health probes or generations until they recover.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Iterable, List, Optional
+
+import httpx
+from langchain_ollama import ChatOllama
+
+from configs.model_config import MODEL_NAME
+from configs.runtime_config import (
+    OLLAMA_AFFINITY_SLACK,
+    OLLAMA_EJECT_AFTER_FAILURES,
+    OLLAMA_PROBE_INTERVAL_SECONDS,
+    OLLAMA_PROBE_TIMEOUT_SECONDS,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BackendUnavailableError(Exception):
+    """Raised when no Ollama backend can take a request"""
+    pass
+
+
+def affinity_key(user_id: str, conversation_id: str) -> str:
+    """
+    Backend-affinity key for a conversation, scoped to its owner: the
+    conversation id is client-supplied.
+    """
+    return f"{user_id}:{conversation_id}" if conversation_id else ""
+
+
+class OllamaBackend:
+    def __init__(self, base_url: str, model_name: str = MODEL_NAME):
+        self.base_url = base_url
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.last_probe_at: Optional[float] = None
+
+        # Separate instances keep per-purpose settings independent
+        self.default_model = ChatOllama(model=model_name, base_url=base_url)
+        self.voice_model = ChatOllama(model=model_name, base_url=base_url)
+        self.vision_model = ChatOllama(model=model_name, base_url=base_url)
+
+    def status(self) -> dict:
+        return {
+            "base_url": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "last_probe_at": self.last_probe_at,
+        }
+
+
+class BackendPool:
+    def __init__(
+        self,
+        base_urls: List[str],
+        probe_interval: float = OLLAMA_PROBE_INTERVAL_SECONDS,
+        probe_timeout: float = OLLAMA_PROBE_TIMEOUT_SECONDS,
+        eject_after_failures: int = OLLAMA_EJECT_AFTER_FAILURES,
+        affinity_slack: int = OLLAMA_AFFINITY_SLACK,
+        max_affinity_entries: int = 10000,
+    ):
+        if not base_urls:
+            raise ValueError("BackendPool needs at least one Ollama base URL")
+
+        self.backends = [OllamaBackend(url) for url in base_urls]
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.eject_after_failures = eject_after_failures
+        self.affinity_slack = affinity_slack
+        self.max_affinity_entries = max_affinity_entries
+
+        self._affinity: "OrderedDict[str, OllamaBackend]" = OrderedDict()
+        self._probe_task: Optional[asyncio.Task] = None
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def primary(self) -> OllamaBackend:
+        return self.backends[0]
+
+    # ------------------------------------------------------------------
+    # Routing
+    # ------------------------------------------------------------------
+    def pick(self, conversation_id: str = "", exclude: Iterable[OllamaBackend] = ()) -> OllamaBackend:
+        """
+        Choose a backend for the next generation.
+
+        Args:
+            conversation_id: Conversation to keep on the same backend, if any
+            exclude: Backends that already failed this request
+        """
+        excluded = set(id(backend) for backend in exclude)
+        candidates = [b for b in self.backends if id(b) not in excluded and b.healthy]
+        if not candidates:
+            # Every backend is ejected; try them anyway rather than fail outright
+            candidates = [b for b in self.backends if id(b) not in excluded]
+        if not candidates:
+            raise BackendUnavailableError("No Ollama backend left to try")
+
+        least_loaded = min(candidates, key=lambda b: b.outstanding)
+
+        sticky = self._affinity.get(conversation_id) if conversation_id else None
+        if sticky in candidates and sticky.outstanding <= least_loaded.outstanding + self.affinity_slack:
+            metrics.incr("backend_pool.affinity_hits")
+            return sticky
+
+        if sticky is not None:
+            metrics.incr("backend_pool.affinity_moves")
+        return least_loaded
+
+    @asynccontextmanager
+    async def lease(self, backend: OllamaBackend, conversation_id: str = ""):
+        backend.outstanding += 1
+        metrics.set_gauge(f"backend_pool.outstanding.{backend.base_url}", backend.outstanding)
+        if conversation_id:
+            self._affinity[conversation_id] = backend
+            self._affinity.move_to_end(conversation_id)
+            while len(self._affinity) > self.max_affinity_entries:
+                self._affinity.popitem(last=False)
+        try:
+            yield backend
+        finally:
+            backend.outstanding -= 1
+            metrics.set_gauge(f"backend_pool.outstanding.{backend.base_url}", backend.outstanding)
+
+    # ------------------------------------------------------------------
+    # Health
+    # ------------------------------------------------------------------
+    def mark_success(self, backend: OllamaBackend):
+        backend.consecutive_failures = 0
+        if not backend.healthy:
+            backend.healthy = True
+            metrics.incr("backend_pool.readmitted")
+            logger.info(f"Ollama backend {backend.base_url} is healthy again")
+
+    def mark_failure(self, backend: OllamaBackend, error: Exception):
+        backend.consecutive_failures += 1
+        backend.last_error = str(error)
+        metrics.incr("backend_pool.failures")
+        if backend.healthy and backend.consecutive_failures >= self.eject_after_failures:
+            backend.healthy = False
+            metrics.incr("backend_pool.ejected")
+            logger.warning(f"Ejecting Ollama backend {backend.base_url}: {error}")
+
+    async def probe(self, backend: OllamaBackend):
+        backend.last_probe_at = time.time()
+        try:
+            response = await self._client.get(f"{backend.base_url}/api/tags", timeout=self.probe_timeout)
+            response.raise_for_status()
+        except Exception as e:
+            self.mark_failure(backend, e)
+            return
+        self.mark_success(backend)
+
+    async def _probe_loop(self):
+        while True:
+            await asyncio.gather(*(self.probe(backend) for backend in self.backends))
+            metrics.set_gauge("backend_pool.healthy", sum(1 for b in self.backends if b.healthy))
+            await asyncio.sleep(self.probe_interval)
+
+    async def start(self):
+        if self._probe_task:
+            return
+        self._client = httpx.AsyncClient()
+        self._probe_task = asyncio.create_task(self._probe_loop())
+        logger.info(f"Started Ollama backend pool with {len(self.backends)} backend(s)")
+
+    async def stop(self):
+        if self._probe_task:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def status(self) -> List[dict]:
+        return [backend.status() for backend in self.backends]
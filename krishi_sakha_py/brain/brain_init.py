@@ -1,24 +1,17 @@
-from langchain_ollama import ChatOllama
-from configs.model_config import MODEL_NAME, DEFAULT_SYSTEM_MESSAGE, VOICE_SYSTEM_MESSAGE
+from brain.backend_pool import BackendPool
+from configs.runtime_config import OLLAMA_BASE_URLS
+
+# One entry per Ollama host; ModelRun picks a backend per generation
+backend_pool = BackendPool(OLLAMA_BASE_URLS)
+
+# Models on the first backend, for callers that do not go through the pool.
+# System messages are not set here - we handle them in the templates.
 
 # Default model for text-only queries
-default_model = ChatOllama(
-    model=MODEL_NAME,
-    # Don't set system message here - we'll handle it in the templates
-)    
+default_model = backend_pool.primary.default_model
 
 # Voice model for voice queries
-voice_model = ChatOllama(
-    model=MODEL_NAME,
-    # Don't set system message here - we'll handle it in the templates
-)
+voice_model = backend_pool.primary.voice_model
 
 # Vision model - using Gemma 3 4B for vision tasks
-vision_model = ChatOllama(
-    model=MODEL_NAME,  # Using Gemma 3 4B for vision as well
-    # Don't set system message here - we'll handle it in the templates
-)
-
-
-
-
+vision_model = backend_pool.primary.vision_model
@@ -1,11 +1,22 @@
 """
 Context retriever for vector database search and formatting.
 Inspired by add_pdfs_to_vectordb.py search functionality.
+
+ContextRetriever keeps one PDFVectorDBManager per collection instead of
+building a new one (and a new Chroma client) on every request.
+Speculation starts a search before the question has been routed; the
+caller claims it once the route is known, or cancels it.
 """
 
+import asyncio
 import logging
+import threading
+import time
 from typing import Dict, List, Tuple, Optional, Any
+from configs.runtime_config import CHROMA_DB_PATH
 from data.functions.add_to_vector_db import PDFVectorDBManager
+from modules.metrics.metrics import metrics
+from routes.helpers.deadline import Deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -219,3 +230,133 @@ def search_vector_db_only(
     except Exception as e:
         logger.error(f"Error in direct vector DB search: {e}")
         return {'error': str(e), 'results': []}
+
+
+def flatten_docs(docs: List[Any]) -> List[str]:
+    """
+    Recursively flatten a list of documents which may contain strings or nested lists of strings.
+    Returns a flat list of strings.
+    """
+    flat_list = []
+    for doc in docs:
+        if isinstance(doc, str):
+            flat_list.append(doc)
+        elif isinstance(doc, list):
+            flat_list.extend(flatten_docs(doc))
+        else:
+            flat_list.append(str(doc))
+    return flat_list
+
+
+class ContextRetriever:
+    def __init__(self, db_path: str = CHROMA_DB_PATH):
+        self.db_path = db_path
+        self._managers: Dict[str, PDFVectorDBManager] = {}
+        self._lock = threading.Lock()
+
+    def manager(self, collection: str) -> PDFVectorDBManager:
+        with self._lock:
+            db_manager = self._managers.get(collection)
+            if db_manager is None:
+                db_manager = self._managers[collection] = PDFVectorDBManager(
+                    vector_db_type="chroma",
+                    embedding_method="sentence_transformers",
+                    db_path=self.db_path,
+                    collection_name=collection
+                )
+            return db_manager
+
+    def search(
+        self,
+        collection: str,
+        query: str,
+        fallback_query: Optional[str] = None,
+        n_results: int = 5,
+        deadline: Optional[Deadline] = None
+    ) -> List[str]:
+        """
+        Blocking search; retries with ``fallback_query`` when nothing matches
+        and the deadline still has room for it.
+        """
+        db_manager = self.manager(collection)
+        results = db_manager.search_documents(query=query, n_results=n_results)
+        if fallback_query and (not results.get("documents") or results["documents"] == [[]]):
+            if deadline is not None and deadline.budget() <= 0:
+                deadline.skip("retrieval_retry")
+            else:
+                results = db_manager.search_documents(query=fallback_query, n_results=n_results)
+        return flatten_docs(results.get("documents", []))
+
+    async def retrieve(
+        self,
+        collection: str,
+        query: str,
+        fallback_query: Optional[str] = None,
+        n_results: int = 5,
+        deadline: Optional[Deadline] = None
+    ) -> List[str]:
+        """
+        Off the event loop so a disconnect can abandon it. Past the
+        deadline's budget the answer goes ahead without documents.
+        """
+        search = asyncio.to_thread(self.search, collection, query, fallback_query, n_results, deadline)
+        with metrics.timer(f"retrieval.seconds.{collection}"):
+            if deadline is None:
+                return await search
+            try:
+                return await asyncio.wait_for(search, deadline.budget())
+            except asyncio.TimeoutError:
+                deadline.skip("retrieval")
+                return []
+
+
+class Speculation:
+    """
+    A retrieval started before routing finished.
+    """
+
+    def __init__(
+        self,
+        retriever: ContextRetriever,
+        collection: str,
+        query: str,
+        fallback_query: Optional[str] = None,
+        deadline: Optional[Deadline] = None,
+        n_results: int = 5
+    ):
+        self.collection = collection
+        self.query = query
+        self.started = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.task = asyncio.create_task(
+            retriever.retrieve(collection, query, fallback_query, n_results, deadline=deadline)
+        )
+        self.task.add_done_callback(self._done)
+        metrics.incr("speculation.launched")
+
+    def _done(self, task: asyncio.Task):
+        self.finished_at = time.perf_counter()
+
+    def matches(self, collection: str, query: str) -> bool:
+        return collection == self.collection and query == self.query
+
+    async def claim(self) -> List[str]:
+        """
+        Use the speculative result. Records how much retrieval time was
+        already behind us when the route came in.
+        """
+        saved = (self.finished_at or time.perf_counter()) - self.started
+        metrics.incr("speculation.hits")
+        metrics.observe("speculation.saved_seconds", saved)
+        return await self.task
+
+    def cancel(self):
+        if not self.task.done():
+            self.task.cancel()
+        elif not self.task.cancelled():
+            # Consume a failure nobody is going to await
+            self.task.exception()
+        metrics.incr("speculation.misses")
+
+
+context_retriever = ContextRetriever()
@@ -0,0 +1,190 @@
+"""
+Load-adaptive degradation of the expensive pipeline stages.
+
+A background loop samples LLM queue depth, event-loop lag and recent
+time-to-first-token, and moves through a fixed ladder of levels: fewer
+retrieved documents and pages, shorter context, no YouTube, caches only,
+and finally answering web-search questions from the model alone. It steps
+up as soon as a signal crosses a threshold and back down one level at a
+time once load has stayed lower for DEGRADE_RECOVERY_SECONDS.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, List, Optional, Tuple
+
+from brain.scheduler import llm_scheduler
+from configs.runtime_config import (
+    CHAT_TTFT_SLO_SECONDS,
+    DEGRADE_EVAL_INTERVAL_SECONDS,
+    DEGRADE_LOOP_LAG_THRESHOLDS,
+    DEGRADE_QUEUE_THRESHOLDS,
+    DEGRADE_RECOVERY_SECONDS,
+    DEGRADE_TTFT_THRESHOLDS,
+    DEGRADE_TTFT_WINDOW_SECONDS,
+    SEARCH_MAX_PAGES,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DegradationPolicy:
+    level: int
+    name: str
+    # Documents retrieved from the vector store
+    retrieval_k: int
+    # Web pages scraped per search
+    max_pages: int
+    # Characters of context sent to the model (None = unlimited)
+    context_chars: Optional[int]
+    youtube: bool
+    # Only answer from cached pages/search results, never fetch live
+    cache_only: bool
+    # Answer web-search questions from the model alone
+    search_as_general: bool
+    message: str = ""
+
+
+LEVELS: List[DegradationPolicy] = [
+    DegradationPolicy(0, "normal", 5, SEARCH_MAX_PAGES, None, True, False, False),
+    DegradationPolicy(1, "reduced", 3, min(3, SEARCH_MAX_PAGES), 6000, True, False, False,
+                      "High load: using fewer sources..."),
+    DegradationPolicy(2, "lean", 2, min(2, SEARCH_MAX_PAGES), 3000, False, False, False,
+                      "High load: skipping videos and using fewer sources..."),
+    DegradationPolicy(3, "cache_only", 2, min(2, SEARCH_MAX_PAGES), 3000, False, True, False,
+                      "High load: answering from saved results only..."),
+    DegradationPolicy(4, "minimal", 1, 0, 1500, False, True, True,
+                      "Very high load: giving a short answer without web search..."),
+]
+
+
+def trim_context(text: str, max_chars: Optional[int]) -> str:
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    metrics.incr("degradation.context_trimmed")
+    return text[:max_chars]
+
+
+class DegradationController:
+    def __init__(
+        self,
+        interval: float = DEGRADE_EVAL_INTERVAL_SECONDS,
+        recovery_seconds: float = DEGRADE_RECOVERY_SECONDS,
+        ttft_window_seconds: float = DEGRADE_TTFT_WINDOW_SECONDS,
+    ):
+        self.interval = interval
+        self.recovery_seconds = recovery_seconds
+        self.ttft_window_seconds = ttft_window_seconds
+        self.level = 0
+        self.loop_lag = 0.0
+        self._ttft: Deque[Tuple[float, float]] = deque(maxlen=512)
+        self._calm_since: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def policy(self) -> DegradationPolicy:
+        return LEVELS[self.level]
+
+    def record_ttft(self, seconds: float):
+        self._ttft.append((time.monotonic(), seconds))
+
+    def _ttft_p90(self) -> Optional[float]:
+        cutoff = time.monotonic() - self.ttft_window_seconds
+        while self._ttft and self._ttft[0][0] < cutoff:
+            self._ttft.popleft()
+        if not self._ttft:
+            return None
+        ordered = sorted(value for _, value in self._ttft)
+        return ordered[min(len(ordered) - 1, int(0.9 * len(ordered)))]
+
+    def signals(self) -> Dict[str, Optional[float]]:
+        return {
+            "queue_per_slot": llm_scheduler.queue_depth() / max(1, llm_scheduler.max_in_flight),
+            "loop_lag_seconds": self.loop_lag,
+            "ttft_p90_seconds": self._ttft_p90(),
+        }
+
+    def target_level(self, signals: Dict[str, Optional[float]]) -> int:
+        """
+        Highest level any signal asks for.
+        """
+        levels = [
+            bisect.bisect_right(DEGRADE_QUEUE_THRESHOLDS, signals["queue_per_slot"]),
+            bisect.bisect_right(DEGRADE_LOOP_LAG_THRESHOLDS, signals["loop_lag_seconds"]),
+        ]
+        if signals["ttft_p90_seconds"] is not None:
+            ratio = signals["ttft_p90_seconds"] / CHAT_TTFT_SLO_SECONDS
+            levels.append(bisect.bisect_right(DEGRADE_TTFT_THRESHOLDS, ratio))
+        return min(max(levels), len(LEVELS) - 1)
+
+    def evaluate(self):
+        signals = self.signals()
+        target = self.target_level(signals)
+        now = time.monotonic()
+
+        if target > self.level:
+            # Escalate one step per evaluation so the ladder is walked in order
+            self._set_level(self.level + 1, signals)
+            self._calm_since = None
+        elif target < self.level:
+            if self._calm_since is None:
+                self._calm_since = now
+            elif now - self._calm_since >= self.recovery_seconds:
+                self._set_level(self.level - 1, signals)
+                self._calm_since = now
+        else:
+            self._calm_since = None
+
+        metrics.set_gauge("degradation.loop_lag_seconds", round(signals["loop_lag_seconds"], 4))
+        metrics.set_gauge("degradation.queue_per_slot", round(signals["queue_per_slot"], 2))
+        if signals["ttft_p90_seconds"] is not None:
+            metrics.set_gauge("degradation.ttft_p90_seconds", round(signals["ttft_p90_seconds"], 3))
+
+    def _set_level(self, level: int, signals: Dict[str, Optional[float]]):
+        previous, self.level = self.level, level
+        metrics.set_gauge("degradation.level", level)
+        metrics.incr("degradation.level_changes")
+        logger.warning(
+            f"Degradation level {previous} ({LEVELS[previous].name}) -> {level} ({LEVELS[level].name}), "
+            f"signals: {signals}"
+        )
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            # A busy loop wakes us late; smooth it so one slow tick does not flap
+            lag = max(0.0, loop.time() - scheduled)
+            self.loop_lag = 0.7 * self.loop_lag + 0.3 * lag
+            try:
+                self.evaluate()
+            except Exception as e:
+                logger.error(f"Degradation evaluation failed: {e}")
+
+    async def start(self):
+        if self._task:
+            return
+        metrics.set_gauge("degradation.level", self.level)
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self) -> dict:
+        policy = self.policy()
+        return {"level": policy.level, "name": policy.name, "signals": self.signals()}
+
+
+degradation = DegradationController()
@@ -0,0 +1,231 @@
+"""
+Conversation history windowing with rolling summaries.
+Keeps the latest turns verbatim within a token budget and folds older turns
+into a per-conversation summary that is refreshed after each response.
+Summaries are keyed by (user_id, conversation_id), since conversation ids
+come from the client.
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema.output_parser import StrOutputParser
+
+from brain.backend_pool import affinity_key
+from brain.brain_init import backend_pool
+from configs.model_config import (
+    HISTORY_MAX_TURNS,
+    HISTORY_TOKEN_BUDGET,
+    HISTORY_SUMMARY_MAX_WORDS,
+    HISTORY_SUMMARY_CACHE_SIZE,
+    HISTORY_SUMMARY_SYSTEM_MESSAGE,
+)
+from brain.scheduler import SchedulerBusyError, llm_scheduler
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 characters per token) used for budgeting.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
+
+
+def turn_fingerprint(turn: Dict[str, str]) -> str:
+    raw = f"{turn.get('role', '')}\x00{turn.get('content', '')}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class SummaryEntry:
+    summary: str
+    # Fingerprint of the newest turn folded into the summary
+    last_turn: str
+    updated_at: float
+
+
+class HistoryManager:
+    def __init__(
+        self,
+        pool=backend_pool,
+        max_turns: int = HISTORY_MAX_TURNS,
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        summary_max_words: int = HISTORY_SUMMARY_MAX_WORDS,
+        cache_size: int = HISTORY_SUMMARY_CACHE_SIZE,
+    ):
+        self.pool = pool
+        self.max_turns = max_turns
+        self.token_budget = token_budget
+        self.cache_size = cache_size
+
+        self._summaries: "OrderedDict[Tuple[str, str], SummaryEntry]" = OrderedDict()
+        self._pending: Dict[Tuple[str, str], asyncio.Task] = {}
+
+        summary_template = ChatPromptTemplate.from_messages([
+            ("system", HISTORY_SUMMARY_SYSTEM_MESSAGE + f"\nUse at most {summary_max_words} words."),
+            ("human", "Previous summary:\n{previous_summary}\n\nNew messages:\n{transcript}")
+        ])
+        self._summary_chains = {
+            backend.base_url: summary_template | backend.default_model | StrOutputParser()
+            for backend in pool.backends
+        }
+
+    @staticmethod
+    def _clean(history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+        return [
+            turn for turn in (history or [])
+            if turn.get("role") in ("user", "assistant") and turn.get("content")
+        ]
+
+    def _split(self, turns: List[Dict[str, str]]) -> int:
+        """
+        Return the index of the first turn kept verbatim.
+        """
+        used = 0
+        start = len(turns)
+        for index in range(len(turns) - 1, -1, -1):
+            if len(turns) - index > self.max_turns:
+                break
+            cost = estimate_tokens(turns[index]["content"])
+            # Always keep the latest turn, even if it alone exceeds the budget
+            if start < len(turns) and used + cost > self.token_budget:
+                break
+            used += cost
+            start = index
+        return start
+
+    def _get_summary(self, user_id: str, conversation_id: str) -> Optional[SummaryEntry]:
+        if not conversation_id:
+            return None
+        key = (user_id, conversation_id)
+        entry = self._summaries.get(key)
+        if entry:
+            self._summaries.move_to_end(key)
+        return entry
+
+    def _unsummarized(self, older: List[Dict[str, str]], entry: Optional[SummaryEntry]) -> List[Dict[str, str]]:
+        """
+        Older turns that are not yet folded into the cached summary.
+        """
+        if not entry:
+            return older
+        for index in range(len(older) - 1, -1, -1):
+            if turn_fingerprint(older[index]) == entry.last_turn:
+                return older[index + 1:]
+        # The covered turn scrolled out of the supplied history; everything
+        # that is still older than the window is new to the summary.
+        return older
+
+    def window(
+        self,
+        user_id: str,
+        conversation_id: str,
+        history: Optional[List[Dict[str, str]]]
+    ) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Pick the turns to replay verbatim and the summary of everything older.
+
+        Args:
+            user_id: Owner of the conversation
+            conversation_id: Conversation the history belongs to
+            history: Full list of {"role", "content"} turns, oldest first
+
+        Returns:
+            Tuple of (summary_text, recent_turns)
+        """
+        turns = self._clean(history)
+        start = self._split(turns)
+        recent = turns[start:]
+
+        entry = self._get_summary(user_id, conversation_id) if start > 0 else None
+        summary = entry.summary if entry else ""
+
+        tokens_before = sum(estimate_tokens(t["content"]) for t in turns)
+        tokens_after = estimate_tokens(summary) + sum(estimate_tokens(t["content"]) for t in recent)
+        metrics.observe("history.prompt_tokens_before", tokens_before)
+        metrics.observe("history.prompt_tokens_after", tokens_after)
+        if start > 0:
+            metrics.incr("history.windowed_requests")
+            metrics.incr("history.summary_hits" if entry else "history.summary_misses")
+
+        return summary, recent
+
+    def schedule_refresh(self, user_id: str, conversation_id: str, history: Optional[List[Dict[str, str]]]):
+        """
+        Fold turns that fell out of the window into the rolling summary.
+        Runs in the background so it never delays the response stream.
+        """
+        if not conversation_id:
+            return
+
+        turns = self._clean(history)
+        start = self._split(turns)
+        if start == 0:
+            return
+
+        key = (user_id, conversation_id)
+        pending = self._pending.get(key)
+        if pending and not pending.done():
+            # The next refresh picks up whatever this one misses
+            return
+
+        older = turns[:start]
+        new_turns = self._unsummarized(older, self._get_summary(user_id, conversation_id))
+        if not new_turns:
+            return
+
+        task = asyncio.create_task(self._refresh(user_id, conversation_id, new_turns))
+        self._pending[key] = task
+        task.add_done_callback(lambda _: self._pending.pop(key, None))
+
+    async def _refresh(self, user_id: str, conversation_id: str, new_turns: List[Dict[str, str]]):
+        entry = self._get_summary(user_id, conversation_id)
+        transcript = "\n".join(
+            f"{'Farmer' if turn['role'] == 'user' else 'Assistant'}: {turn['content']}"
+            for turn in new_turns
+        )
+
+        try:
+            # Summaries only use capacity left over by interactive lanes
+            async with llm_scheduler.admit("batch"):
+                # Same backend as the conversation, whose prompt cache is warm
+                affinity = affinity_key(user_id, conversation_id)
+                backend = self.pool.pick(affinity)
+                async with self.pool.lease(backend, affinity):
+                    with metrics.timer("history.summary_seconds"):
+                        summary = await self._summary_chains[backend.base_url].ainvoke({
+                            "previous_summary": entry.summary if entry else "(none)",
+                            "transcript": transcript,
+                        })
+        except SchedulerBusyError:
+            metrics.incr("history.summary_skipped_busy")
+            return
+        except Exception as e:
+            logger.error(f"Failed to summarize conversation {conversation_id}: {e}")
+            metrics.incr("history.summary_errors")
+            return
+
+        key = (user_id, conversation_id)
+        self._summaries[key] = SummaryEntry(
+            summary=summary.strip(),
+            last_turn=turn_fingerprint(new_turns[-1]),
+            updated_at=time.time(),
+        )
+        self._summaries.move_to_end(key)
+        while len(self._summaries) > self.cache_size:
+            self._summaries.popitem(last=False)
+        logger.info(f"Updated rolling summary for conversation {conversation_id} ({len(new_turns)} new turns)")
+
+
+history_manager = HistoryManager()
@@ -1,16 +1,24 @@
 # brain/model_run.py
 
-from brain.brain_init import default_model, voice_model, vision_model
+from brain.brain_init import default_model, voice_model, vision_model, backend_pool
+from brain.backend_pool import OllamaBackend, affinity_key
 from configs.model_config import DEFAULT_SYSTEM_MESSAGE, VOICE_SYSTEM_MESSAGE
-from langchain.prompts import ChatPromptTemplate
 from langchain.schema.output_parser import StrOutputParser
 from langchain.schema import HumanMessage, SystemMessage
+import asyncio
 import logging
 import base64
+import time
 from datetime import datetime
-from typing import Any, AsyncGenerator, Dict, Optional,List
+from typing import Any, AsyncGenerator, Callable, Dict, Optional,List
 
 from routes.helpers.push_supabase import push_to_supabase
+from routes.helpers.conversation_store import conversation_store
+from brain.history_manager import history_manager
+from brain.prompts import build_chat_prompt, history_to_messages
+from brain.scheduler import Admission, llm_scheduler
+from routes.helpers.deadline import Deadline
+from modules.metrics.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -20,18 +28,88 @@ class ModelRun:
         self.voice_model = voice_model
         self.vision_model = vision_model
 
-        self.rag_template = ChatPromptTemplate.from_messages([
-            ("system", DEFAULT_SYSTEM_MESSAGE + "\n\nUse the following context to answer the user's question:\n{context}"),
-            ("human", "{question}")
-        ])
-        self.voice_template = ChatPromptTemplate.from_messages([
-            ("system", VOICE_SYSTEM_MESSAGE),
-            ("human", "{question}") 
-        ])
-        self.general_template = ChatPromptTemplate.from_messages([
-            ("system", DEFAULT_SYSTEM_MESSAGE),
-            ("human", "{question}")
-        ])
+        # Chains are compiled once per backend and (has_context, voice) variant
+        self.chains = {
+            backend.base_url: self._compile_chains(backend)
+            for backend in backend_pool.backends
+        }
+
+    @staticmethod
+    def _compile_chains(backend: OllamaBackend) -> Dict[tuple, Any]:
+        chains = {}
+        for with_context in (False, True):
+            for voice in (False, True):
+                system_message = VOICE_SYSTEM_MESSAGE if voice else DEFAULT_SYSTEM_MESSAGE
+                model = backend.voice_model if voice else backend.default_model
+                template = build_chat_prompt(system_message, with_context=with_context)
+                chains[(with_context, voice)] = template | model | StrOutputParser()
+        return chains
+
+    async def _run(
+        self,
+        select: Callable[[OllamaBackend], Any],
+        chain_input: Any,
+        lane: str,
+        admission: Optional[Admission] = None,
+        stream: bool = True,
+        conversation_id: str = "",
+        deadline: Optional[Deadline] = None
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Run a chain or model under the LLM scheduler on a pooled backend.
+
+        Routes pass the admission they reserved on arrival; otherwise a
+        place in the lane's queue is reserved here. The backend is chosen
+        only once a slot is granted, and a backend that fails before the
+        first chunk is skipped in favour of the next one. With a deadline,
+        the wait for a slot is bounded by what is left of it.
+        """
+        admission = admission or llm_scheduler.admit(lane)
+        if deadline is not None:
+            admission.wait_timeout = deadline.queue_budget()
+        async with admission:
+            failed = []
+            while True:
+                backend = backend_pool.pick(conversation_id, exclude=failed)
+                runnable = select(backend)
+                emitted = False
+                started_at = time.perf_counter()
+                try:
+                    async with backend_pool.lease(backend, conversation_id):
+                        if stream:
+                            async for chunk in runnable.astream(chain_input):
+                                emitted = True
+                                yield chunk
+                        else:
+                            result = await runnable.ainvoke(chain_input)
+                            emitted = True
+                            yield result
+                except (asyncio.CancelledError, GeneratorExit):
+                    # Closing the stream drops the HTTP request, which stops Ollama
+                    self._record_reclaimed(lane, time.perf_counter() - started_at)
+                    raise
+                except Exception as e:
+                    backend_pool.mark_failure(backend, e)
+                    if emitted or len(failed) + 1 >= len(backend_pool.backends):
+                        raise
+                    failed.append(backend)
+                    metrics.incr("backend_pool.failovers")
+                    logger.warning(f"Backend {backend.base_url} failed before responding, failing over: {e}")
+                    continue
+                backend_pool.mark_success(backend)
+                metrics.observe(f"llm.generation_seconds.{lane}", time.perf_counter() - started_at)
+                return
+
+    @staticmethod
+    def _record_reclaimed(lane: str, elapsed: float):
+        """
+        Estimate the generation time saved by stopping early, from the mean
+        duration of completed generations in the same lane.
+        """
+        metrics.incr(f"llm.cancelled.{lane}")
+        completed = metrics.histogram(f"llm.generation_seconds.{lane}")
+        if completed and completed.mean is not None:
+            metrics.incr("llm.reclaimed_seconds", max(0.0, completed.mean - elapsed))
 
     async def generate(
         self,
@@ -43,47 +121,43 @@ class ModelRun:
         stream: bool = True,
         push_to_db: bool = True,
         metadata: Optional[Dict[str, List[str]]] = None,
-        history: Optional[List[Dict[str, str]]] = None
+        history: Optional[List[Dict[str, str]]] = None,
+        lane: str = "chat",
+        admission: Optional[Admission] = None,
+        deadline: Optional[Deadline] = None
     ) -> AsyncGenerator[str, None]:
 
-        # Dynamically build prompt with history
-        messages = []
-        if context:
-            messages.append(("system", DEFAULT_SYSTEM_MESSAGE + "\n\nUse the following context to answer the user's question:\n{context}"))
-        else:
-            messages.append(("system", DEFAULT_SYSTEM_MESSAGE))
-
-        # Insert previous chat history if provided
-        if history:
-            for turn in history:
-                role = turn.get("role")
-                content = turn.get("content", "")
-                if role == "user":
-                    messages.append(("human", content))
-                elif role == "assistant":
-                    messages.append(("ai", content))
+        # Older turns are folded into a cached rolling summary
+        summary, recent_history = history_manager.window(user_id, conversation_id, history)
 
-        # Add the current question
-        messages.append(("human", "{question}"))
-
-        template = ChatPromptTemplate.from_messages(messages)
-        model    = self.voice_model if use_voice_model else self.default_model
-        chain    = template | model | StrOutputParser()
-
-        chain_input = {"question": question}
+        variant = (bool(context), use_voice_model)
+        chain_input = {
+            "question": question,
+            "history": history_to_messages(summary, recent_history),
+        }
         if context:
             chain_input["context"] = context
 
         full_response = ""
 
         if stream:
-            async for chunk in chain.astream(chain_input):
+            async for chunk in self._run(
+                lambda backend: self.chains[backend.base_url][variant],
+                chain_input, lane, admission, conversation_id=affinity_key(user_id, conversation_id),
+                deadline=deadline
+            ):
                 if chunk:
                     full_response += chunk
                     yield chunk
         else:
-            full_response = await chain.ainvoke(chain_input)
-            yield full_response
+            async for full_response in self._run(
+                lambda backend: self.chains[backend.base_url][variant],
+                chain_input, lane, admission, stream=False,
+                conversation_id=affinity_key(user_id, conversation_id), deadline=deadline
+            ):
+                yield full_response
+
+        history_manager.schedule_refresh(user_id, conversation_id, history)
 
         # log only once at end
         if push_to_db:
@@ -97,6 +171,7 @@ class ModelRun:
                     'metadata' : metadata
             }
         )
+            conversation_store.append(user_id, conversation_id, "assistant", full_response)
 
     async def generate_image(
         self,
@@ -105,7 +180,9 @@ class ModelRun:
         user_id: str = "",
         image_path: str = "",
         history: Optional[List[Dict[str, str]]] = None,
-        stream: bool = True
+        stream: bool = True,
+        lane: str = "chat",
+        admission: Optional[Admission] = None
     ) -> AsyncGenerator[str, None]:
 
         if image_path == "":
@@ -142,7 +219,10 @@ class ModelRun:
             full_response = ""
             if stream:
                 chunk_count = 0
-                async for chunk in self.vision_model.astream([message]):
+                async for chunk in self._run(
+                    lambda backend: backend.vision_model, [message], lane, admission,
+                    conversation_id=affinity_key(user_id, conversation_id)
+                ):
                     chunk_count += 1
                     logger.info(f"Received chunk {chunk_count}: {type(chunk)}")
                     if chunk and hasattr(chunk, 'content') and chunk.content:
@@ -159,7 +239,11 @@ class ModelRun:
                 logger.info(f"Streaming completed. Total chunks: {chunk_count}, Response length: {len(full_response)}")
             else:
                 logger.info("Using non-streaming mode...")
-                response = await self.vision_model.ainvoke([message])
+                async for response in self._run(
+                    lambda backend: backend.vision_model, [message], lane, admission,
+                    stream=False, conversation_id=affinity_key(user_id, conversation_id)
+                ):
+                    pass
                 logger.info(f"Response type: {type(response)}")
                 content = response.content if hasattr(response, 'content') else str(response)
                 full_response = content
@@ -174,6 +258,7 @@ class ModelRun:
                         'sender': "assistant",
                     }
                 )
+                conversation_store.append(user_id, conversation_id, "assistant", full_response)
                 pushed = True
         except Exception as e:
             logger.error(f"Error in generate_image: {str(e)}")
@@ -189,30 +274,36 @@ class ModelRun:
                         'sender': "assistant",
                     }
                 )
+                conversation_store.append(user_id, conversation_id, "assistant", error_msg)
     async def generate_voice(
         self,
         question: str,
+        admission: Optional[Admission] = None
     ) -> AsyncGenerator[str, None]:
 
-        template = self.voice_template
-        model    = self.voice_model
-        chain    = template | model | StrOutputParser()
-
         chain_input = {"question": question}
 
-        async for chunk in chain.astream(chain_input):
+        async for chunk in self._run(
+            lambda backend: self.chains[backend.base_url][(False, True)],
+            chain_input, "voice", admission
+        ):
                 if chunk:
                     yield chunk
 
-    async def run_rag(self, question: str, context: str) -> AsyncGenerator[str, None]:
-
-        template = self.rag_template
-        model    = self.default_model
-        chain    = template | model | StrOutputParser()
+    async def run_rag(
+        self,
+        question: str,
+        context: str,
+        admission: Optional[Admission] = None,
+        deadline: Optional[Deadline] = None
+    ) -> AsyncGenerator[str, None]:
 
         chain_input = {"question": question, "context": context}
 
-        async for chunk in chain.astream(chain_input):
+        async for chunk in self._run(
+            lambda backend: self.chains[backend.base_url][(True, False)],
+            chain_input, "search", admission, deadline=deadline
+        ):
             if chunk:
                 yield chunk
 
@@ -0,0 +1,160 @@
+"""
+Query-aware context for search-domain answers.
+
+Scraped pages are split into passages of a few sentences, all passages are
+embedded against the question in one batch, and the best ones across every
+page are kept within a token budget. The model gets only those passages,
+each tagged with the number of the page it came from, and a numbered
+source list to cite.
+"""
+
+import logging
+import re
+from typing import Dict, List, Optional
+
+from configs.runtime_config import (
+    PASSAGE_MAX_CHARS,
+    PASSAGE_MIN_CHARS,
+    PASSAGES_PER_PAGE,
+    SEARCH_CONTEXT_TOKENS,
+)
+from modules.metrics.metrics import metrics
+from modules.search.result_ranker import text_similarity
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt-token estimate for mixed English/Hindi text
+CHARS_PER_TOKEN = 4
+SENTENCE_END_RE = re.compile(r"(?<=[.!?।])\s+")
+
+
+def approx_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _pieces(paragraph: str, max_chars: int) -> List[str]:
+    """
+    Cut an over-long paragraph at sentence ends, or at spaces if a single
+    sentence is too long.
+    """
+    pieces, current = [], ""
+    for sentence in SENTENCE_END_RE.split(paragraph):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars)
+            cut = cut if cut > 0 else max_chars
+            pieces.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_MAX_CHARS, min_chars: int = PASSAGE_MIN_CHARS) -> List[str]:
+    """
+    Paragraphs merged up to ``max_chars``; fragments under ``min_chars``
+    that cannot be merged are dropped.
+    """
+    passages, current = [], ""
+    for line in text.splitlines():
+        line = " ".join(line.split())
+        if not line:
+            continue
+        for piece in _pieces(line, max_chars):
+            if current and len(current) + 1 + len(piece) > max_chars:
+                passages.append(current)
+                current = piece
+            else:
+                current = f"{current} {piece}".strip()
+    if current:
+        passages.append(current)
+    return [passage for passage in passages if len(passage) >= min_chars]
+
+
+def select_passages(
+    query: str,
+    documents: List[Dict],
+    token_budget: int = SEARCH_CONTEXT_TOKENS,
+    per_page: int = PASSAGES_PER_PAGE
+) -> List[Dict]:
+    """
+    Best passages across ``documents`` within ``token_budget``, in page
+    then reading order. Each has ``source`` (1-based index into
+    ``documents``), ``position`` and ``score``. Blocking.
+    """
+    candidates = []
+    seen = set()
+    for source, document in enumerate(documents, start=1):
+        if not document.get("success"):
+            continue
+        for position, passage in enumerate(split_passages(document.get("content") or "")):
+            if passage in seen:
+                continue
+            seen.add(passage)
+            candidates.append({"source": source, "position": position, "text": passage})
+    if not candidates:
+        return []
+
+    with metrics.timer("passages.scoring_seconds"):
+        scores = text_similarity(query, [candidate["text"] for candidate in candidates])
+    for candidate, score in zip(candidates, scores):
+        candidate["score"] = round(score, 4)
+
+    selected, used, per_source = [], 0, {}
+    for candidate in sorted(candidates, key=lambda c: c["score"], reverse=True):
+        if per_source.get(candidate["source"], 0) >= per_page:
+            continue
+        cost = approx_tokens(candidate["text"])
+        if used + cost > token_budget:
+            continue
+        selected.append(candidate)
+        used += cost
+        per_source[candidate["source"]] = per_source.get(candidate["source"], 0) + 1
+
+    metrics.observe("passages.candidates", len(candidates))
+    metrics.observe("passages.selected", len(selected))
+    metrics.observe("passages.context_tokens", used)
+    return sorted(selected, key=lambda c: (c["source"], c["position"]))
+
+
+def format_passages(passages: List[Dict], documents: List[Dict]) -> str:
+    """
+    Numbered sources followed by their passages, e.g. ``[2] ...``.
+    """
+    if not passages:
+        return "No relevant web results were found."
+    sources = sorted({passage["source"] for passage in passages})
+    lines = ["Web search results. Cite sources by their number, like [1]."]
+    lines.append("Sources:")
+    for source in sources:
+        document = documents[source - 1]
+        title = (document.get("title") or "").strip() or "Untitled"
+        lines.append(f"[{source}] {title} - {document.get('url')}")
+    lines.append("")
+    lines.append("Passages:")
+    for passage in passages:
+        lines.append(f"[{passage['source']}] {passage['text']}")
+    return "\n".join(lines)
+
+
+def build_search_context(
+    query: str,
+    documents: List[Dict],
+    context_chars: Optional[int] = None,
+    token_budget: int = SEARCH_CONTEXT_TOKENS
+) -> str:
+    """
+    Prompt context for a search-domain answer. A degradation level's
+    ``context_chars`` lowers the token budget further.
+    """
+    if context_chars is not None:
+        token_budget = min(token_budget, context_chars // CHARS_PER_TOKEN)
+    passages = select_passages(query, documents, token_budget=token_budget)
+    raw_tokens = sum(approx_tokens(doc.get("content") or "") for doc in documents if doc.get("success"))
+    context = format_passages(passages, documents)
+    logger.info(f"Search context: {len(passages)} passages, ~{approx_tokens(context)} tokens from ~{raw_tokens} scraped")
+    return context
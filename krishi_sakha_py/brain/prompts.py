@@ -0,0 +1,42 @@
+"""
+Prompt templates shared by ModelRun.
+Templates are compiled once; conversation history is passed in as message
+objects through a MessagesPlaceholder, so user text is never parsed as a
+template.
+"""
+
+from typing import Dict, List, Optional
+
+from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.schema import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+CONTEXT_INSTRUCTION = "\n\nUse the following context to answer the user's question:\n{context}"
+
+
+def build_chat_prompt(system_message: str, with_context: bool = False) -> ChatPromptTemplate:
+    """
+    Build the chat template: system message, optional history, current question.
+    """
+    system = system_message + CONTEXT_INSTRUCTION if with_context else system_message
+    return ChatPromptTemplate.from_messages([
+        ("system", system),
+        MessagesPlaceholder(variable_name="history", optional=True),
+        ("human", "{question}"),
+    ])
+
+
+def history_to_messages(summary: str = "", turns: Optional[List[Dict[str, str]]] = None) -> List[BaseMessage]:
+    """
+    Convert a rolling summary and {"role", "content"} turns into chat messages.
+    """
+    messages: List[BaseMessage] = []
+    if summary:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary}"))
+    for turn in turns or []:
+        role = turn.get("role")
+        content = turn.get("content", "")
+        if role == "user":
+            messages.append(HumanMessage(content=content))
+        elif role == "assistant":
+            messages.append(AIMessage(content=content))
+    return messages
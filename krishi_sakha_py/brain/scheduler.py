@@ -0,0 +1,169 @@
+"""
+Admission scheduler for LLM generations.
+Caps the number of concurrent generations and hands out free slots by
+priority lane (voice > chat > search > batch), FIFO within a lane.
+Each lane has a bounded queue; requests beyond it are rejected immediately.
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+
+from configs.runtime_config import LLM_MAX_IN_FLIGHT, LLM_LANE_QUEUE_LIMITS
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+LANE_PRIORITY = {"voice": 0, "chat": 1, "search": 2, "batch": 3}
+
+
+class SchedulerBusyError(Exception):
+    """Raised when a lane's queue is full or no slot frees up in time"""
+
+    def __init__(self, lane: str, reason: str = "queue full"):
+        super().__init__(f"LLM lane '{lane}' is busy ({reason})")
+        self.lane = lane
+        self.reason = reason
+
+
+class Admission:
+    """
+    A reserved place in a lane's queue.
+
+    Taken when the request arrives so overload is rejected up front, and
+    entered (``async with``) right before generation starts. Releasing is
+    idempotent, so callers can always release in a ``finally`` block.
+    """
+
+    def __init__(self, scheduler: "LLMScheduler", lane: str):
+        self.scheduler = scheduler
+        self.lane = lane
+        self.state = "queued"
+        self.created_at = time.perf_counter()
+        # Upper bound on the wait when entered with ``async with``
+        self.wait_timeout: Optional[float] = None
+
+    async def acquire(self, timeout: Optional[float] = None):
+        if self.state != "queued":
+            raise RuntimeError(f"Admission already {self.state}")
+        await self.scheduler._acquire(self, timeout)
+        self.state = "running"
+
+    def release(self):
+        if self.state == "queued":
+            self.scheduler._abandon(self)
+        elif self.state == "running":
+            self.scheduler._release_slot()
+        self.state = "done"
+
+    async def __aenter__(self):
+        try:
+            await self.acquire(self.wait_timeout)
+        except BaseException:
+            # __aexit__ does not run when entering fails; give the place back
+            self.release()
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class LLMScheduler:
+    def __init__(
+        self,
+        max_in_flight: int = LLM_MAX_IN_FLIGHT,
+        lane_limits: Optional[Dict[str, int]] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.lane_limits = dict(lane_limits or LLM_LANE_QUEUE_LIMITS)
+        self._in_flight = 0
+        self._queued: Dict[str, int] = {lane: 0 for lane in LANE_PRIORITY}
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._waiting = 0
+        self._sequence = itertools.count()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def queue_depth(self, lane: Optional[str] = None) -> int:
+        if lane:
+            return self._queued[lane]
+        return sum(self._queued.values())
+
+    def admit(self, lane: str) -> Admission:
+        """
+        Reserve a place in the lane's queue or raise SchedulerBusyError.
+        """
+        if lane not in LANE_PRIORITY:
+            raise ValueError(f"Unknown LLM lane: {lane}")
+        if self._queued[lane] >= self.lane_limits.get(lane, 0):
+            metrics.incr(f"scheduler.rejected.{lane}")
+            raise SchedulerBusyError(lane)
+
+        self._queued[lane] += 1
+        self._update_gauges()
+        return Admission(self, lane)
+
+    async def _acquire(self, admission: Admission, timeout: Optional[float]):
+        lane = admission.lane
+        wait_start = time.perf_counter()
+
+        if self._in_flight < self.max_in_flight and not self._waiting:
+            self._in_flight += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (LANE_PRIORITY[lane], next(self._sequence), future))
+            self._waiting += 1
+            try:
+                if timeout is None:
+                    await future
+                else:
+                    await asyncio.wait_for(future, timeout)
+            except asyncio.CancelledError:
+                self._give_up(future)
+                raise
+            except asyncio.TimeoutError:
+                self._give_up(future)
+                metrics.incr(f"scheduler.timeouts.{lane}")
+                raise SchedulerBusyError(lane, "timed out waiting for a slot")
+
+        self._queued[lane] -= 1
+        metrics.observe(f"scheduler.queue_wait_seconds.{lane}", time.perf_counter() - wait_start)
+        metrics.incr(f"scheduler.admitted.{lane}")
+        self._update_gauges()
+
+    def _give_up(self, future: asyncio.Future):
+        if future.done() and not future.cancelled():
+            # A slot was handed over just as we gave up; pass it on
+            self._release_slot()
+        else:
+            future.cancel()
+            self._waiting -= 1
+
+    def _abandon(self, admission: Admission):
+        self._queued[admission.lane] -= 1
+        self._update_gauges()
+
+    def _release_slot(self):
+        self._in_flight -= 1
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._in_flight += 1
+                self._waiting -= 1
+                future.set_result(True)
+                break
+        self._update_gauges()
+
+    def _update_gauges(self):
+        metrics.set_gauge("scheduler.in_flight", self._in_flight)
+        for lane, depth in self._queued.items():
+            metrics.set_gauge(f"scheduler.queued.{lane}", depth)
+
+
+llm_scheduler = LLMScheduler()
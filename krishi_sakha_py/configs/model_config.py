@@ -21,6 +21,23 @@ Keep your answers short and easy to understand
 """
 
 
+# Conversation history windowing
+# Only the most recent turns are replayed verbatim; older turns are folded
+# into a rolling summary that is cached per conversation.
+HISTORY_MAX_TURNS = 6
+HISTORY_TOKEN_BUDGET = 1200
+HISTORY_SUMMARY_MAX_WORDS = 120
+HISTORY_SUMMARY_CACHE_SIZE = 1000
+
+HISTORY_SUMMARY_SYSTEM_MESSAGE = """
+You summarize conversations between a farmer and an agriculture assistant.
+Merge the previous summary with the new messages into one short summary.
+Keep crops, locations, dates, quantities, problems and advice already given.
+Write in the language the farmer is using.
+Do not add anything that was not said.
+"""
+
+
 ROUTER_CONFIG_DISCRIPTION_SYSTEM_PROMPT = """
 You are a routing assistant.
 
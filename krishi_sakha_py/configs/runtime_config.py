@@ -0,0 +1,278 @@
+import os
+
+
+# Server-side conversation store (in-process cache in front of chat_messages)
+CONVERSATION_CACHE_SIZE = int(os.getenv("CONVERSATION_CACHE_SIZE", "2000"))
+CONVERSATION_CACHE_TTL_SECONDS = float(os.getenv("CONVERSATION_CACHE_TTL_SECONDS", "1800"))
+CONVERSATION_HISTORY_LIMIT = int(os.getenv("CONVERSATION_HISTORY_LIMIT", "50"))
+
+
+# LLM admission scheduler
+# Lanes are served in priority order: voice > chat > search > batch.
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "4"))
+LLM_LANE_QUEUE_LIMITS = {
+    "voice": int(os.getenv("LLM_QUEUE_LIMIT_VOICE", "16")),
+    "chat": int(os.getenv("LLM_QUEUE_LIMIT_CHAT", "32")),
+    "search": int(os.getenv("LLM_QUEUE_LIMIT_SEARCH", "16")),
+    "batch": int(os.getenv("LLM_QUEUE_LIMIT_BATCH", "8")),
+}
+LLM_BUSY_RETRY_AFTER_SECONDS = int(os.getenv("LLM_BUSY_RETRY_AFTER_SECONDS", "5"))
+
+
+# Ollama backend pool
+OLLAMA_BASE_URLS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("OLLAMA_BASE_URLS", "http://localhost:11434").split(",")
+    if url.strip()
+]
+OLLAMA_PROBE_INTERVAL_SECONDS = float(os.getenv("OLLAMA_PROBE_INTERVAL_SECONDS", "10"))
+OLLAMA_PROBE_TIMEOUT_SECONDS = float(os.getenv("OLLAMA_PROBE_TIMEOUT_SECONDS", "2"))
+OLLAMA_EJECT_AFTER_FAILURES = int(os.getenv("OLLAMA_EJECT_AFTER_FAILURES", "2"))
+# A conversation stays on its backend unless that backend has this many
+# more outstanding requests than the least-loaded one
+OLLAMA_AFFINITY_SLACK = int(os.getenv("OLLAMA_AFFINITY_SLACK", "2"))
+
+
+# Server-sent events
+SSE_DISCONNECT_POLL_SECONDS = float(os.getenv("SSE_DISCONNECT_POLL_SECONDS", "0.5"))
+# Text chunks are merged for up to this long / this many bytes per frame
+SSE_COALESCE_MS = float(os.getenv("SSE_COALESCE_MS", "30"))
+SSE_COALESCE_BYTES = int(os.getenv("SSE_COALESCE_BYTES", "64"))
+
+
+# Voice sentence streaming
+# A sentence is flushed early at a word boundary once it grows this long
+VOICE_SENTENCE_MAX_CHARS = int(os.getenv("VOICE_SENTENCE_MAX_CHARS", "220"))
+# Shorter fragments ("1.", "Ji.") are held and joined with the next sentence
+VOICE_SENTENCE_MIN_CHARS = int(os.getenv("VOICE_SENTENCE_MIN_CHARS", "12"))
+
+
+# Question routing
+# The local router shares the embedding model used for document retrieval
+ROUTER_EMBEDDING_MODEL = os.getenv("ROUTER_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Gemini is consulted only when the best domain beats the runner-up by
+# less than this cosine margin
+ROUTER_MIN_MARGIN = float(os.getenv("ROUTER_MIN_MARGIN", "0.06"))
+# Added to a domain's score when one of its keyword rules matches
+ROUTER_RULE_BOOST = float(os.getenv("ROUTER_RULE_BOOST", "0.08"))
+ROUTER_GEMINI_TIMEOUT_SECONDS = float(os.getenv("ROUTER_GEMINI_TIMEOUT_SECONDS", "3"))
+# Not worth asking Gemini with less time than this left
+ROUTER_GEMINI_MIN_SECONDS = float(os.getenv("ROUTER_GEMINI_MIN_SECONDS", "0.5"))
+
+
+# Search query rewriting
+QUERY_REWRITE_MAX_TERMS = int(os.getenv("QUERY_REWRITE_MAX_TERMS", "6"))
+QUERY_REWRITE_CACHE_SIZE = int(os.getenv("QUERY_REWRITE_CACHE_SIZE", "4096"))
+# Questions longer than this (in words) are rewritten by Gemini when it
+# answers in time; the local rewrite is used otherwise
+QUERY_REWRITE_LONG_INPUT_WORDS = int(os.getenv("QUERY_REWRITE_LONG_INPUT_WORDS", "24"))
+QUERY_REWRITE_GEMINI_TIMEOUT_SECONDS = float(os.getenv("QUERY_REWRITE_GEMINI_TIMEOUT_SECONDS", "1.5"))
+
+
+# Document retrieval
+CHROMA_DB_PATH = os.getenv(
+    "CHROMA_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "chroma_db")
+)
+# Retrieval against these collections starts on the raw prompt while the
+# question is still being routed, and is kept if the route agrees
+SPECULATIVE_RETRIEVAL = os.getenv("SPECULATIVE_RETRIEVAL", "true").lower() in ("1", "true", "yes")
+SPECULATIVE_COLLECTIONS = [
+    name.strip()
+    for name in os.getenv("SPECULATIVE_COLLECTIONS", "annual_report").split(",")
+    if name.strip()
+]
+# Speculation is extra load that may be thrown away, so it stops from this
+# degradation level on (2 = "lean")
+SPECULATIVE_MAX_DEGRADATION_LEVEL = int(os.getenv("SPECULATIVE_MAX_DEGRADATION_LEVEL", "1"))
+
+
+# Web search (SearxNG, YouTube and page scraping run concurrently)
+SEARXNG_URL = os.getenv("SEARXNG_URL", "http://localhost:8080").rstrip("/")
+# Further instances tried in order when SEARXNG_URL fails, comma separated
+SEARXNG_FALLBACK_URLS = [u.strip().rstrip("/") for u in os.getenv("SEARXNG_FALLBACK_URLS", "").split(",") if u.strip()]
+# An instance that failed is tried last for this long
+SEARXNG_INSTANCE_COOLDOWN_SECONDS = float(os.getenv("SEARXNG_INSTANCE_COOLDOWN_SECONDS", "30"))
+SEARXNG_CACHE_SIZE = int(os.getenv("SEARXNG_CACHE_SIZE", "1024"))
+SEARXNG_CACHE_TTL_SECONDS = float(os.getenv("SEARXNG_CACHE_TTL_SECONDS", "900"))
+# Expired results are still used for this long when every instance is down
+SEARXNG_STALE_SECONDS = float(os.getenv("SEARXNG_STALE_SECONDS", str(24 * 3600)))
+SEARCH_MAX_PAGES = int(os.getenv("SEARCH_MAX_PAGES", "5"))
+# Per-source budgets; a source that runs over is reported empty and the
+# pipeline carries on with what the others returned
+SEARCH_SEARXNG_TIMEOUT_SECONDS = float(os.getenv("SEARCH_SEARXNG_TIMEOUT_SECONDS", "4"))
+SEARCH_YOUTUBE_TIMEOUT_SECONDS = float(os.getenv("SEARCH_YOUTUBE_TIMEOUT_SECONDS", "5"))
+SEARCH_PAGES_TIMEOUT_SECONDS = float(os.getenv("SEARCH_PAGES_TIMEOUT_SECONDS", "8"))
+
+
+# Request deadlines
+# Time-to-first-token targets. Every stage before generation gets what is
+# left of the budget, minus the reserve held back for the first token, and
+# scales itself down (fewer pages, no YouTube, no Gemini) to fit.
+CHAT_TTFT_SLO_SECONDS = float(os.getenv("CHAT_TTFT_SLO_SECONDS", "8"))
+SEARCH_TTFT_SLO_SECONDS = float(os.getenv("SEARCH_TTFT_SLO_SECONDS", "10"))
+DEADLINE_GENERATION_RESERVE_SECONDS = float(os.getenv("DEADLINE_GENERATION_RESERVE_SECONDS", "1.5"))
+# Once the budget is spent a request still waits this long for a model slot
+DEADLINE_MIN_QUEUE_WAIT_SECONDS = float(os.getenv("DEADLINE_MIN_QUEUE_WAIT_SECONDS", "2"))
+
+
+# Load-adaptive degradation
+# Levels 1-4 are entered when any signal crosses the matching threshold:
+# queued LLM requests per slot, event-loop lag (seconds) and p90
+# time-to-first-token as a fraction of CHAT_TTFT_SLO_SECONDS.
+def _thresholds(name: str, default: str):
+    return [float(value) for value in os.getenv(name, default).split(",")]
+
+
+DEGRADE_EVAL_INTERVAL_SECONDS = float(os.getenv("DEGRADE_EVAL_INTERVAL_SECONDS", "1"))
+DEGRADE_QUEUE_THRESHOLDS = _thresholds("DEGRADE_QUEUE_THRESHOLDS", "0.5,1.5,3,5")
+DEGRADE_LOOP_LAG_THRESHOLDS = _thresholds("DEGRADE_LOOP_LAG_THRESHOLDS", "0.05,0.1,0.25,0.5")
+DEGRADE_TTFT_THRESHOLDS = _thresholds("DEGRADE_TTFT_THRESHOLDS", "0.75,1,1.5,2")
+# Step back down one level after signals stay below it for this long
+DEGRADE_RECOVERY_SECONDS = float(os.getenv("DEGRADE_RECOVERY_SECONDS", "15"))
+# Time-to-first-token samples older than this are ignored
+DEGRADE_TTFT_WINDOW_SECONDS = float(os.getenv("DEGRADE_TTFT_WINDOW_SECONDS", "60"))
+
+
+# Playwright browser pool (one long-lived Chromium shared by all scrapes)
+BROWSER_POOL_ENABLED = os.getenv("BROWSER_POOL_ENABLED", "true").lower() in ("1", "true", "yes")
+BROWSER_POOL_CONTEXTS = int(os.getenv("BROWSER_POOL_CONTEXTS", "2"))
+# Pages open at once across all requests
+BROWSER_POOL_MAX_PAGES = int(os.getenv("BROWSER_POOL_MAX_PAGES", "8"))
+# A page is closed and replaced after this many navigations
+BROWSER_PAGE_MAX_NAVIGATIONS = int(os.getenv("BROWSER_PAGE_MAX_NAVIGATIONS", "50"))
+# Contexts are recycled when Chromium's resident memory exceeds this
+BROWSER_POOL_MEMORY_LIMIT_MB = int(os.getenv("BROWSER_POOL_MEMORY_LIMIT_MB", "1500"))
+BROWSER_POOL_CHECK_INTERVAL_SECONDS = float(os.getenv("BROWSER_POOL_CHECK_INTERVAL_SECONDS", "30"))
+
+# Request blocking, installed on every browser context
+SCRAPER_REQUEST_POLICY_ENABLED = os.getenv("SCRAPER_REQUEST_POLICY_ENABLED", "true").lower() in ("1", "true", "yes")
+# Resource types never loaded, from any host
+SCRAPER_BLOCKED_RESOURCE_TYPES = [
+    t.strip() for t in os.getenv("SCRAPER_BLOCKED_RESOURCE_TYPES", "image,media,font,stylesheet").split(",") if t.strip()
+]
+# Resource types not loaded from other sites than the page's own
+SCRAPER_THIRD_PARTY_BLOCKED_TYPES = [
+    t.strip() for t in os.getenv("SCRAPER_THIRD_PARTY_BLOCKED_TYPES", "xhr,fetch,eventsource,websocket,ping").split(",")
+    if t.strip()
+]
+# Ad, analytics and social hosts blocked on top of the built-in list, comma separated
+SCRAPER_BLOCKED_DOMAINS = [d.strip().lower() for d in os.getenv("SCRAPER_BLOCKED_DOMAINS", "").split(",") if d.strip()]
+# Sub-resources stop loading once a page has received this many bytes
+SCRAPER_PAGE_MAX_BYTES = int(os.getenv("SCRAPER_PAGE_MAX_BYTES", str(3 * 1024 * 1024)))
+# Share of page loads left unfiltered, to compare load times against
+SCRAPER_REQUEST_POLICY_HOLDOUT = float(os.getenv("SCRAPER_REQUEST_POLICY_HOLDOUT", "0"))
+
+
+# Tiered scraping: plain HTTP first, Playwright only when that yields too little
+SCRAPER_HTTP_ENABLED = os.getenv("SCRAPER_HTTP_ENABLED", "true").lower() in ("1", "true", "yes")
+SCRAPER_HTTP_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_HTTP_TIMEOUT_SECONDS", "3"))
+SCRAPER_HTTP_MAX_BYTES = int(os.getenv("SCRAPER_HTTP_MAX_BYTES", str(2 * 1024 * 1024)))
+SCRAPER_HTTP_MAX_CONNECTIONS = int(os.getenv("SCRAPER_HTTP_MAX_CONNECTIONS", "32"))
+# Extracted text shorter than this is retried in the browser
+SCRAPER_MIN_TEXT_CHARS = int(os.getenv("SCRAPER_MIN_TEXT_CHARS", "300"))
+# Hosts always sent to the browser, comma separated
+SCRAPER_JS_HOSTS = [h.strip() for h in os.getenv("SCRAPER_JS_HOSTS", "").split(",") if h.strip()]
+# Short HTTP extractions from a host before it is treated as JS-only
+SCRAPER_JS_HOST_MIN_SAMPLES = int(os.getenv("SCRAPER_JS_HOST_MIN_SAMPLES", "2"))
+
+
+# Scraped page cache (compressed sqlite store with an in-memory hot tier)
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+PAGE_CACHE_PATH = os.getenv(
+    "PAGE_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "page_cache", "pages.sqlite3")
+)
+PAGE_CACHE_HOT_SIZE = int(os.getenv("PAGE_CACHE_HOT_SIZE", "256"))
+PAGE_CACHE_MAX_ROWS = int(os.getenv("PAGE_CACHE_MAX_ROWS", "20000"))
+PAGE_CACHE_TTL_SECONDS = float(os.getenv("PAGE_CACHE_TTL_SECONDS", str(6 * 3600)))
+# Per-host TTLs as host=seconds, matched on the host or any parent domain
+PAGE_CACHE_HOST_TTLS = {
+    host.strip(): float(seconds)
+    for host, seconds in (
+        item.split("=", 1)
+        for item in os.getenv(
+            "PAGE_CACHE_HOST_TTLS",
+            "icar.org.in=604800,gov.in=259200,nic.in=259200,wikipedia.org=604800"
+        ).split(",")
+        if "=" in item
+    )
+}
+# Expired pages are still served for this long when the origin is down
+PAGE_CACHE_STALE_SECONDS = float(os.getenv("PAGE_CACHE_STALE_SECONDS", str(7 * 86400)))
+
+
+# Search result pre-ranking (scrape only the most promising pages)
+# Pages read per search before any widening
+SEARCH_PRERANK_TOP_K = int(os.getenv("SEARCH_PRERANK_TOP_K", "3"))
+# Pages with at least SCRAPER_MIN_TEXT_CHARS of text wanted; short of this
+# the next-best results are read while budget remains
+SEARCH_MIN_GOOD_PAGES = int(os.getenv("SEARCH_MIN_GOOD_PAGES", "2"))
+# Results from one domain allowed among the pages read
+SEARCH_MAX_PER_DOMAIN = int(os.getenv("SEARCH_MAX_PER_DOMAIN", "1"))
+# Added to (or, negative, taken from) the snippet similarity of a host or
+# any of its parent domains, as host=boost
+SEARCH_HOST_REPUTATION = {
+    host.strip(): float(boost)
+    for host, boost in (
+        item.split("=", 1)
+        for item in os.getenv(
+            "SEARCH_HOST_REPUTATION",
+            "gov.in=0.15,nic.in=0.15,icar.org.in=0.15,icrisat.org=0.1,fao.org=0.1,"
+            "wikipedia.org=0.05,youtube.com=-0.3,facebook.com=-0.3,instagram.com=-0.3,"
+            "pinterest.com=-0.3,quora.com=-0.1"
+        ).split(",")
+        if "=" in item
+    )
+}
+
+
+# Search context: the passages of scraped pages closest to the question
+# Characters kept per scraped page before passage selection
+SCRAPER_MAX_CONTENT_CHARS = int(os.getenv("SCRAPER_MAX_CONTENT_CHARS", "20000"))
+PASSAGE_MAX_CHARS = int(os.getenv("PASSAGE_MAX_CHARS", "600"))
+# Shorter passages (menus, bylines, cookie notices) are left out
+PASSAGE_MIN_CHARS = int(os.getenv("PASSAGE_MIN_CHARS", "80"))
+PASSAGES_PER_PAGE = int(os.getenv("PASSAGES_PER_PAGE", "4"))
+# Approximate prompt tokens (4 characters each) spent on web passages
+SEARCH_CONTEXT_TOKENS = int(os.getenv("SEARCH_CONTEXT_TOKENS", "1500"))
+
+
+# HTML extraction (trafilatura in worker processes, off the event loop)
+# 0 runs extraction in a thread of this process instead
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Pages waiting for or inside a worker; beyond this callers wait their turn
+EXTRACTION_MAX_PENDING = int(os.getenv("EXTRACTION_MAX_PENDING", "32"))
+# CPU seconds trafilatura may spend on one page before the fast extractor
+# takes over
+EXTRACTION_CPU_SECONDS = float(os.getenv("EXTRACTION_CPU_SECONDS", "1.5"))
+# Wall-clock backstop for one page, queueing excluded
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "3"))
+
+
+# Hedged page reads: a page still loading past this percentile of recent
+# live page times gets the next-best search result started alongside it
+SEARCH_HEDGE_PERCENTILE = float(os.getenv("SEARCH_HEDGE_PERCENTILE", "75"))
+SEARCH_HEDGE_MIN_SECONDS = float(os.getenv("SEARCH_HEDGE_MIN_SECONDS", "1.0"))
+# Used until SEARCH_HEDGE_MIN_SAMPLES page times have been seen
+SEARCH_HEDGE_DEFAULT_SECONDS = float(os.getenv("SEARCH_HEDGE_DEFAULT_SECONDS", "2.0"))
+SEARCH_HEDGE_MIN_SAMPLES = int(os.getenv("SEARCH_HEDGE_MIN_SAMPLES", "20"))
+
+
+# Per-host scrape scoreboard and circuit breaker
+HOST_SCOREBOARD_PATH = os.getenv(
+    "HOST_SCOREBOARD_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "page_cache", "host_scoreboard.json")
+)
+# Written to disk after this many recorded fetches, and at shutdown
+HOST_SCOREBOARD_SAVE_EVERY = int(os.getenv("HOST_SCOREBOARD_SAVE_EVERY", "50"))
+# Consecutive failures that open a host's circuit
+HOST_BREAKER_FAILURES = int(os.getenv("HOST_BREAKER_FAILURES", "3"))
+# First cool-down; it doubles each time a trial fetch fails, up to the max
+HOST_BREAKER_COOLDOWN_SECONDS = float(os.getenv("HOST_BREAKER_COOLDOWN_SECONDS", "300"))
+HOST_BREAKER_MAX_COOLDOWN_SECONDS = float(os.getenv("HOST_BREAKER_MAX_COOLDOWN_SECONDS", "3600"))
+# Hosts whose median fetch is slower than this rank lower in search results
+HOST_SLOW_SECONDS = float(os.getenv("HOST_SLOW_SECONDS", "2.5"))
+
+# Admin endpoints (/admin/*, /metrics): Supabase user ids allowed in, comma separated (empty = nobody)
+ADMIN_USER_IDS = [u.strip() for u in os.getenv("ADMIN_USER_IDS", "").split(",") if u.strip()]
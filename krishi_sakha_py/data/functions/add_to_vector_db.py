@@ -1,5 +1,6 @@
 import logging
 import json
+import threading
 from typing import List, Dict, Optional, Union
 from pathlib import Path
 from datetime import datetime
@@ -33,13 +34,32 @@ class VectorDBError(Exception):
     pass
 
 
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_shared_models: Dict[str, "SentenceTransformer"] = {}
+_shared_models_lock = threading.Lock()
+
+
+def get_shared_embedder(model_name: str = DEFAULT_EMBEDDING_MODEL) -> "SentenceTransformer":
+    """
+    Process-wide SentenceTransformer instance, loaded once per model name.
+    Shared by the vector DB managers and the local question router.
+    """
+    if not SENTENCE_TRANSFORMERS_AVAILABLE:
+        raise VectorDBError("sentence-transformers not available. Install with: pip install sentence-transformers")
+
+    with _shared_models_lock:
+        model = _shared_models.get(model_name)
+        if model is None:
+            model = _shared_models[model_name] = SentenceTransformer(model_name)
+            logger.info(f"Loaded SentenceTransformer model: {model_name}")
+        return model
+
+
 class EmbeddingGenerator:
     
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        if not SENTENCE_TRANSFORMERS_AVAILABLE:
-            raise VectorDBError("sentence-transformers not available. Install with: pip install sentence-transformers")
-        
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL):
+        self.model = get_shared_embedder(model_name)
         logger.info(f"Initialized SentenceTransformer with model: {model_name}")
     
     def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
@@ -1,11 +1,40 @@
 from dotenv import load_dotenv, find_dotenv
 load_dotenv(find_dotenv())
 
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.responses import StreamingResponse
 from langchain_ollama import ChatOllama
-from routes import search, test, chat, voice
-app = FastAPI()
+from brain.brain_init import backend_pool
+from brain.degradation import degradation
+from modules.scrapper.browser_pool import browser_pool
+from modules.scrapper.scrapper import tiered_fetcher
+from modules.scrapper.extraction import extraction_pool
+from modules.search.searxng_json import searxng_client
+from routes.helpers.local_router import local_router
+from routes import search, test, chat, voice, metrics, admin
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Extraction workers first, from a clean interpreter, before models load
+    await extraction_pool.start()
+    await backend_pool.start()
+    await degradation.start()
+    await browser_pool.start()
+    # Load the router's embedding model before the first question arrives
+    await asyncio.to_thread(local_router.load)
+    yield
+    await browser_pool.stop()
+    await tiered_fetcher.close()
+    await searxng_client.close()
+    extraction_pool.close()
+    await degradation.stop()
+    await backend_pool.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 @app.get("/")
@@ -17,4 +46,6 @@ async def root():
 app.include_router(test.router)
 app.include_router(chat.router)
 app.include_router(voice.router)
-app.include_router(search.router)
\ No newline at end of file
+app.include_router(search.router)
+app.include_router(metrics.router)
+app.include_router(admin.router)
\ No newline at end of file
@@ -0,0 +1,348 @@
+"""
+Long-lived Playwright browser shared by every scrape.
+
+One Chromium is launched in the app lifespan with a fixed number of warm
+contexts (stealth script and request policy already installed). Pages
+are leased from the pool and reused; a page is closed after
+BROWSER_PAGE_MAX_NAVIGATIONS navigations or a failed scrape, contexts are
+replaced when Chromium's memory grows past BROWSER_POOL_MEMORY_LIMIT_MB,
+and a crashed browser is relaunched on the next lease. BROWSER_POOL_MAX_PAGES
+caps open pages across all requests.
+"""
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Set
+
+from playwright.async_api import async_playwright
+
+from configs.runtime_config import (
+    BROWSER_PAGE_MAX_NAVIGATIONS,
+    BROWSER_POOL_CHECK_INTERVAL_SECONDS,
+    BROWSER_POOL_CONTEXTS,
+    BROWSER_POOL_ENABLED,
+    BROWSER_POOL_MAX_PAGES,
+    BROWSER_POOL_MEMORY_LIMIT_MB,
+)
+from modules.metrics.metrics import metrics
+from modules.scrapper.request_policy import request_policy
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+BROWSER_ARGS = [
+    '--no-first-run',
+    '--no-default-browser-check',
+    '--disable-blink-features=AutomationControlled'
+]
+VIEWPORT = {'width': 1280, 'height': 720}
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    window.chrome = {runtime: {}};
+    Object.defineProperty(navigator, 'plugins', {get: () => [1,2,3,4,5]});
+    Object.defineProperty(navigator, 'languages', {get: () => ['en-US','en']});
+"""
+
+
+async def new_stealth_context(browser):
+    """
+    A context with the stealth script and the request policy installed.
+    """
+    context = await browser.new_context(viewport=VIEWPORT, user_agent=USER_AGENT)
+    await context.add_init_script(STEALTH_SCRIPT)
+    await request_policy.install(context)
+    return context
+
+
+def chromium_rss_mb() -> Optional[float]:
+    """
+    Resident memory of every Chromium process under this one, or None
+    without psutil.
+    """
+    if not PSUTIL_AVAILABLE:
+        return None
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            if "chrom" in child.name().lower():
+                total += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return total / (1024 * 1024)
+
+
+async def _quietly(awaitable):
+    try:
+        await awaitable
+    except Exception:
+        # Already gone with its browser
+        pass
+
+
+# Background closes, referenced until done so they are not garbage-collected mid-way
+_closing: Set[asyncio.Task] = set()
+
+
+def _close_in_background(awaitable):
+    task = asyncio.create_task(_quietly(awaitable))
+    _closing.add(task)
+    task.add_done_callback(_closing.discard)
+
+
+class _PooledContext:
+    def __init__(self, context):
+        self.context = context
+        self.pages = 0
+        self.draining = False
+        self.closed = False
+
+    def close_when_drained(self):
+        if self.draining and self.pages <= 0 and not self.closed:
+            self.closed = True
+            _close_in_background(self.context.close())
+
+
+class _PooledPage:
+    def __init__(self, page, owner: _PooledContext, generation: int):
+        self.page = page
+        self.owner = owner
+        self.generation = generation
+        self.navigations = 0
+        self.discard = False
+        page.on("crash", lambda _: self._crashed())
+
+    def _crashed(self):
+        metrics.incr("browser_pool.page_crashes")
+        self.discard = True
+
+
+class BrowserPool:
+    def __init__(
+        self,
+        contexts: int = BROWSER_POOL_CONTEXTS,
+        max_pages: int = BROWSER_POOL_MAX_PAGES,
+        max_navigations: int = BROWSER_PAGE_MAX_NAVIGATIONS,
+        memory_limit_mb: float = BROWSER_POOL_MEMORY_LIMIT_MB,
+        check_interval: float = BROWSER_POOL_CHECK_INTERVAL_SECONDS,
+        headless: bool = True,
+    ):
+        self.context_count = max(1, contexts)
+        self.max_pages = max(1, max_pages)
+        self.max_navigations = max_navigations
+        self.memory_limit_mb = memory_limit_mb
+        self.check_interval = check_interval
+        self.headless = headless
+        self._playwright = None
+        self._browser = None
+        # Bumped on every launch so pages of a dead browser are never reused
+        self._generation = 0
+        self._contexts: List[_PooledContext] = []
+        self._idle: List[_PooledPage] = []
+        self._leased: Dict[object, _PooledPage] = {}
+        self._semaphore = asyncio.Semaphore(self.max_pages)
+        self._launch_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.memory_mb: Optional[float] = None
+
+    @property
+    def running(self) -> bool:
+        return self._playwright is not None
+
+    @property
+    def connected(self) -> bool:
+        return self._browser is not None and self._browser.is_connected()
+
+    async def start(self):
+        if self.running or not BROWSER_POOL_ENABLED:
+            return
+        try:
+            self._playwright = await async_playwright().start()
+            await self._launch()
+        except Exception as e:
+            logger.error(f"Browser pool unavailable, scrapes will launch their own browser: {e}")
+            await self.stop()
+            return
+        self._task = asyncio.create_task(self._loop())
+        logger.info(f"Browser pool ready: {self.context_count} contexts, {self.max_pages} pages max")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception as e:
+                logger.warning(f"Error closing pooled browser: {e}")
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        self._contexts, self._idle = [], []
+
+    async def _launch(self):
+        self._generation += 1
+        self._idle = []
+        self._browser = await self._playwright.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
+        self._browser.on("disconnected", lambda _: self._disconnected())
+        self._contexts = [await self._new_context() for _ in range(self.context_count)]
+
+    async def _new_context(self) -> _PooledContext:
+        return _PooledContext(await new_stealth_context(self._browser))
+
+    def _disconnected(self):
+        metrics.incr("browser_pool.disconnects")
+        logger.warning("Pooled browser disconnected, relaunching on next use")
+
+    async def _ensure_browser(self):
+        if self.connected:
+            return
+        async with self._launch_lock:
+            if self.connected:
+                return
+            logger.warning("Relaunching pooled browser")
+            metrics.incr("browser_pool.relaunches")
+            if self._browser is not None:
+                try:
+                    await self._browser.close()
+                except Exception:
+                    pass
+            await self._launch()
+
+    async def _checkout(self) -> _PooledPage:
+        await self._ensure_browser()
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.generation == self._generation and not pooled.owner.draining and not pooled.page.is_closed():
+                metrics.incr("browser_pool.pages_reused")
+                return pooled
+            self._close(pooled)
+
+        owner = min((c for c in self._contexts if not c.draining), key=lambda c: c.pages)
+        owner.pages += 1
+        try:
+            page = await owner.context.new_page()
+        except Exception:
+            owner.pages -= 1
+            raise
+        metrics.incr("browser_pool.pages_opened")
+        return _PooledPage(page, owner, self._generation)
+
+    def _checkin(self, pooled: _PooledPage, healthy: bool):
+        pooled.navigations += 1
+        if (
+            not healthy
+            or pooled.discard
+            or pooled.navigations >= self.max_navigations
+            or pooled.owner.draining
+            or pooled.generation != self._generation
+            or pooled.page.is_closed()
+        ):
+            metrics.incr("browser_pool.pages_recycled")
+            self._close(pooled)
+        else:
+            self._idle.append(pooled)
+
+    def _close(self, pooled: _PooledPage):
+        """
+        Close a page in the background; a drained context goes with its
+        last page.
+        """
+        pooled.owner.pages -= 1
+        _close_in_background(pooled.page.close())
+        pooled.owner.close_when_drained()
+
+    def discard(self, page):
+        """
+        Close ``page`` instead of reusing it when its lease ends.
+        """
+        pooled = self._leased.get(page)
+        if pooled is not None:
+            pooled.discard = True
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Lease a page; waits while BROWSER_POOL_MAX_PAGES are in use.
+        """
+        started = time.perf_counter()
+        async with self._semaphore:
+            metrics.observe("browser_pool.wait_seconds", time.perf_counter() - started)
+            pooled = await self._checkout()
+            self._leased[pooled.page] = pooled
+            self._report()
+            healthy = False
+            try:
+                yield pooled.page
+                healthy = True
+            finally:
+                self._leased.pop(pooled.page, None)
+                self._checkin(pooled, healthy)
+                self._report()
+
+    def _report(self):
+        metrics.set_gauge("browser_pool.pages_in_use", len(self._leased))
+        metrics.set_gauge("browser_pool.pages_idle", len(self._idle))
+        metrics.set_gauge("browser_pool.utilization", round(len(self._leased) / self.max_pages, 3))
+
+    async def recycle_contexts(self):
+        """
+        Swap every context for a fresh one. Pages in use finish on the old
+        context, which is closed after its last page.
+        """
+        old = self._contexts
+        self._contexts = [await self._new_context() for _ in range(self.context_count)]
+        for pooled_context in old:
+            pooled_context.draining = True
+        idle, self._idle = self._idle, []
+        for pooled in idle:
+            self._close(pooled)
+        for pooled_context in old:
+            pooled_context.close_when_drained()
+        metrics.incr("browser_pool.contexts_recycled", len(old))
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self._ensure_browser()
+                self.memory_mb = await asyncio.to_thread(chromium_rss_mb)
+                if self.memory_mb is not None:
+                    metrics.set_gauge("browser_pool.memory_mb", round(self.memory_mb, 1))
+                    if self.memory_mb > self.memory_limit_mb:
+                        logger.warning(
+                            f"Browser using {self.memory_mb:.0f}MB (limit {self.memory_limit_mb}MB), recycling contexts"
+                        )
+                        await self.recycle_contexts()
+            except Exception as e:
+                logger.error(f"Browser pool check failed: {e}")
+
+    def status(self) -> dict:
+        wait = metrics.histogram("browser_pool.wait_seconds")
+        return {
+            "running": self.running,
+            "connected": self.connected,
+            "contexts": len(self._contexts),
+            "pages_in_use": len(self._leased),
+            "pages_idle": len(self._idle),
+            "max_pages": self.max_pages,
+            "utilization": round(len(self._leased) / self.max_pages, 3),
+            "memory_mb": None if self.memory_mb is None else round(self.memory_mb, 1),
+            "wait_seconds": wait.snapshot() if wait else None,
+        }
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,267 @@
+"""
+Main-text extraction from HTML, off the event loop.
+
+trafilatura (and any parser) is CPU-bound; on a large page it would stall
+every other stream in the process. Pages are extracted in a small process
+pool instead, with at most EXTRACTION_MAX_PENDING in flight. Inside a
+worker trafilatura gets EXTRACTION_CPU_SECONDS of CPU time, after which, or
+when it finds nothing, a fast parser-based extractor takes over:
+selectolax, else lxml, else BeautifulSoup.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import re
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+
+import trafilatura
+from bs4 import BeautifulSoup
+
+from configs.runtime_config import (
+    EXTRACTION_CPU_SECONDS,
+    EXTRACTION_MAX_PENDING,
+    EXTRACTION_TIMEOUT_SECONDS,
+    EXTRACTION_WORKERS,
+)
+from modules.metrics.metrics import metrics
+
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Page furniture dropped by the fast extractors
+BOILERPLATE_TAGS = ["script", "style", "noscript", "nav", "header", "footer", "aside", "form", "svg", "iframe"]
+MAIN_SELECTOR = "main, article"
+BLANK_LINES_RE = re.compile(r"\n\s*\n+")
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+class ExtractionFailed(Exception):
+    """
+    No text could be extracted: ``reason`` is "timeout" when the worker
+    took too long, "worker_died" when the pool broke. Says nothing about
+    the page itself.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(f"extraction failed ({reason})")
+        self.reason = reason
+
+
+def _tidy(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return BLANK_LINES_RE.sub("\n", "\n".join(line for line in lines if line)).strip()
+
+
+def extract_selectolax(html: str) -> str:
+    tree = HTMLParser(html)
+    tree.strip_tags(BOILERPLATE_TAGS)
+    node = tree.css_first(MAIN_SELECTOR) or tree.body
+    return _tidy(node.text(separator="\n")) if node is not None else ""
+
+
+def extract_lxml(html: str) -> str:
+    document = lxml.html.fromstring(html)
+    for element in document.xpath("|".join(f"//{tag}" for tag in BOILERPLATE_TAGS)):
+        element.drop_tree()
+    main = document.xpath("//main|//article")
+    node = main[0] if main else document
+    return _tidy("\n".join(node.itertext()))
+
+
+def extract_bs4(html: str) -> str:
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(BOILERPLATE_TAGS):
+        element.decompose()
+    node = soup.select_one(MAIN_SELECTOR) or soup
+    return _tidy(node.get_text(separator='\n', strip=True))
+
+
+def extract_trafilatura(html: str, url: Optional[str] = None) -> str:
+    return trafilatura.extract(html, url=url) or ""
+
+
+def fast_extractor() -> Tuple[str, Callable[[str], str]]:
+    if SELECTOLAX_AVAILABLE:
+        return "selectolax", extract_selectolax
+    if LXML_AVAILABLE:
+        return "lxml", extract_lxml
+    return "bs4", extract_bs4
+
+
+def available_extractors() -> Dict[str, Callable[[str], str]]:
+    """
+    Every extractor installed here, by name (for benchmarking).
+    """
+    extractors = {"trafilatura": extract_trafilatura}
+    if SELECTOLAX_AVAILABLE:
+        extractors["selectolax"] = extract_selectolax
+    if LXML_AVAILABLE:
+        extractors["lxml"] = extract_lxml
+    extractors["bs4"] = extract_bs4
+    return extractors
+
+
+def _raise_timeout(signum, frame):
+    raise ExtractionTimeout()
+
+
+def _init_worker():
+    # Workers leave Ctrl-C to the server, and time trafilatura in CPU seconds
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if hasattr(signal, "SIGVTALRM"):
+        signal.signal(signal.SIGVTALRM, _raise_timeout)
+
+
+def extract_text(html: str, url: Optional[str] = None, cpu_seconds: Optional[float] = None) -> Tuple[str, str, bool]:
+    """
+    Blocking extraction: (text, extractor name, whether trafilatura ran out
+    of CPU time). ``cpu_seconds`` is only enforced inside pool workers.
+    """
+    timed_out = False
+    limited = cpu_seconds is not None and hasattr(signal, "setitimer")
+    try:
+        if limited:
+            signal.setitimer(signal.ITIMER_VIRTUAL, cpu_seconds)
+        text = extract_trafilatura(html, url)
+    except ExtractionTimeout:
+        text, timed_out = "", True
+    except Exception:
+        text = ""
+    finally:
+        if limited:
+            signal.setitimer(signal.ITIMER_VIRTUAL, 0)
+    if text:
+        return text, "trafilatura", timed_out
+
+    name, extractor = fast_extractor()
+    try:
+        return extractor(html), name, timed_out
+    except Exception:
+        return "", name, timed_out
+
+
+class ExtractionPool:
+    def __init__(
+        self,
+        workers: int = EXTRACTION_WORKERS,
+        max_pending: int = EXTRACTION_MAX_PENDING,
+        cpu_seconds: float = EXTRACTION_CPU_SECONDS,
+        timeout: float = EXTRACTION_TIMEOUT_SECONDS,
+    ):
+        self.workers = workers
+        self.cpu_seconds = cpu_seconds
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = asyncio.Semaphore(max(1, max_pending))
+
+    def _pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            # Workers start from a clean interpreter: forking the server after
+            # it has loaded torch and started threads can deadlock them and
+            # copies the model heap into every worker
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                mp_context=multiprocessing.get_context(method),
+            )
+        return self._executor
+
+    async def start(self):
+        """
+        Start the workers in the app lifespan, before the first page.
+        """
+        pool = self._pool()
+        if pool is None:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(pool, _tidy, "")
+        except Exception as e:
+            logger.error(f"Extraction workers failed to start: {e}")
+            self._restart()
+
+    def _restart(self):
+        metrics.incr("extraction.pool_restarts")
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _broken(self):
+        logger.error("Extraction worker died, restarting the pool")
+        self._restart()
+
+    async def extract(self, html: str, url: Optional[str] = None) -> str:
+        """
+        Main text of ``html``. Raises ExtractionFailed when no worker
+        result came back in time, so callers can tell that apart from a
+        page with no text.
+        """
+        started = time.perf_counter()
+        await self._pending.acquire()
+        metrics.observe("extraction.wait_seconds", time.perf_counter() - started)
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        try:
+            if pool is None:
+                work = loop.run_in_executor(None, extract_text, html, url)
+            else:
+                work = loop.run_in_executor(pool, extract_text, html, url, self.cpu_seconds)
+        except BrokenProcessPool:
+            self._pending.release()
+            self._broken()
+            raise ExtractionFailed("worker_died")
+        except BaseException:
+            self._pending.release()
+            raise
+        # The slot is held until the worker is really done, not just until
+        # we stop waiting for it, so timeouts cannot overcommit the workers
+        work.add_done_callback(self._finished)
+        try:
+            with metrics.timer("extraction.seconds"):
+                text, extractor, timed_out = await asyncio.wait_for(asyncio.shield(work), self.timeout)
+        except asyncio.TimeoutError:
+            metrics.incr("extraction.timeouts")
+            logger.warning(f"⚠️ Extraction of {url} took over {self.timeout}s, dropping it")
+            raise ExtractionFailed("timeout")
+        except BrokenProcessPool:
+            self._broken()
+            raise ExtractionFailed("worker_died")
+        metrics.incr(f"extraction.extractor.{extractor}")
+        if timed_out:
+            metrics.incr("extraction.cpu_timeouts")
+        return text
+
+    def _finished(self, work: asyncio.Future):
+        self._pending.release()
+        if not work.cancelled():
+            # Retrieved here so an abandoned extraction's error is not reported as lost
+            work.exception()
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+extraction_pool = ExtractionPool()
@@ -0,0 +1,235 @@
+"""
+Per-host record of how scraping each site goes.
+
+Every live page fetch is recorded against its host: success, time taken
+and how much text came out. A host that fails HOST_BREAKER_FAILURES times
+in a row is skipped for a cool-down; after it one trial fetch is let
+through, which closes the circuit on success or reopens it for twice as
+long on failure. Slow or unreliable hosts are ranked lower in search
+results. The scoreboard is kept in a JSON file so it survives restarts.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from configs.runtime_config import (
+    HOST_BREAKER_COOLDOWN_SECONDS,
+    HOST_BREAKER_FAILURES,
+    HOST_BREAKER_MAX_COOLDOWN_SECONDS,
+    HOST_SCOREBOARD_PATH,
+    HOST_SCOREBOARD_SAVE_EVERY,
+    HOST_SLOW_SECONDS,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Recent fetch times kept per host for its percentiles
+LATENCY_SAMPLES = 50
+# Hosts tracked; the least recently seen are dropped beyond this
+MAX_HOSTS = 5000
+# Most a host's search rank can be lowered for being slow or failing
+MAX_PENALTY = 0.3
+# A trial fetch not recorded by then (cancelled, say) lets another one through
+TRIAL_SECONDS = 60
+
+
+def _percentile(values, pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+class HostStats:
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.consecutive_failures = 0
+        self.text_chars = 0
+        self.latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.trial_started = 0.0
+        self.last_seen = 0.0
+
+    @property
+    def success_rate(self) -> Optional[float]:
+        return self.successes / self.attempts if self.attempts else None
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "consecutive_failures": self.consecutive_failures,
+            "text_chars": self.text_chars,
+            "latencies": list(self.latencies),
+            "open_until": self.open_until,
+            "cooldown": self.cooldown,
+            "last_seen": self.last_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "HostStats":
+        stats = cls()
+        stats.attempts = data.get("attempts", 0)
+        stats.successes = data.get("successes", 0)
+        stats.consecutive_failures = data.get("consecutive_failures", 0)
+        stats.text_chars = data.get("text_chars", 0)
+        stats.latencies.extend(data.get("latencies", []))
+        stats.open_until = data.get("open_until", 0.0)
+        stats.cooldown = data.get("cooldown", 0.0)
+        stats.last_seen = data.get("last_seen", 0.0)
+        return stats
+
+    def summary(self) -> dict:
+        now = time.time()
+        return {
+            "attempts": self.attempts,
+            "success_rate": None if self.success_rate is None else round(self.success_rate, 3),
+            "p50_seconds": _percentile(self.latencies, 50),
+            "p95_seconds": _percentile(self.latencies, 95),
+            "avg_text_chars": self.text_chars // self.successes if self.successes else 0,
+            "consecutive_failures": self.consecutive_failures,
+            "circuit": "open" if now < self.open_until else ("half_open" if self.open_until else "closed"),
+            "open_for_seconds": max(0, round(self.open_until - now)),
+        }
+
+
+class HostScoreboard:
+    def __init__(self, path: str = HOST_SCOREBOARD_PATH, save_every: int = HOST_SCOREBOARD_SAVE_EVERY):
+        self.path = path
+        self.save_every = save_every
+        self._hosts: Dict[str, HostStats] = {}
+        self._lock = threading.Lock()
+        # Saves run in executor threads and at shutdown; one writer at a time
+        self._save_lock = threading.Lock()
+        self._unsaved = 0
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._hosts = {host: HostStats.from_dict(stats) for host, stats in data.items()}
+            logger.info(f"Loaded scrape scoreboard for {len(self._hosts)} hosts")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read host scoreboard {self.path}: {e}")
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                data = {host: stats.to_dict() for host, stats in self._hosts.items()}
+                self._unsaved = 0
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error(f"Could not save host scoreboard: {e}")
+
+    def allow(self, host: str) -> bool:
+        """
+        False while the host's circuit is open. Once the cool-down is over
+        a single trial fetch is allowed at a time.
+        """
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None or not stats.open_until:
+                return True
+            now = time.time()
+            if now < stats.open_until or now - stats.trial_started < TRIAL_SECONDS:
+                metrics.incr("scraper.circuit_rejections")
+                return False
+            stats.trial_started = now
+            return True
+
+    def is_open(self, host: str) -> bool:
+        with self._lock:
+            stats = self._hosts.get(host)
+            return stats is not None and time.time() < stats.open_until
+
+    def record(self, host: str, success: bool, seconds: float, text_chars: int = 0) -> bool:
+        """
+        Record one live fetch. Returns True when it is time to save.
+        """
+        with self._lock:
+            stats = self._hosts.pop(host, None) or HostStats()
+            # Re-inserted so dict order is least recently seen first
+            self._hosts[host] = stats
+            stats.attempts += 1
+            stats.latencies.append(round(seconds, 3))
+            stats.last_seen = time.time()
+            stats.trial_started = 0.0
+            if success:
+                stats.successes += 1
+                stats.text_chars += text_chars
+                stats.consecutive_failures = 0
+                if stats.open_until:
+                    logger.info(f"Circuit closed for {host}")
+                stats.open_until = stats.cooldown = 0.0
+            else:
+                stats.consecutive_failures += 1
+                if stats.open_until or stats.consecutive_failures >= HOST_BREAKER_FAILURES:
+                    # A failed trial doubles the cool-down
+                    stats.cooldown = min(HOST_BREAKER_MAX_COOLDOWN_SECONDS,
+                                         stats.cooldown * 2 if stats.cooldown else HOST_BREAKER_COOLDOWN_SECONDS)
+                    stats.open_until = time.time() + stats.cooldown
+                    metrics.incr("scraper.circuit_opened")
+                    logger.warning(f"Circuit open for {host} for {stats.cooldown:.0f}s "
+                                   f"after {stats.consecutive_failures} failures")
+            while len(self._hosts) > MAX_HOSTS:
+                self._hosts.pop(next(iter(self._hosts)))
+            self._unsaved += 1
+            return self._unsaved >= self.save_every
+
+    def penalty(self, host: str) -> float:
+        """
+        How much to lower a host's search rank: up to MAX_PENALTY for a
+        slow median fetch or a poor success rate, all of it while the
+        circuit is open.
+        """
+        with self._lock:
+            stats = self._hosts.get(host)
+            if stats is None:
+                return 0.0
+            if time.time() < stats.open_until:
+                return MAX_PENALTY
+            penalty = 0.0
+            median = _percentile(stats.latencies, 50)
+            if median is not None and median > HOST_SLOW_SECONDS:
+                penalty += min(MAX_PENALTY, 0.1 * (median - HOST_SLOW_SECONDS))
+            if stats.attempts >= 3 and stats.success_rate < 0.5:
+                penalty += MAX_PENALTY * (0.5 - stats.success_rate) * 2
+            return min(MAX_PENALTY, penalty)
+
+    def reset(self, host: str) -> bool:
+        with self._lock:
+            return self._hosts.pop(host, None) is not None
+
+    def status(self, limit: int = 100, sort: str = "attempts") -> dict:
+        with self._lock:
+            summaries = {host: stats.summary() for host, stats in self._hosts.items()}
+        key = {
+            "attempts": lambda item: -item[1]["attempts"],
+            "slowest": lambda item: -(item[1]["p50_seconds"] or 0),
+            "failing": lambda item: item[1]["success_rate"] if item[1]["success_rate"] is not None else 1,
+        }.get(sort, lambda item: -item[1]["attempts"])
+        ordered = sorted(summaries.items(), key=key)[:limit]
+        return {
+            "hosts_tracked": len(summaries),
+            "open_circuits": sorted(host for host, summary in summaries.items() if summary["circuit"] == "open"),
+            "hosts": dict(ordered),
+        }
+
+
+host_scoreboard = HostScoreboard()
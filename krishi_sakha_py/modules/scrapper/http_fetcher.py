@@ -0,0 +1,182 @@
+"""
+Plain HTTP page fetching for the scraper's first tier.
+
+Most result pages are server-rendered, so a pooled httpx client (keep-alive,
+HTTP/2 when h2 is installed, gzip/brotli transfer, capped body size) plus
+the extraction pool reads them without a browser. JsHostRegistry remembers which
+hosts came back empty over HTTP so later fetches go straight to Playwright.
+"""
+
+import logging
+import re
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+from configs.runtime_config import (
+    SCRAPER_HTTP_MAX_BYTES,
+    SCRAPER_HTTP_MAX_CONNECTIONS,
+    SCRAPER_JS_HOSTS,
+    SCRAPER_MAX_CONTENT_CHARS,
+    SCRAPER_JS_HOST_MIN_SAMPLES,
+    SCRAPER_MIN_TEXT_CHARS,
+)
+from modules.scrapper.browser_pool import USER_AGENT
+from modules.scrapper.extraction import ExtractionFailed, extraction_pool
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+# Shells of client-rendered apps; with little text they will not extract over HTTP
+JS_SHELL_RE = re.compile(
+    r'id="(?:root|app|__next)"\s*>\s*</div>|__NEXT_DATA__|ng-version=|enable javascript',
+    re.IGNORECASE
+)
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).hostname or ""
+
+
+class HttpFetchError(Exception):
+    """
+    The page could not be used from the HTTP tier; ``reason`` says why.
+    """
+
+    def __init__(self, reason: str, message: str = ""):
+        super().__init__(message or reason)
+        self.reason = reason
+
+
+class JsHostRegistry:
+    """
+    Per-host record of whether plain HTTP yields readable text.
+    """
+
+    def __init__(self, seed=SCRAPER_JS_HOSTS, min_samples: int = SCRAPER_JS_HOST_MIN_SAMPLES,
+                 max_hosts: int = 2048):
+        self.min_samples = min_samples
+        self.max_hosts = max_hosts
+        self.pinned = set(seed)
+        # host -> [http_ok, http_short]
+        self._hosts: "OrderedDict[str, list]" = OrderedDict()
+
+    def needs_js(self, host: str) -> bool:
+        if host in self.pinned:
+            return True
+        ok, short = self._hosts.get(host, (0, 0))
+        return short >= self.min_samples and short > ok
+
+    def record(self, host: str, readable: bool):
+        counts = self._hosts.pop(host, [0, 0])
+        counts[0 if readable else 1] += 1
+        self._hosts[host] = counts
+        while len(self._hosts) > self.max_hosts:
+            self._hosts.popitem(last=False)
+
+    def js_hosts(self):
+        return sorted(self.pinned | {host for host in self._hosts if self.needs_js(host)})
+
+
+class HttpFetcher:
+    def __init__(self, max_bytes: int = SCRAPER_HTTP_MAX_BYTES,
+                 max_connections: int = SCRAPER_HTTP_MAX_CONNECTIONS):
+        self.max_bytes = max_bytes
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                headers={
+                    "User-Agent": USER_AGENT,
+                    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.5",
+                    "Accept-Language": "en-IN,en;q=0.9,hi;q=0.8",
+                },
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def fetch_html(self, url: str, timeout: float,
+                         headers: Optional[Dict[str, str]] = None) -> Tuple[int, str, str, httpx.Headers]:
+        """
+        GET ``url`` and read at most ``max_bytes`` of an HTML body.
+        Returns (status, final_url, html, headers); a 304 has no body.
+        """
+        async with self.client().stream("GET", url, timeout=timeout, headers=headers) as response:
+            if response.status_code == 304:
+                return 304, str(response.url), "", response.headers
+            if response.status_code >= 400:
+                raise HttpFetchError("http_error", f"HTTP {response.status_code}")
+            content_type = response.headers.get("content-type", "")
+            if content_type and "html" not in content_type:
+                raise HttpFetchError("not_html", content_type)
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body.extend(chunk)
+                if len(body) > self.max_bytes:
+                    raise HttpFetchError("too_large", f"over {self.max_bytes} bytes")
+            html = bytes(body).decode(response.charset_encoding or "utf-8", errors="replace")
+            return response.status_code, str(response.url), html, response.headers
+
+    async def fetch(self, url: str, timeout: float, etag: Optional[str] = None,
+                    last_modified: Optional[str] = None) -> Dict:
+        """
+        Fetch and extract one page. Raises HttpFetchError when the text is
+        missing or too short to be worth keeping.
+
+        With ``etag`` / ``last_modified`` the request is conditional, and
+        an unchanged page comes back as ``{"not_modified": True}``.
+        """
+        started = time.perf_counter()
+        conditional = {}
+        if etag:
+            conditional["If-None-Match"] = etag
+        if last_modified:
+            conditional["If-Modified-Since"] = last_modified
+        try:
+            status, final_url, html_content, headers = await self.fetch_html(url, timeout, headers=conditional or None)
+        except httpx.TimeoutException:
+            raise HttpFetchError("timeout")
+        except httpx.HTTPError as e:
+            raise HttpFetchError("http_error", str(e))
+
+        if status == 304:
+            return {"url": final_url, "not_modified": True}
+
+        try:
+            extracted_content = await extraction_pool.extract(html_content, final_url)
+        except ExtractionFailed as e:
+            raise HttpFetchError(f"extract_{e.reason}")
+        if len(extracted_content) < SCRAPER_MIN_TEXT_CHARS:
+            reason = "js_shell" if JS_SHELL_RE.search(html_content) else "short_text"
+            raise HttpFetchError(reason, f"{len(extracted_content)} chars extracted")
+
+        title_match = TITLE_RE.search(html_content)
+        return {
+            "url": final_url,
+            "title": title_match.group(1).strip() if title_match else "",
+            "content": extracted_content[:SCRAPER_MAX_CONTENT_CHARS],
+            "success": True,
+            "html_length": len(html_content),
+            "fetched_by": "http",
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "seconds": round(time.perf_counter() - started, 3),
+        }
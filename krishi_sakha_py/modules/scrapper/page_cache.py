@@ -0,0 +1,230 @@
+"""
+URL-keyed cache of extracted pages.
+
+Extracted text (final URL, title, content) is kept zlib-compressed in
+sqlite, with the most recently used pages decompressed in memory. Each
+entry expires after its host's TTL; an expired entry that carries an ETag
+or Last-Modified is revalidated with a conditional GET instead of being
+fetched and extracted again, and is served as-is for up to
+PAGE_CACHE_STALE_SECONDS when the origin cannot be reached.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from configs.runtime_config import (
+    PAGE_CACHE_HOST_TTLS,
+    PAGE_CACHE_HOT_SIZE,
+    PAGE_CACHE_MAX_ROWS,
+    PAGE_CACHE_PATH,
+    PAGE_CACHE_STALE_SECONDS,
+    PAGE_CACHE_TTL_SECONDS,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    final_url TEXT,
+    title TEXT,
+    content BLOB,
+    etag TEXT,
+    last_modified TEXT,
+    fetched_by TEXT,
+    stored_at REAL,
+    expires_at REAL
+)
+"""
+# Prune the table back to PAGE_CACHE_MAX_ROWS every this many writes
+PRUNE_EVERY = 500
+
+
+@dataclass
+class CachedPage:
+    url: str
+    final_url: str
+    title: str
+    content: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_by: str
+    stored_at: float
+    expires_at: float
+
+    @property
+    def fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    @property
+    def usable_stale(self) -> bool:
+        return time.time() < self.expires_at + PAGE_CACHE_STALE_SECONDS
+
+    @property
+    def revalidatable(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def as_result(self, tier: str = "cache") -> Dict:
+        return {
+            "url": self.final_url,
+            "title": self.title,
+            "content": self.content,
+            "success": True,
+            "fetched_by": tier,
+            "cached_at": self.stored_at,
+        }
+
+
+def ttl_for(host: str, host_ttls: Dict[str, float] = PAGE_CACHE_HOST_TTLS,
+            default: float = PAGE_CACHE_TTL_SECONDS) -> float:
+    """
+    TTL of the most specific configured domain ``host`` falls under.
+    """
+    parts = host.split(".")
+    for i in range(len(parts)):
+        ttl = host_ttls.get(".".join(parts[i:]))
+        if ttl is not None:
+            return ttl
+    return default
+
+
+class PageCache:
+    def __init__(self, path: str = PAGE_CACHE_PATH, hot_size: int = PAGE_CACHE_HOT_SIZE,
+                 max_rows: int = PAGE_CACHE_MAX_ROWS):
+        self.path = path
+        self.hot_size = hot_size
+        self.max_rows = max_rows
+        self._hot: "OrderedDict[str, CachedPage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(SCHEMA)
+            self._db.execute("CREATE INDEX IF NOT EXISTS pages_stored_at ON pages (stored_at)")
+        return self._db
+
+    def _remember(self, page: CachedPage):
+        self._hot[page.url] = page
+        self._hot.move_to_end(page.url)
+        while len(self._hot) > self.hot_size:
+            self._hot.popitem(last=False)
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Blocking lookup, fresh or not; callers decide what an expired entry
+        is still good for.
+        """
+        with self._lock:
+            page = self._hot.get(url)
+            if page is not None:
+                self._hot.move_to_end(url)
+                metrics.incr("page_cache.hot_hits")
+                return page
+            try:
+                row = self._connection().execute(
+                    "SELECT url, final_url, title, content, etag, last_modified, fetched_by, stored_at, expires_at "
+                    "FROM pages WHERE url = ?", (url,)
+                ).fetchone()
+            except sqlite3.Error as e:
+                logger.error(f"Page cache read failed: {e}")
+                return None
+            if row is None:
+                metrics.incr("page_cache.misses")
+                return None
+            page = CachedPage(
+                url=row[0], final_url=row[1], title=row[2],
+                content=zlib.decompress(row[3]).decode("utf-8"),
+                etag=row[4], last_modified=row[5], fetched_by=row[6],
+                stored_at=row[7], expires_at=row[8],
+            )
+            self._remember(page)
+            metrics.incr("page_cache.disk_hits")
+            return page
+
+    def put(self, url: str, result: Dict, ttl: float, etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> CachedPage:
+        now = time.time()
+        page = CachedPage(
+            url=url,
+            final_url=result.get("url") or url,
+            title=result.get("title") or "",
+            content=result.get("content") or "",
+            etag=etag,
+            last_modified=last_modified,
+            fetched_by=result.get("fetched_by") or "browser",
+            stored_at=now,
+            expires_at=now + ttl,
+        )
+        with self._lock:
+            self._remember(page)
+            try:
+                db = self._connection()
+                db.execute(
+                    "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (page.url, page.final_url, page.title, zlib.compress(page.content.encode("utf-8"), 6),
+                     page.etag, page.last_modified, page.fetched_by, page.stored_at, page.expires_at)
+                )
+                self._writes += 1
+                if self._writes % PRUNE_EVERY == 0:
+                    self._prune(db)
+                db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Page cache write failed: {e}")
+        metrics.incr("page_cache.writes")
+        return page
+
+    def refresh(self, page: CachedPage, ttl: float) -> CachedPage:
+        """
+        The origin answered 304: the stored text is current for another TTL.
+        """
+        page.stored_at = time.time()
+        page.expires_at = page.stored_at + ttl
+        with self._lock:
+            self._remember(page)
+            try:
+                db = self._connection()
+                db.execute("UPDATE pages SET stored_at = ?, expires_at = ? WHERE url = ?",
+                           (page.stored_at, page.expires_at, page.url))
+                db.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Page cache refresh failed: {e}")
+        metrics.incr("page_cache.revalidated")
+        return page
+
+    def _prune(self, db: sqlite3.Connection):
+        db.execute("DELETE FROM pages WHERE expires_at < ?", (time.time() - PAGE_CACHE_STALE_SECONDS,))
+        db.execute(
+            "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rows,)
+        )
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def status(self) -> dict:
+        with self._lock:
+            try:
+                rows = self._connection().execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            except sqlite3.Error:
+                rows = None
+            return {"hot": len(self._hot), "rows": rows, "path": self.path}
+
+
+page_cache = PageCache()
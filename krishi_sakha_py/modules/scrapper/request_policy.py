@@ -0,0 +1,218 @@
+"""
+What a scraping browser is allowed to download.
+
+One policy is routed on every browser context when it is created, so pages
+need no per-navigation setup. Sub-requests are aborted when their resource
+type is never needed for text (images, fonts, CSS), when they go to a known
+ad, analytics or social host, when they are third-party XHR/fetch/beacons,
+or once the page has already received SCRAPER_PAGE_MAX_BYTES. The page's
+own document is always loaded.
+
+Blocked requests are counted by reason with an estimate of the bytes they
+would have cost. With SCRAPER_REQUEST_POLICY_HOLDOUT a share of page loads
+goes unfiltered so the load-time histograms show what blocking saves.
+"""
+
+import logging
+import random
+import weakref
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from configs.runtime_config import (
+    SCRAPER_BLOCKED_DOMAINS,
+    SCRAPER_BLOCKED_RESOURCE_TYPES,
+    SCRAPER_PAGE_MAX_BYTES,
+    SCRAPER_REQUEST_POLICY_ENABLED,
+    SCRAPER_REQUEST_POLICY_HOLDOUT,
+    SCRAPER_THIRD_PARTY_BLOCKED_TYPES,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Trackers, ads and social widgets seen on Indian news and government pages
+TRACKER_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com", "doubleclick.net",
+    "googlesyndication.com", "googleadservices.com", "adservice.google.com", "imasdk.googleapis.com",
+    "facebook.net", "facebook.com", "connect.facebook.net", "platform.twitter.com", "ads-twitter.com",
+    "scorecardresearch.com", "hotjar.com", "clarity.ms", "quantserve.com", "taboola.com", "outbrain.com",
+    "amazon-adsystem.com", "criteo.com", "criteo.net", "moatads.com", "adnxs.com", "pubmatic.com",
+    "rubiconproject.com", "izooto.com", "onesignal.com", "chartbeat.com", "newrelic.com", "nr-data.net",
+    "addthis.com", "sharethis.com", "disqus.com", "vdo.ai", "colombiaonline.com", "adsafeprotected.com",
+}
+# Bytes assumed for a blocked request until responses of its type have been seen
+DEFAULT_SIZE_ESTIMATES = {
+    "image": 40_000, "media": 500_000, "font": 30_000, "stylesheet": 25_000,
+    "script": 40_000, "xhr": 5_000, "fetch": 5_000, "document": 50_000,
+}
+DEFAULT_SIZE_ESTIMATE = 5_000
+
+
+def domain_of(url: str) -> str:
+    """
+    Registrable domain of ``url``: krishi.gov.in for www.krishi.gov.in,
+    example.com for cdn.example.com.
+    """
+    host = (urlsplit(url).hostname or "").removeprefix("www.")
+    parts = host.split(".")
+    # Keep one more label under two-letter country suffixes: krishi.gov.in, not gov.in
+    keep = 3 if len(parts) >= 3 and len(parts[-1]) == 2 and len(parts[-2]) <= 3 else 2
+    return ".".join(parts[-keep:])
+
+
+class _PageLoad:
+    def __init__(self, holdout: bool = False):
+        self.holdout = holdout
+        self.bytes = 0
+        self.blocked = 0
+
+
+class RequestPolicy:
+    def __init__(
+        self,
+        enabled: bool = SCRAPER_REQUEST_POLICY_ENABLED,
+        blocked_types=SCRAPER_BLOCKED_RESOURCE_TYPES,
+        third_party_types=SCRAPER_THIRD_PARTY_BLOCKED_TYPES,
+        blocked_domains=SCRAPER_BLOCKED_DOMAINS,
+        page_max_bytes: int = SCRAPER_PAGE_MAX_BYTES,
+        holdout: float = SCRAPER_REQUEST_POLICY_HOLDOUT,
+    ):
+        self.enabled = enabled
+        self.blocked_types = set(blocked_types)
+        self.third_party_types = set(third_party_types)
+        self.blocked_domains = TRACKER_DOMAINS | set(blocked_domains)
+        self.page_max_bytes = page_max_bytes
+        self.holdout = holdout
+        self._loads: "weakref.WeakKeyDictionary[object, _PageLoad]" = weakref.WeakKeyDictionary()
+        # Running mean response size per resource type, for bytes-saved estimates
+        self._sizes: Dict[str, list] = {}
+        self.blocked: Dict[str, int] = {}
+        self.allowed = 0
+        self.bytes_loaded = 0
+        self.bytes_saved = 0
+
+    async def install(self, context):
+        """
+        Route every request of ``context`` through this policy.
+        """
+        if not self.enabled:
+            return
+        await context.route("**/*", self.handle)
+        context.on("response", self._on_response)
+
+    def begin(self, page):
+        """
+        Reset ``page``'s byte budget before a navigation, and pick whether
+        this load is held out.
+        """
+        self._loads[page] = _PageLoad(holdout=self.holdout > 0 and random.random() < self.holdout)
+
+    def finish(self, page, seconds: float):
+        """
+        Record how long ``page`` took to load and what was blocked on it.
+        """
+        load = self._loads.get(page) or _PageLoad()
+        label = "filtered" if self.enabled and not load.holdout else "unfiltered"
+        metrics.observe(f"scraper.page_load_seconds.{label}", seconds)
+        metrics.observe("scraper.page_bytes", load.bytes)
+        metrics.observe("scraper.page_blocked_requests", load.blocked)
+
+    def _load(self, request) -> Optional[_PageLoad]:
+        try:
+            page = request.frame.page
+        except Exception:
+            # Service worker requests have no frame
+            return None
+        load = self._loads.get(page)
+        if load is None:
+            load = self._loads[page] = _PageLoad()
+        return load
+
+    def _blocklisted(self, host: str) -> bool:
+        parts = host.split(".")
+        return any(".".join(parts[i:]) in self.blocked_domains for i in range(len(parts) - 1))
+
+    def verdict(self, request, load: Optional[_PageLoad]) -> Optional[str]:
+        """
+        Why ``request`` should be blocked, or None to let it through.
+        """
+        resource_type = request.resource_type
+        if resource_type == "document" and request.is_navigation_request() and request.frame.parent_frame is None:
+            return None
+        if resource_type in self.blocked_types:
+            return "resource_type"
+        if self._blocklisted(urlsplit(request.url).hostname or ""):
+            return "blocklist"
+        if resource_type in self.third_party_types:
+            try:
+                site = domain_of(request.frame.page.main_frame.url)
+            except Exception:
+                site = ""
+            if site and domain_of(request.url) != site:
+                return "third_party"
+        if load is not None and load.bytes >= self.page_max_bytes:
+            return "byte_cap"
+        return None
+
+    async def handle(self, route, request):
+        load = self._load(request)
+        reason = None if load is not None and load.holdout else self.verdict(request, load)
+        try:
+            if reason is None:
+                self.allowed += 1
+                await route.continue_()
+                return
+            await route.abort()
+        except Exception:
+            # Page closed while the request was in flight
+            return
+        self.blocked[reason] = self.blocked.get(reason, 0) + 1
+        saved = self._estimate(request.resource_type)
+        self.bytes_saved += saved
+        if load is not None:
+            load.blocked += 1
+        metrics.incr(f"scraper.blocked.{reason}")
+        metrics.incr("scraper.bytes_saved_estimate", saved)
+
+    def _estimate(self, resource_type: str) -> int:
+        seen = self._sizes.get(resource_type)
+        if seen and seen[0]:
+            return seen[1] // seen[0]
+        return DEFAULT_SIZE_ESTIMATES.get(resource_type, DEFAULT_SIZE_ESTIMATE)
+
+    def _on_response(self, response):
+        # Content-Length only: chunked responses go uncounted rather than
+        # costing an extra round trip to Chromium per response
+        try:
+            size = int(response.headers.get("content-length") or 0)
+        except ValueError:
+            return
+        if not size:
+            return
+        request = response.request
+        seen = self._sizes.setdefault(request.resource_type, [0, 0])
+        seen[0] += 1
+        seen[1] += size
+        self.bytes_loaded += size
+        load = self._load(request)
+        if load is not None:
+            load.bytes += size
+
+    def status(self) -> dict:
+        loads = {}
+        for label in ("filtered", "unfiltered"):
+            latency = metrics.histogram(f"scraper.page_load_seconds.{label}")
+            loads[label] = latency.snapshot() if latency else None
+        return {
+            "enabled": self.enabled,
+            "holdout": self.holdout,
+            "allowed": self.allowed,
+            "blocked": dict(self.blocked),
+            "bytes_loaded": self.bytes_loaded,
+            "bytes_saved_estimate": self.bytes_saved,
+            "page_load_seconds": loads,
+        }
+
+
+request_policy = RequestPolicy()
@@ -1,12 +1,26 @@
 import asyncio
-import random
 import logging
-from typing import List, Dict, Union
+import time
+from typing import AsyncGenerator, List, Dict, Optional, Tuple, Union
 from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
-from bs4 import BeautifulSoup
-import trafilatura
 import json
-from modules.search.searxng_json import searxng_search
+from modules.search.searxng_json import searxng_search_async
+from configs.runtime_config import (
+    PAGE_CACHE_ENABLED,
+    SCRAPER_HTTP_ENABLED,
+    SCRAPER_HTTP_TIMEOUT_SECONDS,
+    SCRAPER_MAX_CONTENT_CHARS,
+    SEARCH_MAX_PAGES,
+    SEARCH_PAGES_TIMEOUT_SECONDS,
+    SEARCH_SEARXNG_TIMEOUT_SECONDS,
+)
+from modules.metrics.metrics import metrics
+from modules.scrapper.extraction import extraction_pool
+from modules.scrapper.browser_pool import BROWSER_ARGS, browser_pool, new_stealth_context
+from modules.scrapper.host_scoreboard import HostScoreboard, host_scoreboard
+from modules.scrapper.http_fetcher import HttpFetcher, HttpFetchError, JsHostRegistry, host_of
+from modules.scrapper.page_cache import CachedPage, PageCache, page_cache, ttl_for
+from modules.scrapper.request_policy import request_policy
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -18,16 +32,13 @@ class FastPlaywrightScraper:
 
     async def scrape_page(self, page, url: str, main_selector: str = None) -> Dict[str, Union[str, bool]]:
         try:
-            # Block heavy resources
-            async def route_intercept(route, request):
-                if request.resource_type in ["image", "media", "font", "stylesheet"]:
-                    await route.abort()
-                else:
-                    await route.continue_()
-            await page.route("**/*", route_intercept)
+            # Heavy resources and trackers are blocked by the context's request policy
+            request_policy.begin(page)
+            started = time.perf_counter()
 
             # Go to page; no networkidle wait
             await page.goto(url, wait_until='domcontentloaded', timeout=self.timeout)
+            request_policy.finish(page, time.perf_counter() - started)
 
             # Optional: wait for main content briefly
             if main_selector:
@@ -41,15 +52,13 @@ class FastPlaywrightScraper:
             title = await page.title()
             final_url = page.url
 
-            extracted_content = trafilatura.extract(html_content, url=final_url)
-            if not extracted_content:
-                soup = BeautifulSoup(html_content, 'html.parser')
-                extracted_content = soup.get_text(separator='\n', strip=True)
+            # trafilatura, or a fast parser when it finds nothing, in a worker process
+            extracted_content = await extraction_pool.extract(html_content, final_url)
 
             return {
                 "url": final_url,
                 "title": title,
-                "content": extracted_content[:8000] if extracted_content else "",
+                "content": extracted_content[:SCRAPER_MAX_CONTENT_CHARS] if extracted_content else "",
                 "success": True,
                 "html_length": len(html_content)
             }
@@ -61,84 +70,295 @@ class FastPlaywrightScraper:
             logger.error(f"❌ Error fetching {url}: {e}")
             return {"url": url, "success": False, "error": str(e)}
 
-    async def scrape_multiple(self, urls: List[str], main_selector: str = None) -> List[Dict]:
+    async def scrape_multiple(self, urls: List[str], main_selector: str = None, timeout: float = None) -> List[Dict]:
+        """
+        Scrape all URLs on pages leased from the shared browser pool, or in
+        a browser of our own when the pool is not running. With ``timeout``
+        (seconds), pages still loading when it expires are abandoned and
+        reported as timed out, so the pages that did load are still returned.
+        """
+        semaphore = asyncio.Semaphore(self.max_parallel)
+
+        if browser_pool.running:
+            async def fetch(url):
+                async with semaphore:
+                    async with browser_pool.page() as page:
+                        result = await self.scrape_page(page, url, main_selector=main_selector)
+                        if not result["success"]:
+                            # Possibly still loading; do not hand it to the next request
+                            browser_pool.discard(page)
+                    return result
+
+            return await self._collect(fetch, urls, timeout)
+
         async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=self.headless, args=[
-                '--no-first-run',
-                '--no-default-browser-check',
-                '--disable-blink-features=AutomationControlled'
-            ])
-            context = await browser.new_context(
-                viewport={'width': 1280, 'height': 720},
-                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            )
-
-            # Stealth mode
-            await context.add_init_script("""
-                Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
-                window.chrome = {runtime: {}};
-                Object.defineProperty(navigator, 'plugins', {get: () => [1,2,3,4,5]});
-                Object.defineProperty(navigator, 'languages', {get: () => ['en-US','en']});
-            """)
-
-            semaphore = asyncio.Semaphore(self.max_parallel)
+            browser = await p.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
+            context = await new_stealth_context(browser)
 
             async def fetch(url):
                 async with semaphore:
                     page = await context.new_page()
-                    result = await self.scrape_page(page, url, main_selector=main_selector)
-                    await page.close()
-                    # tiny random delay to mimic human browsing
-                    await asyncio.sleep(random.uniform(0.05, 0.2))
+                    try:
+                        result = await self.scrape_page(page, url, main_selector=main_selector)
+                    finally:
+                        await page.close()
                     return result
 
-            results = await asyncio.gather(*(fetch(url) for url in urls))
-            await browser.close()
-            return results
+            try:
+                return await self._collect(fetch, urls, timeout)
+            finally:
+                await browser.close()
 
+    async def _collect(self, fetch, urls: List[str], timeout: float = None) -> List[Dict]:
+        tasks = [asyncio.create_task(fetch(url)) for url in urls]
+        try:
+            if timeout is None:
+                return await asyncio.gather(*tasks)
+            done, pending = await asyncio.wait(tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                metrics.incr("scraper.pages_timed_out", len(pending))
+            return [
+                task.result() if task in done else {"url": url, "success": False, "error": "Timeout"}
+                for url, task in zip(urls, tasks)
+            ]
+        except asyncio.CancelledError:
+            # Request was abandoned; stop loading pages nobody will read
+            logger.info(f"Scrape of {len(urls)} page(s) cancelled")
+            metrics.incr("scraper.cancelled")
+            for task in tasks:
+                task.cancel()
+            raise
 
-async def json_scrapped(query : str):
-    url = searxng_search(query)
-    scraper = FastPlaywrightScraper(
-        headless=True,
-        timeout=4000,   # max 4 sec
-        max_parallel=10  # parallel scraping
-    )
 
-    results = await scraper.scrape_multiple(
-        [url],
-        main_selector="main, article, .Post"
-    )
+# cache: fresh or revalidated from the page cache; stale: expired entry
+# served because the live fetch failed
+TIERS = ("cache", "http", "browser", "stale", "failed")
 
-    # Convert to AI-friendly JSON format
-    ai_docs = []
-    for r in results:
-        ai_docs.append({
-            "url": r.get("url"),
-            "title": r.get("title"),
-            "success": r.get("success"),
-            "content": (r.get("content") or "").strip(),
-            "error": r.get("error")
-        })
 
-    return ai_docs
+class TieredFetcher:
+    """
+    Page cache first, then plain HTTP, then Playwright for pages HTTP could
+    not read and for hosts that have been seen to need JavaScript.
+    """
 
+    def __init__(self, http: HttpFetcher = None, js_hosts: JsHostRegistry = None,
+                 browser: FastPlaywrightScraper = None, cache: Optional[PageCache] = None,
+                 scoreboard: HostScoreboard = None, http_enabled: bool = SCRAPER_HTTP_ENABLED):
+        self.http = http or HttpFetcher()
+        self.js_hosts = js_hosts or JsHostRegistry()
+        self.browser = browser or FastPlaywrightScraper(
+            headless=True,
+            timeout=4000,   # max 4 sec
+            max_parallel=10  # parallel scraping
+        )
+        self.cache = cache if cache is not None else (page_cache if PAGE_CACHE_ENABLED else None)
+        self.scoreboard = scoreboard or host_scoreboard
+        self.http_enabled = http_enabled
+        self.counts = {tier: 0 for tier in TIERS}
 
+    async def _fetch_http(self, url: str, timeout: float, cached: Optional[CachedPage] = None) -> Optional[Dict]:
+        host = host_of(url)
+        validators = {}
+        if cached is not None and cached.revalidatable:
+            validators = {"etag": cached.etag, "last_modified": cached.last_modified}
+        try:
+            with metrics.timer("scraper.tier_seconds.http"):
+                result = await self.http.fetch(url, timeout, **validators)
+        except HttpFetchError as e:
+            metrics.incr(f"scraper.escalations.{e.reason}")
+            if e.reason in ("short_text", "js_shell"):
+                self.js_hosts.record(host, readable=False)
+            return None
+        except Exception as e:
+            logger.warning(f"⚠️ HTTP fetch of {url} failed: {e}")
+            metrics.incr("scraper.escalations.error")
+            return None
+        if result.get("not_modified") and cached is not None:
+            page = await asyncio.to_thread(self.cache.refresh, cached, ttl_for(host))
+            return page.as_result()
+        self.js_hosts.record(host, readable=True)
+        return result
 
-async def search_from_url(url: str):
+    async def _fetch_browser(self, url: str, main_selector: str = None, timeout: float = None) -> Optional[Dict]:
+        if timeout is not None and timeout <= 0:
+            return None
+        with metrics.timer("scraper.tier_seconds.browser"):
+            pages = await self.browser.scrape_multiple([url], main_selector=main_selector, timeout=timeout)
+        return dict(pages[0], fetched_by="browser")
 
-    scraper = FastPlaywrightScraper(
-        headless=True,
-        timeout=4000,   # max 4 sec
-        max_parallel=10  # parallel scraping
-    )
+    def _store(self, url: str, result: Dict):
+        self.cache.put(url, result, ttl_for(host_of(url)),
+                       etag=result.get("etag"), last_modified=result.get("last_modified"))
 
-    results = await scraper.scrape_multiple(
-        [url],
-        main_selector="main, article, .Post"
-    )
+    def _score(self, host: str, result: Optional[Dict], seconds: float):
+        success = bool(result and result.get("success") and result.get("content"))
+        chars = len(result.get("content") or "") if success else 0
+        if self.scoreboard.record(host, success, seconds, chars):
+            asyncio.get_running_loop().run_in_executor(None, self.scoreboard.save)
+
+    def _count(self, page: Dict):
+        tier = page.get("fetched_by", "browser") if page.get("success") else "failed"
+        self.counts[tier] += 1
+        metrics.incr(f"scraper.tier.{tier}")
+
+    async def fetch_one(self, url: str, main_selector: str = None, timeout: float = None,
+                        cache_only: bool = False) -> Dict:
+        """
+        One page through the tiers: cache, HTTP, browser, and an expired
+        cached copy if all of those fail. Never raises except on
+        cancellation.
+        """
+        started = time.perf_counter()
+
+        def remaining() -> Optional[float]:
+            return None if timeout is None else max(0.0, timeout - (time.perf_counter() - started))
 
-    # Convert to AI-friendly JSON format
+        expired = None
+        result = None
+        if self.cache is not None:
+            cached = await asyncio.to_thread(self.cache.get, url)
+            if cached is not None and cached.fresh:
+                result = cached.as_result()
+            elif cached is not None and cached.usable_stale:
+                expired = cached
+
+        host = host_of(url)
+        live = result is None and not cache_only
+        if live and not self.scoreboard.allow(host):
+            # Failing repeatedly: leave it alone until its cool-down is over
+            live = False
+            metrics.incr("scraper.circuit_open")
+            result = {"url": url, "success": False, "error": "Circuit open"}
+        if live:
+            # Cut short by our own time budget: says nothing about the host
+            budget_cut = False
+            if self.http_enabled and not self.js_hosts.needs_js(host):
+                http_timeout = SCRAPER_HTTP_TIMEOUT_SECONDS if timeout is None else min(SCRAPER_HTTP_TIMEOUT_SECONDS, timeout)
+                budget_cut = http_timeout < SCRAPER_HTTP_TIMEOUT_SECONDS
+                result = await self._fetch_http(url, http_timeout, expired)
+            elif self.http_enabled:
+                metrics.incr("scraper.escalations.js_host")
+            if result is None:
+                browser_timeout = remaining()
+                if browser_timeout is not None and browser_timeout <= 0:
+                    budget_cut = True
+                result = await self._fetch_browser(url, main_selector, browser_timeout)
+            if (self.cache is not None and result and result.get("success") and result.get("content")
+                    and result.get("fetched_by") in ("http", "browser")):
+                # Written in the background; the answer does not wait for the disk
+                asyncio.get_running_loop().run_in_executor(None, self._store, url, result)
+            if budget_cut:
+                metrics.incr("scraper.unscored_budget_cut")
+            else:
+                self._score(host, result, time.perf_counter() - started)
+
+        if (result is None or not result.get("success")) and expired is not None:
+            # Origin down or too slow: an old copy beats no page
+            result = expired.as_result("stale")
+            metrics.incr("page_cache.stale_served")
+        if result is None:
+            result = {"url": url, "success": False, "error": "Not cached" if cache_only else "Timeout"}
+        self._count(result)
+        if live:
+            metrics.observe("scraper.live_page_seconds", time.perf_counter() - started)
+        return result
+
+    async def fetch_stream(self, urls: List[str], main_selector: str = None, timeout: float = None,
+                           cache_only: bool = False) -> AsyncGenerator[Tuple[int, Dict], None]:
+        """
+        Yield ``(index, result)`` for each URL as soon as it is done, fastest
+        first. Pages still loading at ``timeout`` are cancelled and not
+        yielded; so is everything left when the caller stops iterating.
+        """
+        tasks = {
+            asyncio.create_task(self.fetch_one(url, main_selector, timeout, cache_only)): i
+            for i, url in enumerate(urls)
+        }
+        loop = asyncio.get_running_loop()
+        expires_at = None if timeout is None else loop.time() + timeout
+        pending = set(tasks)
+        try:
+            while pending:
+                wait = None if expires_at is None else max(0.0, expires_at - loop.time())
+                done, pending = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    metrics.incr("scraper.pages_timed_out", len(pending))
+                    break
+                for task in done:
+                    yield tasks[task], task.result()
+        finally:
+            if pending:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def fetch_many(self, urls: List[str], main_selector: str = None, timeout: float = None,
+                         cache_only: bool = False) -> List[Dict]:
+        """
+        Same contract as FastPlaywrightScraper.scrape_multiple: one result
+        per URL, in order, with pages unfinished at ``timeout`` reported as
+        timed out. ``cache_only`` answers from the page cache alone,
+        expired entries included.
+        """
+        results: Dict[int, Dict] = {}
+        async for i, page in self.fetch_stream(urls, main_selector, timeout, cache_only):
+            results[i] = page
+        return [results.get(i) or {"url": url, "success": False, "error": "Timeout"} for i, url in enumerate(urls)]
+
+    async def close(self):
+        await self.http.close()
+        await asyncio.to_thread(self.scoreboard.save)
+        if self.cache is not None:
+            self.cache.close()
+
+    def status(self) -> dict:
+        total = sum(self.counts.values())
+        tiers = {}
+        for tier in TIERS:
+            latency = metrics.histogram(f"scraper.tier_seconds.{tier}")
+            tiers[tier] = {
+                "pages": self.counts[tier],
+                "share": round(self.counts[tier] / total, 3) if total else None,
+                "seconds": latency.snapshot() if latency else None,
+            }
+        return {
+            "pages": total,
+            "tiers": tiers,
+            "js_hosts": self.js_hosts.js_hosts(),
+            "open_circuits": self.scoreboard.status(limit=0)["open_circuits"],
+            "cache": self.cache.status() if self.cache is not None else None,
+        }
+
+
+tiered_fetcher = TieredFetcher()
+
+
+# Where the main content usually is on news and portal pages
+MAIN_SELECTOR = "main, article, .Post"
+
+# Under this budget no pages are read, under the next only the top two
+MIN_PAGES_SECONDS = 1.5
+FULL_PAGES_SECONDS = 4.0
+
+
+def pages_for_budget(budget: float, max_pages: int) -> int:
+    """
+    How many result pages to scrape in ``budget`` seconds.
+    """
+    if budget < MIN_PAGES_SECONDS:
+        return 0
+    if budget < FULL_PAGES_SECONDS:
+        return min(2, max_pages)
+    return max_pages
+
+
+def to_ai_docs(results: List[Dict]) -> List[Dict]:
+    """
+    Convert scrape results to the AI-friendly JSON format.
+    """
     ai_docs = []
     for r in results:
         ai_docs.append({
@@ -148,10 +368,40 @@ async def search_from_url(url: str):
             "content": (r.get("content") or "").strip(),
             "error": r.get("error")
         })
-
     return ai_docs
 
 
+async def scrape_urls(urls: List[str], timeout: float = None, cache_only: bool = False) -> List[Dict]:
+    if not urls:
+        return []
+    results = await tiered_fetcher.fetch_many(
+        urls,
+        main_selector=MAIN_SELECTOR,
+        timeout=timeout,
+        cache_only=cache_only
+    )
+    return to_ai_docs(results)
+
+
+async def json_scrapped(query : str, max_pages: int = SEARCH_MAX_PAGES, deadline=None):
+    if deadline is None:
+        urls = await searxng_search_async(query)
+        return await scrape_urls(urls[:max_pages])
+
+    urls = await searxng_search_async(query, timeout=max(0.1, deadline.budget(cap=SEARCH_SEARXNG_TIMEOUT_SECONDS)))
+    # Fewer pages when time is short, and whatever loaded by the deadline
+    budget = deadline.budget(cap=SEARCH_PAGES_TIMEOUT_SECONDS)
+    page_count = pages_for_budget(budget, max_pages)
+    if page_count == 0:
+        deadline.skip("pages")
+        return []
+    return await scrape_urls(urls[:page_count], timeout=budget)
+
+
+async def search_from_url(url: str):
+    return await scrape_urls([url])
+
+
 
 # Example usage
 if __name__ == "__main__":
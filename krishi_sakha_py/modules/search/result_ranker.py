@@ -0,0 +1,102 @@
+"""
+Pre-ranking of SearxNG results before any page is fetched.
+
+Each result's title and snippet are compared with the query using the
+sentence-transformer already loaded for routing and retrieval (keyword
+overlap when it is not available), adjusted by host reputation and
+SearxNG's own order, and by how slow or unreliable the host has been to
+scrape, with one result per domain first and hosts whose circuit is open
+last.
+"""
+
+import logging
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+from configs.runtime_config import ROUTER_EMBEDDING_MODEL, SEARCH_HOST_REPUTATION, SEARCH_MAX_PER_DOMAIN
+from data.functions.add_to_vector_db import SENTENCE_TRANSFORMERS_AVAILABLE, get_shared_embedder
+from modules.metrics.metrics import metrics
+from modules.scrapper.host_scoreboard import host_scoreboard
+from modules.scrapper.request_policy import domain_of
+from routes.helpers.keywords import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Weight of SearxNG's position: the first result gets this much over the last
+POSITION_WEIGHT = 0.05
+
+
+def host_reputation(url: str, reputation: Dict[str, float] = SEARCH_HOST_REPUTATION) -> float:
+    parts = (urlsplit(url).hostname or "").split(".")
+    for i in range(len(parts)):
+        boost = reputation.get(".".join(parts[i:]))
+        if boost is not None:
+            return boost
+    return 0.0
+
+
+def _hit_text(hit: Dict) -> str:
+    return f"{hit.get('title', '')}. {hit.get('snippet', '')}".strip()
+
+
+def _lexical_similarity(query: str, texts: List[str]) -> List[float]:
+    terms = set(tokenize(query))
+    if not terms:
+        return [0.0] * len(texts)
+    return [len(terms & set(tokenize(text))) / len(terms) for text in texts]
+
+
+def text_similarity(query: str, texts: List[str], model_name: str = ROUTER_EMBEDDING_MODEL) -> List[float]:
+    """
+    Cosine similarity of each text to the query, embedded in one batch.
+    """
+    if SENTENCE_TRANSFORMERS_AVAILABLE:
+        try:
+            model = get_shared_embedder(model_name)
+            vectors = model.encode([query] + texts, normalize_embeddings=True).tolist()
+            query_vector = vectors[0]
+            return [sum(a * b for a, b in zip(query_vector, vector)) for vector in vectors[1:]]
+        except Exception as e:
+            logger.warning(f"Embedding similarity failed, using keyword overlap: {e}")
+    metrics.incr("search.similarity_lexical")
+    return _lexical_similarity(query, texts)
+
+
+def snippet_similarity(query: str, hits: List[Dict]) -> List[float]:
+    return text_similarity(query, [_hit_text(hit) for hit in hits])
+
+
+def rank_hits(query: str, hits: List[Dict], max_per_domain: int = SEARCH_MAX_PER_DOMAIN) -> List[Dict]:
+    """
+    All of ``hits``, most promising first, each with a ``rank_score``.
+
+    Blocking (the embedding runs here). A domain's results beyond
+    ``max_per_domain`` go after every other domain's, so the first pages
+    read come from different sites. Hosts the scraper is currently
+    skipping go last of all.
+    """
+    if not hits:
+        return []
+    with metrics.timer("search.prerank_seconds"):
+        similarities = snippet_similarity(query, hits)
+    scored = []
+    for position, (hit, similarity) in enumerate(zip(hits, similarities)):
+        prior = POSITION_WEIGHT * (1 - position / max(1, len(hits) - 1))
+        host = urlsplit(hit["url"]).hostname or ""
+        score = similarity + host_reputation(hit["url"]) + prior - host_scoreboard.penalty(host)
+        scored.append(dict(hit, rank_score=round(score, 4), circuit_open=host_scoreboard.is_open(host)))
+    scored.sort(key=lambda hit: hit["rank_score"], reverse=True)
+
+    first, rest, skipped = [], [], []
+    per_domain: Dict[str, int] = {}
+    for hit in scored:
+        if hit.pop("circuit_open"):
+            skipped.append(hit)
+            continue
+        domain = domain_of(hit["url"])
+        per_domain[domain] = per_domain.get(domain, 0) + 1
+        (first if per_domain[domain] <= max_per_domain else rest).append(hit)
+    if skipped:
+        metrics.incr("search.circuit_open_hits", len(skipped))
+    return first + rest + skipped
+
@@ -0,0 +1,291 @@
+"""
+Concurrent web search fan-out shared by /chat (search domain) and /search.
+
+SearxNG and YouTube are queried at the same time; page scraping starts as
+soon as SearxNG returns, on the few results whose snippets best match the
+query, and stops as soon as enough of them have usable text. Events are
+yielded as each source completes, and every source has its own time
+budget so a slow one only costs its own results, not the whole pipeline.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple, Union
+
+from configs.runtime_config import (
+    SCRAPER_MIN_TEXT_CHARS,
+    SEARCH_HEDGE_DEFAULT_SECONDS,
+    SEARCH_HEDGE_MIN_SAMPLES,
+    SEARCH_HEDGE_MIN_SECONDS,
+    SEARCH_HEDGE_PERCENTILE,
+    SEARCH_MAX_PAGES,
+    SEARCH_MIN_GOOD_PAGES,
+    SEARCH_PAGES_TIMEOUT_SECONDS,
+    SEARCH_PRERANK_TOP_K,
+    SEARCH_SEARXNG_TIMEOUT_SECONDS,
+    SEARCH_YOUTUBE_TIMEOUT_SECONDS,
+)
+from modules.metrics.metrics import metrics
+from modules.scrapper.scrapper import MAIN_SELECTOR, pages_for_budget, tiered_fetcher
+from modules.search.result_ranker import rank_hits
+from modules.search.searxng_json import searxng_client
+from modules.youtube.youtube_search import search_youtube
+from routes.helpers.deadline import Deadline
+
+logger = logging.getLogger(__name__)
+
+
+# Below these budgets a source is not worth starting
+MIN_SEARXNG_SECONDS = 0.5
+MIN_YOUTUBE_SECONDS = 1.0
+
+
+@dataclass
+class SearchResults:
+    urls: List[str] = field(default_factory=list)
+    # Ranked SearxNG results: url, title, snippet, engine
+    hits: List[Dict] = field(default_factory=list)
+    youtube: List[Dict] = field(default_factory=list)
+    documents: List[Dict] = field(default_factory=list)
+
+
+def clean_youtube_results(results: List[Dict]) -> List[Dict]:
+    """
+    Drop anything that would break JSON encoding of the YouTube results.
+    """
+    cleaned_results = []
+    for result in results:
+        if "error" in result:
+            continue
+        cleaned_result = {}
+        for key, value in result.items():
+            if isinstance(value, str):
+                # Ensure proper encoding and remove any problematic characters
+                cleaned_result[key] = value.encode('utf-8', 'ignore').decode('utf-8')
+            else:
+                cleaned_result[key] = value
+        cleaned_results.append(cleaned_result)
+    return cleaned_results
+
+
+async def _timed(source: str, awaitable, timeout: float, default: Any):
+    """
+    Await one source within its budget; timeouts and errors give ``default``.
+    """
+    started = time.perf_counter()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        metrics.incr(f"search.timeouts.{source}")
+        logger.warning(f"Search source '{source}' timed out after {timeout}s, continuing without it")
+        return default
+    except Exception as e:
+        metrics.incr(f"search.errors.{source}")
+        logger.error(f"Search source '{source}' failed: {e}")
+        return default
+    finally:
+        metrics.observe(f"search.seconds.{source}", time.perf_counter() - started)
+
+
+def _budget(deadline: Optional[Deadline], cap: float) -> float:
+    return cap if deadline is None else deadline.budget(cap=cap)
+
+
+async def _skipped(default: Any):
+    return default
+
+
+def _usable(document: Dict) -> bool:
+    return bool(document.get("success")) and len(document.get("content") or "") >= SCRAPER_MIN_TEXT_CHARS
+
+
+def hedge_delay() -> float:
+    """
+    How long a page may load before a backup page is started.
+    """
+    histogram = metrics.histogram("scraper.live_page_seconds")
+    if histogram is None or histogram.count < SEARCH_HEDGE_MIN_SAMPLES:
+        return SEARCH_HEDGE_DEFAULT_SECONDS
+    return max(SEARCH_HEDGE_MIN_SECONDS, histogram.percentile(SEARCH_HEDGE_PERCENTILE))
+
+
+async def read_pages(hits: List[Dict], count: int, timeout: Optional[float] = None,
+                     cache_only: bool = False) -> List[Dict]:
+    """
+    Read ranked hits until SEARCH_MIN_GOOD_PAGES have usable text or time
+    runs out, then stop; pages still loading are abandoned.
+
+    The first ``count`` hits start together. A page that fails or comes
+    back short is replaced by the next-best hit when the others cannot
+    make up the difference, and one loading past hedge_delay() gets the
+    next-best hit started alongside it. Documents come back in rank order.
+    """
+    loop = asyncio.get_running_loop()
+    expires_at = None if timeout is None else loop.time() + timeout
+    wanted = min(SEARCH_MIN_GOOD_PAGES, count)
+    hedge_after = hedge_delay()
+    running: Dict[asyncio.Task, Tuple[int, float]] = {}
+    hedged = set()
+    arrived: List[Tuple[int, Dict]] = []
+    next_hit = 0
+    good = 0
+
+    def launch() -> bool:
+        nonlocal next_hit
+        if next_hit >= len(hits):
+            return False
+        remaining = None if expires_at is None else max(0.0, expires_at - loop.time())
+        task = asyncio.create_task(
+            tiered_fetcher.fetch_one(hits[next_hit]["url"], MAIN_SELECTOR, remaining, cache_only)
+        )
+        running[task] = (next_hit, loop.time())
+        next_hit += 1
+        return True
+
+    for _ in range(count):
+        launch()
+    try:
+        while running and good < wanted:
+            now = loop.time()
+            waits = []
+            if expires_at is not None:
+                waits.append(expires_at - now)
+            if next_hit < len(hits):
+                waits.extend(started + hedge_after - now for task, (_, started) in running.items() if task not in hedged)
+            wait = max(0.0, min(waits)) if waits else None
+
+            done, _ = await asyncio.wait(running, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, _ = running.pop(task)
+                document = task.result()
+                arrived.append((index, document))
+                if _usable(document):
+                    good += 1
+                elif good + len(running) < wanted and launch():
+                    metrics.incr("search.pages_widened")
+
+            now = loop.time()
+            if expires_at is not None and now >= expires_at:
+                metrics.incr("search.pages_deadline_reached")
+                break
+            for task, (_, started) in list(running.items()):
+                if task not in hedged and now - started >= hedge_after and good < wanted:
+                    hedged.add(task)
+                    if launch():
+                        metrics.incr("search.hedges")
+    finally:
+        if running:
+            if good >= wanted:
+                metrics.incr("search.pages_abandoned", len(running))
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    metrics.incr("search.pages_skipped_by_rank", len(hits) - next_hit)
+    return [document for _, document in sorted(arrived, key=lambda item: item[0])]
+
+
+async def search_web(
+    query: str,
+    youtube_limit: int = 5,
+    max_pages: int = SEARCH_MAX_PAGES,
+    deadline: Optional[Deadline] = None,
+    cache_only: bool = False
+) -> AsyncGenerator[Union[Dict, SearchResults], None]:
+    """
+    Search SearxNG and YouTube and scrape the top pages, concurrently.
+
+    Yields SSE payloads (``{'type': 'status' | 'urls' | 'youtube', ...}``)
+    as each source completes, then one SearchResults. With a deadline,
+    each source gets at most what is left of it; YouTube is skipped and
+    fewer pages are read when time is short. ``youtube_limit=0`` skips
+    YouTube; ``cache_only`` reads search results and pages from cache only.
+    """
+    results = SearchResults()
+    yield {'type': 'status', 'message': 'Searching on the internet...'}
+
+    searxng_budget = _budget(deadline, SEARCH_SEARXNG_TIMEOUT_SECONDS)
+    if deadline is not None and searxng_budget < MIN_SEARXNG_SECONDS:
+        deadline.skip("searxng")
+        searxng = asyncio.create_task(_skipped([]))
+    else:
+        searxng = asyncio.create_task(_timed(
+            "searxng",
+            searxng_client.search(query, timeout=searxng_budget, cache_only=cache_only),
+            searxng_budget + 0.5,
+            []
+        ))
+
+    youtube_budget = _budget(deadline, SEARCH_YOUTUBE_TIMEOUT_SECONDS)
+    if youtube_limit <= 0 or cache_only:
+        metrics.incr("search.skipped.youtube")
+        youtube = asyncio.create_task(_skipped([]))
+    elif deadline is not None and youtube_budget < MIN_YOUTUBE_SECONDS:
+        deadline.skip("youtube")
+        youtube = asyncio.create_task(_skipped([]))
+    else:
+        youtube = asyncio.create_task(
+            _timed("youtube", asyncio.to_thread(search_youtube, query, limit=youtube_limit, deadline=deadline),
+                   youtube_budget, [])
+        )
+    pages = None
+    pending = {searxng, youtube}
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+            if searxng in done:
+                hits = searxng.result()
+                if hits and max_pages > 0:
+                    hits = await asyncio.to_thread(rank_hits, query, hits)
+                results.hits = hits[:max_pages]
+                results.urls = [hit["url"] for hit in results.hits]
+                yield {'type': 'urls', 'urls': results.urls}
+
+                pages_budget = _budget(deadline, SEARCH_PAGES_TIMEOUT_SECONDS)
+                wanted = min(SEARCH_PRERANK_TOP_K, len(results.urls))
+                page_count = min(wanted, pages_for_budget(pages_budget, len(results.urls)))
+                if cache_only:
+                    # Cached pages cost a disk read, whatever the budget
+                    pages = asyncio.create_task(_timed(
+                        "pages",
+                        read_pages(results.hits, len(results.hits), cache_only=True),
+                        SEARCH_PAGES_TIMEOUT_SECONDS,
+                        []
+                    ))
+                    pending.add(pages)
+                elif deadline is not None and results.urls and page_count == 0:
+                    deadline.skip("pages")
+                elif page_count:
+                    if page_count < wanted:
+                        metrics.incr("search.pages_trimmed", wanted - page_count)
+                    yield {'type': 'status', 'message': f'Reading {page_count} pages...'}
+                    # Pages that are still loading at the deadline are
+                    # dropped inside the scraper; the outer budget is a backstop
+                    pages = asyncio.create_task(_timed(
+                        "pages",
+                        read_pages(results.hits, page_count, timeout=pages_budget),
+                        pages_budget + 2,
+                        []
+                    ))
+                    pending.add(pages)
+
+            if youtube in done:
+                results.youtube = clean_youtube_results(youtube.result())
+                yield {'type': 'youtube', 'results': results.youtube}
+
+            if pages is not None and pages in done:
+                results.documents = pages.result()
+    finally:
+        unfinished = [task for task in (searxng, youtube, pages) if task is not None and not task.done()]
+        for task in unfinished:
+            task.cancel()
+        if unfinished:
+            # Let read_pages cancel its fetches and return browser leases now
+            await asyncio.gather(*unfinished, return_exceptions=True)
+
+    metrics.incr("search.pages_read", sum(1 for doc in results.documents if doc.get("success")))
+    yield results
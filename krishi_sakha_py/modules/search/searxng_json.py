@@ -1,11 +1,29 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
 import requests
 
-def searxng_search(query: str, instance_url: str = "http://localhost:8080", max_results: int = 10):
-    """
-    Fetch only the result URLs from a SearxNG instance in JSON format.
-    """
-    url = f"{instance_url}/search"
-    params = {
+from configs.runtime_config import (
+    SEARCH_SEARXNG_TIMEOUT_SECONDS,
+    SEARXNG_CACHE_SIZE,
+    SEARXNG_CACHE_TTL_SECONDS,
+    SEARXNG_FALLBACK_URLS,
+    SEARXNG_INSTANCE_COOLDOWN_SECONDS,
+    SEARXNG_STALE_SECONDS,
+    SEARXNG_URL,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _search_params(query: str, max_results: int) -> dict:
+    return {
         "q": query,
         "format": "json",
         "categories": "general",
@@ -13,14 +31,212 @@ def searxng_search(query: str, instance_url: str = "http://localhost:8080", max_
         "safesearch": 1,
         "count": max_results
     }
+
+
+def _result_urls(data: dict):
+    # Extract URLs only
+    return [result["url"] for result in data.get("results", []) if "url" in result]
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _url_key(url: str) -> str:
+    """
+    Compare URLs without scheme, "www.", fragment or trailing slash.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").removeprefix("www.")
+    return urlunsplit(("", host, parts.path.rstrip("/"), parts.query, ""))
+
+
+def rank_results(data: dict, max_results: int) -> List[Dict]:
+    """
+    SearxNG results as {url, title, snippet, engine, score}, best first,
+    one per URL.
+    """
+    ranked: Dict[str, Dict] = {}
+    results = sorted(
+        (r for r in data.get("results", []) if r.get("url")),
+        key=lambda r: r.get("score") or 0.0,
+        reverse=True
+    )
+    for result in results:
+        snippet = (result.get("content") or "").strip()
+        key = _url_key(result["url"])
+        if key in ranked:
+            # Keep the best-scored copy, but not at the cost of its snippet
+            if not ranked[key]["snippet"]:
+                ranked[key]["snippet"] = snippet
+            continue
+        if len(ranked) >= max_results:
+            continue
+        engines = [e for e in (result.get("engines") or [result.get("engine")]) if e]
+        ranked[key] = {
+            "url": result["url"],
+            "title": (result.get("title") or "").strip(),
+            "snippet": snippet,
+            "engine": result.get("engine") or (engines[0] if engines else None),
+            "engines": engines,
+            "score": round(result.get("score") or 0.0, 4),
+        }
+    return list(ranked.values())
+
+
+class SearxngClient:
+    """
+    Shared async client over one or more SearxNG instances.
+
+    Results are cached per normalized query. Instances are tried in order,
+    skipping any that failed within the cooldown, inside one time budget;
+    when all of them fail an expired cache entry is used if there is one.
+    """
+
+    def __init__(
+        self,
+        instances: Optional[List[str]] = None,
+        cache_size: int = SEARXNG_CACHE_SIZE,
+        cache_ttl: float = SEARXNG_CACHE_TTL_SECONDS,
+        stale_seconds: float = SEARXNG_STALE_SECONDS,
+        cooldown: float = SEARXNG_INSTANCE_COOLDOWN_SECONDS,
+    ):
+        self.instances = instances or [SEARXNG_URL] + [u for u in SEARXNG_FALLBACK_URLS if u != SEARXNG_URL]
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.stale_seconds = stale_seconds
+        self.cooldown = cooldown
+        self._cache: "OrderedDict[Tuple[str, int], Tuple[float, List[Dict]]]" = OrderedDict()
+        self._failed_at: Dict[str, float] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                headers={"User-Agent": "Mozilla/5.0"},
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _cached(self, key: Tuple[str, int], max_age: float) -> Optional[List[Dict]]:
+        entry = self._cache.get(key)
+        if entry is None or time.time() - entry[0] > max_age:
+            return None
+        self._cache.move_to_end(key)
+        return entry[1]
+
+    def _store(self, key: Tuple[str, int], results: List[Dict]):
+        self._cache[key] = (time.time(), results)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _ordered_instances(self) -> List[str]:
+        now = time.monotonic()
+        healthy = [i for i in self.instances if now - self._failed_at.get(i, -self.cooldown) >= self.cooldown]
+        cooling = [i for i in self.instances if i not in healthy]
+        return healthy + cooling
+
+    async def _query(self, instance: str, query: str, max_results: int, timeout: float) -> List[Dict]:
+        response = await self.client().get(
+            f"{instance}/search", params=_search_params(query, max_results), timeout=timeout
+        )
+        response.raise_for_status()
+        return rank_results(response.json(), max_results)
+
+    async def search(
+        self,
+        query: str,
+        max_results: int = 10,
+        timeout: float = SEARCH_SEARXNG_TIMEOUT_SECONDS,
+        cache_only: bool = False
+    ) -> List[Dict]:
+        """
+        Ranked results for ``query``. ``cache_only`` never goes to the
+        network and accepts expired entries.
+        """
+        key = (normalize_query(query), max_results)
+        cached = self._cached(key, self.cache_ttl)
+        if cached is not None:
+            metrics.incr("searxng.cache_hits")
+            return cached
+        if cache_only:
+            stale = self._cached(key, self.cache_ttl + self.stale_seconds)
+            metrics.incr("searxng.cache_only_hits" if stale is not None else "searxng.cache_only_misses")
+            return stale or []
+        metrics.incr("searxng.cache_misses")
+
+        deadline = time.monotonic() + timeout
+        last_error = None
+        for instance in self._ordered_instances():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                with metrics.timer("searxng.seconds"):
+                    results = await self._query(instance, query, max_results, remaining)
+            except (httpx.HTTPError, ValueError) as e:
+                last_error = e
+                self._failed_at[instance] = time.monotonic()
+                metrics.incr("searxng.instance_failures")
+                logger.warning(f"SearxNG instance {instance} failed: {e!r}")
+                continue
+            self._failed_at.pop(instance, None)
+            self._store(key, results)
+            return results
+
+        stale = self._cached(key, self.cache_ttl + self.stale_seconds)
+        if stale is not None:
+            metrics.incr("searxng.stale_served")
+            logger.warning(f"All SearxNG instances failed, serving stale results for '{query}'")
+            return stale
+        raise last_error or asyncio.TimeoutError()
+
+    def status(self) -> dict:
+        now = time.monotonic()
+        return {
+            "instances": [
+                {"url": i, "cooling_down": now - self._failed_at.get(i, -self.cooldown) < self.cooldown}
+                for i in self.instances
+            ],
+            "cached_queries": len(self._cache),
+        }
+
+
+searxng_client = SearxngClient()
+
+
+async def searxng_search_async(
+    query: str,
+    max_results: int = 10,
+    timeout: float = SEARCH_SEARXNG_TIMEOUT_SECONDS,
+    cache_only: bool = False
+) -> List[str]:
+    """
+    Non-blocking searxng_search for the request path: result URLs only,
+    best first.
+    """
+    results = await searxng_client.search(query, max_results=max_results, timeout=timeout, cache_only=cache_only)
+    return [result["url"] for result in results]
+
+
+def searxng_search(query: str, instance_url: str = SEARXNG_URL, max_results: int = 10):
+    """
+    Fetch only the result URLs from a SearxNG instance in JSON format.
+    """
+    url = f"{instance_url}/search"
+    params = _search_params(query, max_results)
     headers = {
         "User-Agent": "Mozilla/5.0"
     }
     response = requests.get(url, params=params, headers=headers, timeout=10)
     if response.status_code == 200:
-        data = response.json()
-        # Extract URLs only
-        return [result["url"] for result in data.get("results", []) if "url" in result]
+        return _result_urls(response.json())
     else:
         response.raise_for_status()
 
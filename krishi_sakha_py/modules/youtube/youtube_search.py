@@ -11,10 +11,18 @@ import re
 from typing import Dict, List
 
 
-def search_youtube(query: str, limit: int = 10) -> List[Dict]:
+def search_youtube(query: str, limit: int = 10, deadline=None) -> List[Dict]:
     """
     Search YouTube and return video details as a list of dictionaries.
+    With a request deadline, the HTTP timeout is capped by the time left.
     """
+    timeout = 10
+    if deadline is not None:
+        timeout = min(timeout, deadline.budget())
+        if timeout <= 0:
+            deadline.skip("youtube")
+            return []
+
     # Encode query
     encoded_query = urllib.parse.quote_plus(query)
     url = f"https://www.youtube.com/results?search_query={encoded_query}"
@@ -28,7 +36,7 @@ def search_youtube(query: str, limit: int = 10) -> List[Dict]:
     }
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = requests.get(url, headers=headers, timeout=timeout)
         response.raise_for_status()
         html_content = response.text
 
@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from modules.scrapper.host_scoreboard import host_scoreboard
+from routes.middlewares.auth_middleware import require_admin
+
+router = APIRouter(prefix="/admin")
+
+
+@router.get("/hosts")
+async def scrape_hosts(
+    limit: int = Query(100, ge=0, le=5000),
+    sort: str = Query("attempts", description="attempts, slowest or failing"),
+    user=Depends(require_admin)
+):
+    """
+    Per-host scrape scoreboard: success rate, p50/p95 fetch time, text
+    yield and circuit state.
+    """
+    return host_scoreboard.status(limit=limit, sort=sort)
+
+
+@router.post("/hosts/{host}/reset")
+async def reset_host(host: str, user=Depends(require_admin)):
+    """
+    Forget a host's history, closing its circuit.
+    """
+    if not host_scoreboard.reset(host):
+        raise HTTPException(status_code=404, detail=f"No scrape history for {host}")
+    return {"host": host, "reset": True}
@@ -1,60 +1,195 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends
+from fastapi import APIRouter, UploadFile, File, Form, Depends, Request
 from fastapi.responses import StreamingResponse
-from typing import Optional, List, Any
+from typing import Optional, List, Any, AsyncGenerator
+from dataclasses import dataclass, field
+import asyncio
+import hashlib
 import json
 import logging
+import time
 
 from routes.middlewares.auth_middleware import supabase_jwt_middleware
 from brain.model_run import model_runner
 from routes.helpers.router_picker import route_question
 from routes.helpers.push_supabase import push_to_supabase
-from data.functions.add_to_vector_db import PDFVectorDBManager
-from modules.scrapper.scrapper import json_scrapped
+from routes.helpers.conversation_store import conversation_store
+from routes.helpers.streaming import (
+    busy_response, guard_disconnect, coalesce,
+    sse_event, status_event, text_event, error_event, COMPLETE_EVENT
+)
+from routes.helpers.single_flight import single_flight, flight_key, normalize_prompt
+from modules.metrics.metrics import metrics
+from brain.scheduler import SchedulerBusyError, llm_scheduler
+from brain.context_retriever import Speculation, context_retriever
+from brain.degradation import degradation, trim_context
+from brain.passage_selector import build_search_context
+from configs.runtime_config import (
+    CHAT_TTFT_SLO_SECONDS, SPECULATIVE_COLLECTIONS, SPECULATIVE_MAX_DEGRADATION_LEVEL, SPECULATIVE_RETRIEVAL
+)
+from routes.helpers.deadline import Deadline
+from routes.helpers.keywords import extract_keywords
+from modules.search.search_orchestrator import SearchResults, search_web
 from typing import Dict
-from modules.youtube.youtube_search import search_youtube
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def flatten_docs(docs: List[Any]) -> List[str]:
+@dataclass
+class PreparedContext:
+    domain: str
+    context: Any
+    youtube_urls: List[Dict]
+    # "hit", "miss" or "none", for comparing time-to-first-token
+    speculation: str = "none"
+    # Scraped page URLs; citation [n] in the context is urls[n - 1]
+    urls: List[str] = field(default_factory=list)
+
+
+async def prepare_context(prompt: str, deadline: Optional[Deadline] = None) -> AsyncGenerator[Any, None]:
     """
-    Recursively flatten a list of documents which may contain strings or nested lists of strings.
-    Returns a flat list of strings.
+    Route the question and gather its context within the deadline.
+    Yields SSE status/urls/youtube frames, then a PreparedContext.
     """
-    flat_list = []
-    for doc in docs:
-        if isinstance(doc, str):
-            flat_list.append(doc)
-        elif isinstance(doc, list):
-            flat_list.extend(flatten_docs(doc))
-        else:
-            flat_list.append(str(doc))
-    return flat_list
+    yield status_event('Processing query...')
+
+    # Under load, expensive stages are scaled down for this request
+    policy = degradation.policy()
+    if policy.message:
+        yield status_event(policy.message)
+        metrics.incr(f"degradation.requests.{policy.name}")
+
+    # Start retrieval on the likely collections while routing is in flight,
+    # using the same keywords the local router will extract. Not under load,
+    # where a wasted retrieval takes capacity from requests that need it
+    speculations = {}
+    speculate = (
+        SPECULATIVE_RETRIEVAL
+        and policy.retrieval_k > 0
+        and policy.level <= SPECULATIVE_MAX_DEGRADATION_LEVEL
+    )
+    if SPECULATIVE_RETRIEVAL and not speculate:
+        metrics.incr("speculation.skipped_degraded")
+    if speculate:
+        speculative_keywords = extract_keywords(prompt)
+        speculative_query = " ".join(speculative_keywords) if speculative_keywords else prompt
+        for collection in SPECULATIVE_COLLECTIONS:
+            speculations[collection] = Speculation(
+                context_retriever, collection, speculative_query, prompt,
+                deadline=deadline, n_results=policy.retrieval_k
+            )
+
+    try:
+        yield status_event('Routing query...')
+
+        routing = await route_question(prompt, deadline=deadline)
+        logger.info(f"Routing result: {routing}")
+
+        domain = routing.get("domain", "general")
+        keywords = routing.get("keywords", [])
+        query = routing.get("query", prompt)
+        if domain == "search" and policy.search_as_general:
+            metrics.incr("degradation.search_as_general")
+            domain = "general"
+
+        # Initialize variables
+        context = ""
+        youtube_urls = []
+        urls = []
+        speculation = "none"
+
+        # Retrieve context if needed
+        if domain != "general" and domain != "search":
+            yield status_event('Searching for context...')
+
+            search_query = " ".join(keywords) if keywords else prompt
+            speculative = speculations.pop(domain, None)
+            if speculative and speculative.matches(domain, search_query):
+                speculation = "hit"
+                docs_flat = await speculative.claim()
+            else:
+                speculation = "miss" if speculations or speculative else "none"
+                if speculative:
+                    speculative.cancel()
+                docs_flat = await context_retriever.retrieve(
+                    domain, search_query, prompt, policy.retrieval_k, deadline=deadline
+                )
+            context = trim_context("\n".join(docs_flat), policy.context_chars) if docs_flat else ""
+
+            yield status_event(f'Context found: {len(docs_flat)} documents')
+        elif domain == "search":
+            # SearxNG, YouTube and page scraping run concurrently; each
+            # urls/youtube event goes out as soon as its source is done
+            async for event in search_web(
+                query,
+                youtube_limit=5 if policy.youtube else 0,
+                max_pages=policy.max_pages,
+                deadline=deadline,
+                cache_only=policy.cache_only
+            ):
+                if isinstance(event, SearchResults):
+                    # Only the passages closest to the question go to the model
+                    context = await asyncio.to_thread(
+                        build_search_context, prompt, event.documents, policy.context_chars
+                    )
+                    urls = [document.get("url") for document in event.documents]
+                    youtube_urls = event.youtube
+                else:
+                    yield sse_event(event)
+
+        yield PreparedContext(
+            domain=domain, context=context, youtube_urls=youtube_urls, speculation=speculation, urls=urls
+        )
+    finally:
+        # The route went elsewhere (or the client left): drop unused prefetches
+        for speculative in speculations.values():
+            speculative.cancel()
+
+
 @router.post("/chat")
 async def chat_endpoint(
+    request: Request,
     prompt: str = Form(...),
     conversation_id: str = Form(...),
     image: Optional[UploadFile] = File(None),
     history:str = Form(None),
+    since: Optional[int] = Form(None),
     user=Depends(supabase_jwt_middleware)
 ):
+    request_started = time.perf_counter()
+    deadline = Deadline(CHAT_TTFT_SLO_SECONDS, name="chat")
     user_id = user.get("sub")
     logger.info(f"User: {user_id}, Conversation: {conversation_id}")
+
     if history:
+        # Legacy clients still upload the full conversation
         history = json.loads(history)
+        conversation_store.append(user_id, conversation_id, "user", prompt)
+    else:
+        history = await conversation_store.history_for_turn(user_id, conversation_id, prompt, since)
     # Read image bytes ONLY ONCE here:
     image_bytes = None
     if image:
         image_bytes = await image.read()
         logger.info(f"Read {len(image_bytes)} bytes from image")
 
+    # Reserve a generation slot before streaming so overload is refused
+    # immediately. Taken last: nothing above may raise while it is held,
+    # since only event_stream releases it.
+    try:
+        admission = llm_scheduler.admit("chat")
+    except SchedulerBusyError as busy:
+        logger.warning(f"Rejecting chat request: {busy}")
+        return busy_response(busy)
+
     async def event_stream():
+        full_response = ""
+        owns_admission = True
         try:
             # ---------------------------------------------------------------------
             # IMAGE REQUEST
             # ---------------------------------------------------------------------
             if image_bytes:
-                yield f"data: {json.dumps({'type': 'status', 'message': 'Processing uploaded image...'})}\n\n"
+                yield status_event('Processing uploaded image...')
 
                 import os
                 temp_dir = "./temp"
@@ -71,22 +206,23 @@ async def chat_endpoint(
 
                     final_query = prompt if prompt.strip() else "What do you see in this image?"
 
-                    async for chunk in model_runner.generate_image(
+                    async for chunk in coalesce(model_runner.generate_image(
                         question=final_query,
                         conversation_id=conversation_id,
                         user_id=user_id,
                         image_path=image_path,
                         stream=True,
+                        admission=admission,
                         # history=history
-                    ):
-                        yield f"data: {json.dumps({'type': 'text', 'chunk': chunk})}\n\n"
+                    )):
+                        yield text_event(chunk)
 
                     # Done
-                    yield "data: {\"type\": \"complete\"}\n\n"
+                    yield COMPLETE_EVENT
 
                 except Exception as image_error:
                     logger.error(f"Error processing image: {str(image_error)}")
-                    yield f"data: {json.dumps({'type': 'error', 'message': f'Error processing image: {str(image_error)}'})}\n\n"
+                    yield error_event(f'Error processing image: {str(image_error)}')
 
                 finally:
                     # Clean up temp file
@@ -102,110 +238,87 @@ async def chat_endpoint(
             # ---------------------------------------------------------------------
             # TEXT-ONLY REQUEST
             # ---------------------------------------------------------------------
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Processing query...'})}\n\n"
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Routing query...'})}\n\n"
-
-            routing = route_question(prompt)
-            logger.info(f"Routing result: {routing}")
-
-            domain = routing.get("domain", "general")
-            keywords = routing.get("keywords", [])
-            query = routing.get("query", prompt)
-
-            # Initialize variables
-            context = ""
-            youtube_urls = []
-
-            # Retrieve context if needed
-            if domain != "general":
-                if domain != "search":
-                    yield f"data: {json.dumps({'type': 'status', 'message': 'Searching for context...'})}\n\n"
-                    db_manager = PDFVectorDBManager(
-                        vector_db_type="chroma",
-                        embedding_method="sentence_transformers",
-                        db_path="/home/linmar/Desktop/Krishi-Sakha/krishi_sakha_py/chroma_db",
-                        collection_name=domain
-                    )
+            # First questions without history are identical for every asker,
+            # so concurrent duplicates share one routing/retrieval/generation
+            shareable = not history
+            normalized_prompt = normalize_prompt(prompt)
 
-                    search_query = " ".join(keywords) if keywords else prompt
-                    results = db_manager.search_documents(query=search_query, n_results=5)
-                    if not results.get("documents") or results["documents"] == [[]]:
-                        results = db_manager.search_documents(query=prompt, n_results=5)
-                    docs_flat = flatten_docs(results.get("documents", []))
-                    context = "\n".join(docs_flat) if docs_flat else ""
+            if shareable:
+                context_events = single_flight.stream(
+                    flight_key("chat-context", normalized_prompt),
+                    lambda: prepare_context(prompt, deadline),
+                    name="chat_context"
+                )
+            else:
+                context_events = prepare_context(prompt, deadline)
 
-                    yield f"data: {json.dumps({'type': 'status', 'message': f'Context found: {len(docs_flat)} documents'})}\n\n"
+            prepared = None
+            async for event in context_events:
+                if isinstance(event, PreparedContext):
+                    prepared = event
                 else:
-                    yield f"data: {json.dumps({'type': 'status', 'message': 'Searching on YouTube...'})}\n\n"
-                    youtube_urls = search_youtube(query, limit=5)  # Limit to 5 results
-                    
-                    yield f"data: {json.dumps({'type': 'status', 'message': 'Searching on the internet...'})}\n\n"
-                    context = await json_scrapped(query)
-                    
-                    # Extract and send URLs immediately
-                    urls = []
-                    for item in context:
-                        if "url" in item:
-                            if isinstance(item["url"], list):
-                                urls.extend(item["url"])
-                            else:
-                                urls.append(item["url"])
-                    
-                    # Send URLs as separate event
-                    yield f"data: {json.dumps({'type': 'urls', 'urls': urls})}\n\n"
-                    
-                    # Send YouTube results as separate event with proper encoding
-                    try:
-                        # Clean the YouTube results to ensure JSON compatibility
-                        cleaned_results = []
-                        for result in youtube_urls:
-                            cleaned_result = {}
-                            for key, value in result.items():
-                                if isinstance(value, str):
-                                    # Ensure proper encoding and remove any problematic characters
-                                    cleaned_result[key] = value.encode('utf-8', 'ignore').decode('utf-8')
-                                else:
-                                    cleaned_result[key] = value
-                            cleaned_results.append(cleaned_result)
-                        
-                        youtube_json = json.dumps({'type': 'youtube', 'results': cleaned_results}, ensure_ascii=False)
-                        yield f"data: {youtube_json}\n\n"
-                    except Exception as json_error:
-                        logger.error(f"Error serializing YouTube results: {json_error}")
-                        yield f"data: {json.dumps({'type': 'youtube', 'results': []})}\n\n"
+                    yield event
+
+            domain = prepared.domain
+            context = prepared.context
+            youtube_urls = prepared.youtube_urls
+
             # Stream normal model
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Generating response...'})}\n\n"
+            yield status_event('Generating response...')
+            metrics.observe("deadline.remaining_at_generation_seconds.chat", deadline.remaining())
+
+            llm_context = context
+            if shareable:
+                # The request that starts the shared generation hands its
+                # reservation over, since the generation may outlive it;
+                # requests that join give theirs back
+                owns_admission = False
+                context_hash = hashlib.sha1(llm_context.encode("utf-8")).hexdigest()
+                chunks = single_flight.stream(
+                    flight_key("chat-generate", normalized_prompt, domain, context_hash),
+                    lambda: model_runner.generate(
+                        question=prompt,
+                        context=llm_context,
+                        stream=True,
+                        push_to_db=False,
+                        admission=admission,
+                        deadline=deadline
+                    ),
+                    name="chat_generate",
+                    admission=admission
+                )
+            else:
+                chunks = model_runner.generate(
+                    question=prompt,
+                    context=llm_context,
+                    conversation_id=conversation_id,
+                    user_id=user_id,
+                    stream=True,
+                    history=history,
+                    metadata=None,  # No metadata needed since we send events directly
+                    push_to_db=False,  # Prevent automatic DB save to avoid duplicates
+                    admission=admission,
+                    deadline=deadline
+                )
 
             # Collect the full response for saving to DB
-            full_response = ""
-            async for chunk in model_runner.generate(
-                question=prompt,
-                context="Internet web scrapper result : " + json.dumps(context) if domain == "search" else context,
-                conversation_id=conversation_id,
-                user_id=user_id,
-                stream=True,
-                history=history,
-                metadata=None,  # No metadata needed since we send events directly
-                push_to_db=False  # Prevent automatic DB save to avoid duplicates
-            ):
+            async for chunk in coalesce(chunks):
+                if not full_response:
+                    ttft = time.perf_counter() - request_started
+                    metrics.observe("chat.ttft_seconds", ttft)
+                    metrics.observe(f"chat.ttft_seconds.speculation_{prepared.speculation}", ttft)
+                    degradation.record_ttft(ttft)
                 full_response += chunk
-                yield f"data: {json.dumps({'type': 'text', 'chunk': chunk})}\n\n"
+                yield text_event(chunk)
 
             # Save the complete response to database (single save)
             if full_response:
                 # Only include metadata for database storage when domain is search
                 metadata_for_db = None
                 if domain == "search":
-                    urls = []
-                    for item in context:
-                        if "url" in item:
-                            if isinstance(item["url"], list):
-                                urls.extend(item["url"])
-                            else:
-                                urls.append(item["url"])
                     metadata_for_db = {
-                        'url': urls,
-                        'youtberelated': youtube_urls if 'youtube_urls' in locals() else []
+                        'url': prepared.urls,
+                        'youtberelated': youtube_urls
                     }
                 
                 push_to_supabase(
@@ -217,16 +330,39 @@ async def chat_endpoint(
                         'sender': "assistant",
                         'metadata': metadata_for_db
                     }
-                )                
+                )
+                conversation_store.append(user_id, conversation_id, "assistant", full_response)
 
                 
 
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield COMPLETE_EVENT
 
 
 
+        except asyncio.CancelledError:
+            # Client went away; keep whatever was generated so the chat is not left without a reply
+            if full_response:
+                push_to_supabase(
+                    'chat_messages',
+                    {
+                        'conversation_id': conversation_id,
+                        'user_id': user_id,
+                        'message': full_response,
+                        'sender': "assistant",
+                        'metadata': {'partial': True}
+                    }
+                )
+                conversation_store.append(user_id, conversation_id, "assistant", full_response)
+                metrics.incr("chat.partial_answers_persisted")
+            else:
+                metrics.incr("chat.partial_answers_discarded")
+            logger.info(f"Chat stream cancelled for conversation {conversation_id}, partial persisted: {bool(full_response)}")
+            raise
         except Exception as e:
             logger.error(f"General error in chat endpoint: {str(e)}", exc_info=True)
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield error_event(str(e))
+        finally:
+            if owns_admission:
+                admission.release()
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return StreamingResponse(guard_disconnect(request, event_stream(), "chat"), media_type="text/event-stream")
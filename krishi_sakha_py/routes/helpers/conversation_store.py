@@ -0,0 +1,165 @@
+"""
+Server-side conversation history store.
+An in-process cache in front of the Supabase chat_messages table so the
+client no longer has to upload the whole conversation on every turn.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from configs.supabase_key import SUPABASE
+from configs.runtime_config import (
+    CONVERSATION_CACHE_SIZE,
+    CONVERSATION_CACHE_TTL_SECONDS,
+    CONVERSATION_HISTORY_LIMIT,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ConversationState:
+    # Turns are {"id", "role", "content"}; id is None until the row is read back
+    turns: List[Dict] = field(default_factory=list)
+    last_id: int = 0
+    loaded_at: float = field(default_factory=time.time)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class ConversationStore:
+    def __init__(
+        self,
+        table_name: str = "chat_messages",
+        max_conversations: int = CONVERSATION_CACHE_SIZE,
+        ttl_seconds: float = CONVERSATION_CACHE_TTL_SECONDS,
+        history_limit: int = CONVERSATION_HISTORY_LIMIT,
+    ):
+        self.table_name = table_name
+        self.max_conversations = max_conversations
+        self.ttl_seconds = ttl_seconds
+        self.history_limit = history_limit
+        # Keyed by (user_id, conversation_id): a conversation id alone is
+        # client-supplied and must not reach another user's messages
+        self._conversations: "OrderedDict[Tuple[str, str], ConversationState]" = OrderedDict()
+
+    # ------------------------------------------------------------------
+    # Supabase reads (the client is synchronous, so run it off the loop)
+    # ------------------------------------------------------------------
+    def _fetch_rows(self, user_id: str, conversation_id: str, after_id: int) -> List[Dict]:
+        query = (
+            SUPABASE.table(self.table_name)
+            .select("id, sender, message")
+            .eq("conversation_id", conversation_id)
+            .eq("user_id", user_id)
+        )
+        if after_id:
+            rows = query.gt("id", after_id).order("id").execute().data
+        else:
+            rows = query.order("id", desc=True).limit(self.history_limit).execute().data
+            rows = list(reversed(rows))
+        return rows or []
+
+    async def _load_rows(self, user_id: str, conversation_id: str, after_id: int = 0) -> Optional[List[Dict]]:
+        """
+        Rows after ``after_id``, or None when Supabase cannot be read: chat
+        then answers from whatever is cached rather than failing.
+        """
+        try:
+            with metrics.timer("conversation_store.load_seconds"):
+                rows = await asyncio.to_thread(self._fetch_rows, user_id, conversation_id, after_id)
+        except Exception as e:
+            logger.error(f"Could not load history for conversation {conversation_id}: {e}")
+            metrics.incr("conversation_store.load_errors")
+            return None
+        return [
+            {"id": row.get("id"), "role": row.get("sender"), "content": row.get("message") or ""}
+            for row in rows
+        ]
+
+    # ------------------------------------------------------------------
+    # Cache management
+    # ------------------------------------------------------------------
+    def _state(self, user_id: str, conversation_id: str) -> ConversationState:
+        key = (user_id, conversation_id)
+        state = self._conversations.get(key)
+        if state is None:
+            state = self._conversations[key] = ConversationState(loaded_at=0)
+        self._conversations.move_to_end(key)
+        while len(self._conversations) > self.max_conversations:
+            self._conversations.popitem(last=False)
+        return state
+
+    def _extend(self, state: ConversationState, rows: List[Dict]):
+        # Rows read back from the database replace optimistic local entries
+        state.turns = [turn for turn in state.turns if turn["id"] is not None]
+        state.turns.extend(rows)
+        if rows:
+            state.last_id = max(state.last_id, max(row["id"] or 0 for row in rows))
+        if len(state.turns) > self.history_limit:
+            state.turns = state.turns[-self.history_limit:]
+
+    async def get_history(self, user_id: str, conversation_id: str, since: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Return the cached conversation as {"role", "content"} turns, oldest first.
+
+        Args:
+            user_id: Owner of the conversation; other users' messages are never read
+            conversation_id: Conversation to read
+            since: Id of the newest message the client knows about. When the
+                cache is behind this cursor only the missing tail is fetched.
+        """
+        state = self._state(user_id, conversation_id)
+        async with state.lock:
+            expired = time.time() - state.loaded_at > self.ttl_seconds
+            if expired:
+                rows = await self._load_rows(user_id, conversation_id)
+                if rows is not None:
+                    # On a failed load the stale turns (if any) are kept and
+                    # the next request tries again
+                    state.turns, state.last_id = [], 0
+                    self._extend(state, rows)
+                    state.loaded_at = time.time()
+                metrics.incr("conversation_store.full_loads")
+            elif since is not None and since > state.last_id:
+                rows = await self._load_rows(user_id, conversation_id, state.last_id)
+                if rows is not None:
+                    self._extend(state, rows)
+                metrics.incr("conversation_store.tail_loads")
+            else:
+                metrics.incr("conversation_store.hits")
+
+            return [{"role": turn["role"], "content": turn["content"]} for turn in state.turns]
+
+    async def history_for_turn(
+        self, user_id: str, conversation_id: str, prompt: str, since: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        """
+        History preceding the current prompt. The prompt itself is recorded
+        in the cache when the client's insert has not been read back yet.
+        """
+        history = await self.get_history(user_id, conversation_id, since)
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == prompt:
+            return history[:-1]
+        self.append(user_id, conversation_id, "user", prompt)
+        return history
+
+    def append(self, user_id: str, conversation_id: str, role: str, content: str):
+        """
+        Record a message that was just written to chat_messages.
+        Conversations that are not cached are left alone; they are read in
+        full on their next request.
+        """
+        state = self._conversations.get((user_id, conversation_id))
+        if state is None or not content:
+            return
+        state.turns.append({"id": None, "role": role, "content": content})
+        if len(state.turns) > self.history_limit:
+            state.turns = state.turns[-self.history_limit:]
+
+
+conversation_store = ConversationStore()
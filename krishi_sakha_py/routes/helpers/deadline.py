@@ -0,0 +1,57 @@
+"""
+Request-scoped time budget.
+
+Created by a route handler when the request arrives and passed down
+through routing, retrieval, web search and generation. Each stage asks
+for the budget it may spend and degrades (skips a source, reads fewer
+pages) instead of overrunning the time-to-first-token target.
+"""
+
+import logging
+import math
+import time
+from typing import Optional
+
+from configs.runtime_config import DEADLINE_GENERATION_RESERVE_SECONDS, DEADLINE_MIN_QUEUE_WAIT_SECONDS
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class Deadline:
+    def __init__(self, budget_seconds: Optional[float], name: str = "request"):
+        self.name = name
+        self.budget_seconds = budget_seconds
+        self.started = time.perf_counter()
+        self.expires_at = math.inf if budget_seconds is None else self.started + budget_seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.perf_counter())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def budget(self, cap: Optional[float] = None, reserve: float = DEADLINE_GENERATION_RESERVE_SECONDS) -> float:
+        """
+        Seconds a pre-generation stage may spend: what is left after holding
+        back ``reserve`` for the first token, never more than ``cap``.
+        """
+        available = max(0.0, self.remaining() - reserve)
+        return available if cap is None else min(cap, available)
+
+    def queue_budget(self) -> float:
+        """
+        How long generation may wait for a model slot.
+        """
+        return max(self.remaining(), DEADLINE_MIN_QUEUE_WAIT_SECONDS)
+
+    def skip(self, stage: str):
+        metrics.incr(f"deadline.skipped.{stage}")
+        logger.info(f"[{self.name}] skipping {stage}: {self.remaining():.2f}s left of {self.budget_seconds}s")
+
+    def __repr__(self) -> str:
+        return f"Deadline({self.name}, {self.remaining():.2f}s left)"
@@ -0,0 +1,90 @@
+"""
+Rule-based keyword and year extraction for English, Hindi and Hinglish
+questions. Used by the local router, so routing never needs an LLM just
+to pull out search terms.
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+# Words that carry no search value. Hinglish spellings vary a lot, so the
+# common variants are listed explicitly.
+ENGLISH_STOPWORDS = {
+    "a", "an", "the", "and", "or", "but", "if", "then", "so", "of", "in", "on",
+    "at", "to", "for", "from", "by", "with", "about", "as", "into", "over",
+    "is", "are", "was", "were", "be", "been", "being", "am", "do", "does",
+    "did", "have", "has", "had", "can", "could", "should", "would", "will",
+    "shall", "may", "might", "must", "i", "me", "my", "we", "our", "you",
+    "your", "he", "she", "it", "its", "they", "them", "their", "this", "that",
+    "these", "those", "what", "which", "who", "whom", "when", "where", "why",
+    "how", "there", "here", "any", "some", "all", "much", "many", "more",
+    "most", "very", "please", "tell", "give", "know", "want", "need", "get",
+    "also", "just", "than", "too", "not", "no", "yes", "according",
+    "mentioned", "say", "says", "said", "explain", "kindly", "sir",
+}
+
+HINDI_STOPWORDS = {
+    "का", "की", "के", "को", "में", "से", "पर", "है", "हैं", "था", "थी", "थे",
+    "और", "या", "भी", "तो", "ही", "ने", "कि", "क्या", "कैसे", "कब", "कहाँ",
+    "कहां", "क्यों", "कौन", "कौनसा", "कितना", "कितनी", "कितने", "मुझे", "मेरे",
+    "मेरा", "मेरी", "हम", "हमें", "आप", "आपको", "यह", "ये", "वह", "वो", "इस",
+    "उस", "इसके", "उसके", "लिए", "बताइए", "बताओ", "बताएं", "बताये", "करें",
+    "करना", "करने", "कर", "रहा", "रही", "रहे", "होता", "होती", "होते", "हो",
+    "जी", "कृपया", "अब", "एक", "कोई", "कुछ", "सकते", "सकता", "सकती", "चाहिए",
+}
+
+HINGLISH_STOPWORDS = {
+    "ka", "ki", "ke", "ko", "mein", "me", "mai", "se", "par", "pe", "hai",
+    "hain", "h", "tha", "thi", "the", "aur", "ya", "bhi", "to", "hi", "ne",
+    "kya", "kaise", "kab", "kahan", "kyun", "kyon", "kaun", "kitna", "kitni",
+    "kitne", "mujhe", "mera", "meri", "mere", "hum", "humein", "aap", "aapko",
+    "yeh", "ye", "woh", "wo", "is", "us", "liye", "batao", "bataye", "bataiye",
+    "batayein", "karein", "karna", "karne", "kar", "raha", "rahi", "rahe",
+    "hota", "hoti", "hote", "ho", "ji", "kripya", "ab", "ek", "koi", "kuch",
+    "sakte", "sakta", "sakti", "chahiye", "wala", "wali", "wale", "karu",
+    "karun", "gaya", "gayi", "gaye",
+}
+
+STOPWORDS = ENGLISH_STOPWORDS | HINDI_STOPWORDS | HINGLISH_STOPWORDS
+
+# \w already matches Devanagari letters but not the vowel signs, so the
+# block is added explicitly, minus the danda (U+0964/U+0965)
+_TOKEN = re.compile(r"[\wऀ-ॣ०-ॿ]+")
+# 2023, 2022-23, २०२३ (\d matches Devanagari digits too)
+_YEAR = re.compile(r"(?<!\d)((?:19|20|१९|२०)\d{2})(?:\s*[-–/]\s*\d{2,4})?(?!\d)")
+
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFKC", text or "").casefold()
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(normalize_text(text))
+
+
+def extract_year(text: str) -> Optional[int]:
+    """
+    First four-digit year in the text, in Latin or Devanagari digits.
+    """
+    match = _YEAR.search(text or "")
+    if not match:
+        return None
+    year = int(match.group(1))
+    return year if 1900 <= year <= 2100 else None
+
+
+def extract_keywords(text: str, limit: int = 6) -> List[str]:
+    """
+    Content words of the question, in order of appearance, without
+    stopwords, bare numbers or duplicates.
+    """
+    keywords = []
+    for token in tokenize(text):
+        if token in STOPWORDS or token.isdigit() or len(token) < 2:
+            continue
+        if token not in keywords:
+            keywords.append(token)
+        if len(keywords) >= limit:
+            break
+    return keywords
@@ -0,0 +1,138 @@
+"""
+Local question router: nearest-centroid classification over sentence
+embeddings, trained from the labeled prompts in data/router.
+
+Picks one of annual_report, general or search in a few milliseconds,
+without a network call. Year and keywords come from rules in
+routes.helpers.keywords.
+"""
+
+import json
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from configs.runtime_config import ROUTER_EMBEDDING_MODEL, ROUTER_RULE_BOOST
+from data.functions.add_to_vector_db import SENTENCE_TRANSFORMERS_AVAILABLE, get_shared_embedder
+from routes.helpers.keywords import extract_keywords, extract_year, normalize_text
+from routes.helpers.query_rewriter import query_rewriter
+
+logger = logging.getLogger(__name__)
+
+DOMAINS = ["annual_report", "general", "search"]
+EXAMPLES_PATH = Path(__file__).parent.parent.parent / "data" / "router" / "router_examples.json"
+
+# Surface cues that the embedding alone tends to miss
+DOMAIN_RULES = {
+    "annual_report": re.compile(
+        r"annual report|\breport\b|ministry|department|statistic|budget|allocation|"
+        r"as per official|रिपोर्ट|वार्षिक|मंत्रालय|आंकड़|आँकड़|बजट"
+    ),
+    "search": re.compile(
+        r"\btoday\b|\blatest\b|\bcurrent\b|\brecent|\bnews\b|\bnow\b|tomorrow|this week|"
+        r"forecast|weather|mandi|\bprice\b|\brate\b|last date|deadline|installment|"
+        r"\baaj\b|\babhi\b|\bkal\b|\bbhav\b|mausam|barish|kisht|"
+        r"आज|ताज़ा|ताजा|भाव|मौसम|बारिश|किस्त|कीमत|तारीख"
+    ),
+}
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+    return [x / norm for x in vector]
+
+
+def _dot(a: List[float], b: List[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class LocalRouter:
+    def __init__(self, model_name: str = ROUTER_EMBEDDING_MODEL, examples_path: Path = EXAMPLES_PATH):
+        self.model_name = model_name
+        self.examples_path = Path(examples_path)
+        self.model = None
+        self.centroids: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+        self._load_failed = False
+
+    @property
+    def available(self) -> bool:
+        return bool(self.centroids)
+
+    def load(self) -> bool:
+        """
+        Load the embedding model and build one centroid per domain.
+        Safe to call repeatedly; returns False when the router cannot run.
+        """
+        with self._lock:
+            if self.centroids:
+                return True
+            if self._load_failed or not SENTENCE_TRANSFORMERS_AVAILABLE:
+                return False
+            try:
+                with open(self.examples_path, "r", encoding="utf-8") as f:
+                    examples = json.load(f)
+                model = get_shared_embedder(self.model_name)
+
+                centroids = {}
+                for domain in DOMAINS:
+                    prompts = examples.get(domain) or []
+                    if not prompts:
+                        raise ValueError(f"No router examples for domain '{domain}'")
+                    vectors = model.encode(prompts, normalize_embeddings=True).tolist()
+                    mean = [sum(column) / len(vectors) for column in zip(*vectors)]
+                    centroids[domain] = _normalize(mean)
+
+                self.model = model
+                self.centroids = centroids
+                logger.info(f"Local router ready: {sum(len(v) for v in examples.values())} examples, model {self.model_name}")
+                return True
+            except Exception as e:
+                self._load_failed = True
+                logger.error(f"Local router unavailable, falling back to Gemini: {e}")
+                return False
+
+    def scores(self, question: str) -> Dict[str, float]:
+        vector = self.model.encode([question], normalize_embeddings=True).tolist()[0]
+        text = normalize_text(question)
+        scores = {}
+        for domain, centroid in self.centroids.items():
+            score = _dot(vector, centroid)
+            rule = DOMAIN_RULES.get(domain)
+            if rule and rule.search(text):
+                score += ROUTER_RULE_BOOST
+            scores[domain] = score
+        return scores
+
+    def classify(self, question: str) -> Optional[dict]:
+        """
+        Route a question locally.
+
+        Returns the same keys as the Gemini router plus ``confidence`` (the
+        cosine margin between the best and second-best domain), or None when
+        the local router is not available.
+        """
+        if not self.load():
+            return None
+
+        scores = self.scores(question)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (domain, best), (runner_up, second) = ranked[0], ranked[1]
+
+        result = {
+            "domain": domain,
+            "reason": f"Local router: closest to {domain} ({best:.2f}), then {runner_up} ({second:.2f})",
+            "year": extract_year(question),
+            "keywords": extract_keywords(question),
+            "confidence": round(best - second, 4),
+            "source": "local",
+        }
+        if domain == "search":
+            result["query"] = query_rewriter.rewrite(question)["search"] or question
+        return result
+
+
+local_router = LocalRouter()
@@ -1,8 +1,18 @@
+import asyncio
 import json
 import logging
 import google.generativeai as genai
 from configs.external_keys import GEMINI_API_KEY
 from configs.model_config import AI_SEARCH_SYSTEM_MESSAGE
+from configs.runtime_config import (
+    QUERY_REWRITE_GEMINI_TIMEOUT_SECONDS,
+    QUERY_REWRITE_LONG_INPUT_WORDS,
+    ROUTER_GEMINI_MIN_SECONDS,
+)
+from modules.metrics.metrics import metrics
+from routes.helpers.query_rewriter import query_rewriter
+from routes.helpers.deadline import Deadline
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,10 +23,12 @@ genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel('gemini-2.0-flash')
 
 
-def preprocess_query(user_question: str) -> dict:
+def preprocess_query_gemini(user_question: str) -> dict:
     """
-    Use Gemini to determine which domain should handle the user's question.
-    Returns a dictionary with domain, reason, year, and keywords.
+    Use Gemini to turn the user's question into a web search query.
+    Returns a dictionary with query and search.
+
+    Blocking network call; async callers go through preprocess_query().
     """
     try:
         prompt = f"{AI_SEARCH_SYSTEM_MESSAGE}\n\nQuestion: \"{user_question}\""
@@ -51,9 +63,47 @@ def preprocess_query(user_question: str) -> dict:
         }
 
 
+async def preprocess_query(user_question: str, deadline: Optional[Deadline] = None) -> dict:
+    """
+    Rewrite the user's question into ``{"query", "search"}``.
+
+    The local rewriter handles almost everything in well under a
+    millisecond. Gemini is asked only for long questions or when no search
+    terms were found, and only within QUERY_REWRITE_GEMINI_TIMEOUT_SECONDS.
+    """
+    local = query_rewriter.rewrite(user_question)
+    ambiguous = not local["search"] or len(user_question.split()) > QUERY_REWRITE_LONG_INPUT_WORDS
+    if not ambiguous:
+        metrics.incr("query_rewrite.local")
+        return local
+
+    timeout = QUERY_REWRITE_GEMINI_TIMEOUT_SECONDS
+    if deadline is not None:
+        timeout = deadline.budget(cap=timeout)
+    if deadline is not None and timeout < ROUTER_GEMINI_MIN_SECONDS:
+        deadline.skip("query_rewrite_gemini")
+        remote = {}
+    else:
+        metrics.incr("query_rewrite.gemini_fallback")
+        try:
+            remote = await asyncio.wait_for(
+                asyncio.to_thread(preprocess_query_gemini, user_question),
+                timeout
+            )
+        except asyncio.TimeoutError:
+            metrics.incr("query_rewrite.gemini_timeouts")
+            logger.warning(f"Gemini query rewrite timed out after {timeout:.2f}s")
+            remote = {}
+
+    search = (remote.get("search") or "").strip()
+    if not search:
+        return {"query": user_question, "search": local["search"] or user_question}
+    return {"query": user_question, "search": search}
+
+
 # ------------------------------------------------------------------------------
 
 if __name__ == "__main__":
     test_question = input("Enter test question: ")
-    result = preprocess_query(test_question)
+    result = asyncio.run(preprocess_query(test_question))
     print(f"\n→ ROUTER OUTPUT:\n{result}")
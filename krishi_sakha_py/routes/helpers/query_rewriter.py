@@ -0,0 +1,85 @@
+"""
+Local search-query rewriter.
+
+Turns a farmer's question into a short web search string by keeping its
+most salient terms: stopwords (Hindi, Hinglish, English) are dropped and
+the rest are ranked by IDF weights learned from the Kisan datasets
+(see scripts/build_query_idf.py). Terms keep their original order.
+"""
+
+import json
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+from configs.runtime_config import QUERY_REWRITE_CACHE_SIZE, QUERY_REWRITE_MAX_TERMS
+from routes.helpers.keywords import STOPWORDS, extract_year, tokenize
+
+logger = logging.getLogger(__name__)
+
+IDF_PATH = Path(__file__).parent.parent.parent / "data" / "query_rewriter" / "idf.json"
+
+# Terms this common in the datasets are filler ("information", "detail")
+MIN_IDF = 1.5
+
+
+class QueryRewriter:
+    def __init__(self, idf_path: Path = IDF_PATH, max_terms: int = QUERY_REWRITE_MAX_TERMS):
+        self.idf_path = Path(idf_path)
+        self.max_terms = max_terms
+        self.idf: Dict[str, float] = {}
+        # Terms missing from the table are rarer than anything in it
+        self.unseen_idf = 1.0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            try:
+                with open(self.idf_path, "r", encoding="utf-8") as f:
+                    self.idf = json.load(f)["idf"]
+                self.unseen_idf = max(self.idf.values(), default=1.0)
+                logger.info(f"Query rewriter loaded {len(self.idf)} IDF weights")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Query rewriter running without IDF weights: {e}")
+            self._loaded = True
+
+    def terms(self, question: str) -> list:
+        """
+        The most informative terms of the question, in their original order.
+        """
+        if not self._loaded:
+            self.load()
+        weights = {}
+        for token in tokenize(question):
+            if token in STOPWORDS or token.isdigit() or len(token) < 2 or token in weights:
+                continue
+            weights[token] = self.idf.get(token, self.unseen_idf)
+
+        # Dict order is appearance order, and sorted() is stable
+        ranked = sorted(weights, key=weights.get, reverse=True)
+        salient = [token for token in ranked if weights[token] >= MIN_IDF] or ranked
+        keep = set(salient[:self.max_terms])
+        return [token for token in weights if token in keep]
+
+    def rewrite(self, question: str) -> dict:
+        """
+        Return ``{"query": question, "search": "<short search string>"}``.
+        ``search`` is empty when the question has no content words.
+        """
+        return {"query": question, "search": self._search_string(question.strip())}
+
+    @lru_cache(maxsize=QUERY_REWRITE_CACHE_SIZE)
+    def _search_string(self, question: str) -> str:
+        terms = self.terms(question)
+        year = extract_year(question)
+        if year and str(year) not in terms:
+            terms.append(str(year))
+        return " ".join(terms)
+
+
+query_rewriter = QueryRewriter()
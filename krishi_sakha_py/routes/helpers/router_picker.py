@@ -1,8 +1,15 @@
+import asyncio
 import json
 import logging
+import time
 import google.generativeai as genai
 from configs.external_keys import GEMINI_API_KEY
 from configs.model_config import ROUTER_CONFIG_DISCRIPTION_SYSTEM_PROMPT
+from configs.runtime_config import ROUTER_GEMINI_MIN_SECONDS, ROUTER_GEMINI_TIMEOUT_SECONDS, ROUTER_MIN_MARGIN
+from modules.metrics.metrics import metrics
+from routes.helpers.local_router import local_router
+from routes.helpers.deadline import Deadline
+from typing import Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -13,10 +20,12 @@ genai.configure(api_key=GEMINI_API_KEY)
 model = genai.GenerativeModel('gemini-2.0-flash')
 
 
-def route_question(user_question: str) -> dict:
+def route_question_gemini(user_question: str) -> dict:
     """
     Use Gemini to determine which domain should handle the user's question.
     Returns a dictionary with domain, reason, year, and keywords.
+
+    Blocking network call; async callers go through route_question().
     """
     try:
         prompt = f"{ROUTER_CONFIG_DISCRIPTION_SYSTEM_PROMPT}\n\nQuestion: \"{user_question}\""
@@ -65,8 +74,73 @@ def route_question(user_question: str) -> dict:
         }
 
 
+def route_question_local(user_question: str) -> dict:
+    """
+    Route with the local embedding router only, falling back to Gemini
+    when the local router cannot be loaded.
+    """
+    return local_router.classify(user_question) or route_question_gemini(user_question)
+
+
+async def route_question(user_question: str, deadline: Optional[Deadline] = None) -> dict:
+    """
+    Route a question without blocking the event loop.
+
+    The local router answers most questions on its own. Gemini is asked
+    only when the local margin is below ROUTER_MIN_MARGIN (or the local
+    router is unavailable), and its answer is used only if it arrives
+    within ROUTER_GEMINI_TIMEOUT_SECONDS (or what the deadline leaves).
+    """
+    started = time.perf_counter()
+    local = await asyncio.to_thread(local_router.classify, user_question)
+    metrics.observe("router.local_seconds", time.perf_counter() - started)
+
+    if local is not None and local["confidence"] >= ROUTER_MIN_MARGIN:
+        metrics.incr("router.local")
+        logger.info(f"Local routing result: {local}")
+        return local
+
+    timeout = ROUTER_GEMINI_TIMEOUT_SECONDS
+    if deadline is not None:
+        timeout = deadline.budget(cap=timeout)
+    if deadline is not None and timeout < ROUTER_GEMINI_MIN_SECONDS:
+        deadline.skip("router_gemini")
+        remote = None
+    else:
+        metrics.incr("router.gemini_fallback")
+        try:
+            with metrics.timer("router.gemini_seconds"):
+                remote = await asyncio.wait_for(
+                    asyncio.to_thread(route_question_gemini, user_question),
+                    timeout
+                )
+        except asyncio.TimeoutError:
+            metrics.incr("router.gemini_timeouts")
+            logger.warning(f"Gemini routing timed out after {timeout:.2f}s")
+            remote = None
+
+    if remote is None or remote.get("reason", "").startswith("Error in routing"):
+        if local is not None:
+            return local
+        return remote or {
+            "domain": "general",
+            "reason": "Routing timed out, defaulting to general",
+            "year": None,
+            "keywords": [],
+        }
+
+    remote["source"] = "gemini"
+    if local is not None:
+        # Rules are at least as good as Gemini at pulling these out
+        if remote.get("year") is None:
+            remote["year"] = local["year"]
+        if not remote.get("keywords"):
+            remote["keywords"] = local["keywords"]
+    return remote
+
+
 def get_route_for_question(question: str) -> str:
-    result = route_question(question)
+    result = route_question_local(question)
     return result.get("domain", "general")
 
 
@@ -74,5 +148,5 @@ def get_route_for_question(question: str) -> str:
 
 if __name__ == "__main__":
     test_question = input("Enter test question: ")
-    result = route_question(test_question)
+    result = asyncio.run(route_question(test_question))
     print(f"\n→ ROUTER OUTPUT:\n{result}")
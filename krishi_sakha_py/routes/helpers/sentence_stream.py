@@ -0,0 +1,127 @@
+"""
+Incremental sentence segmentation for voice streaming.
+
+Turns a stream of token fragments into complete, speakable sentences so
+the client's TTS engine can start talking after the first sentence
+instead of guessing boundaries itself.
+"""
+
+import logging
+from typing import AsyncGenerator, AsyncIterator, List
+
+from configs.runtime_config import VOICE_SENTENCE_MAX_CHARS, VOICE_SENTENCE_MIN_CHARS
+
+logger = logging.getLogger(__name__)
+
+# Devanagari danda / double danda end a sentence on their own
+HARD_TERMINATORS = "।॥"
+# English punctuation only ends a sentence when followed by whitespace, so
+# "2.5 kg" or "www.krishi.gov.in" are never split
+SOFT_TERMINATORS = ".!?"
+CLOSERS = "\"')]}”’"
+# Preferred places to cut an over-long sentence
+SOFT_BREAKS = ",;:"
+
+
+class SentenceSegmenter:
+    def __init__(
+        self,
+        max_chars: int = VOICE_SENTENCE_MAX_CHARS,
+        min_chars: int = VOICE_SENTENCE_MIN_CHARS
+    ):
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self._buffer = ""
+        # Everything before this offset has already been scanned
+        self._scanned = 0
+
+    def feed(self, chunk: str) -> List[str]:
+        """
+        Add a token fragment and return the sentences it completed.
+        """
+        if not chunk:
+            return []
+        self._buffer += chunk
+        sentences = []
+        while True:
+            end = self._find_boundary()
+            if end is None:
+                end = self._find_overflow()
+            if end is None:
+                break
+            sentence = self._take(end)
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def flush(self) -> List[str]:
+        """
+        Return whatever is left once the token stream ends.
+        """
+        sentence = self._take(len(self._buffer))
+        return [sentence] if sentence else []
+
+    def _take(self, end: int) -> str:
+        sentence = self._buffer[:end].strip()
+        self._buffer = self._buffer[end:]
+        self._scanned = 0
+        return sentence
+
+    def _find_boundary(self):
+        text = self._buffer
+        i = self._scanned
+        while i < len(text):
+            char = text[i]
+            end = None
+            if char in HARD_TERMINATORS:
+                end = i + 1
+            elif char == "\n":
+                end = i + 1
+            elif char in SOFT_TERMINATORS:
+                j = i + 1
+                while j < len(text) and (text[j] in SOFT_TERMINATORS or text[j] in CLOSERS):
+                    j += 1
+                if j == len(text):
+                    # Cannot tell yet whether this ends the sentence
+                    break
+                if text[j].isspace():
+                    end = j
+                i = j - 1
+
+            if end is not None:
+                # Swallow closing quotes/brackets that belong to the sentence
+                while end < len(text) and text[end] in CLOSERS:
+                    end += 1
+                if len(text[:end].strip()) >= self.min_chars:
+                    return end
+            i += 1
+
+        self._scanned = i
+        return None
+
+    def _find_overflow(self):
+        if len(self._buffer) < self.max_chars:
+            return None
+        window = self._buffer[:self.max_chars]
+        # Cut after the last clause break, else the last space, else hard cut
+        for candidates in (SOFT_BREAKS, " "):
+            cut = max(window.rfind(char) for char in candidates)
+            if cut >= self.min_chars:
+                return cut + 1
+        return self.max_chars
+
+
+async def sentences(
+    chunks: AsyncIterator[str],
+    max_chars: int = VOICE_SENTENCE_MAX_CHARS,
+    min_chars: int = VOICE_SENTENCE_MIN_CHARS
+) -> AsyncGenerator[str, None]:
+    """
+    Yield complete sentences from a token stream as soon as each one ends.
+    """
+    segmenter = SentenceSegmenter(max_chars=max_chars, min_chars=min_chars)
+    async for chunk in chunks:
+        for sentence in segmenter.feed(chunk):
+            yield sentence
+    for sentence in segmenter.flush():
+        yield sentence
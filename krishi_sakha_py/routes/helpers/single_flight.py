@@ -0,0 +1,164 @@
+"""
+Single-flight deduplication of identical concurrent requests.
+
+When many users ask the same question at once (for example right after a
+weather alert on the radio), only the first request runs the pipeline.
+Everyone else subscribes to its output: items already produced are
+replayed, and new items are fanned out as they arrive.
+
+The flight runs with the Deadline and scheduler lane of the request that
+started it. Keys are prefixed with the route ("voice", "search", ...), so
+every subscriber is in the same lane anyway. A later subscriber's own
+deadline would end later, so the shared run is never slower than that
+subscriber would have been alone. At worst it was cut down a little
+earlier than that subscriber needed.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import unicodedata
+from typing import Any, AsyncGenerator, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from brain.scheduler import Admission
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = "?.!।॥,;: "
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Canonical form of a question for deduplication: Unicode-normalized,
+    case-folded, whitespace-collapsed, without trailing punctuation.
+    """
+    text = unicodedata.normalize("NFKC", prompt or "").casefold()
+    text = _WHITESPACE.sub(" ", text).strip()
+    return text.rstrip(_TRAILING_PUNCTUATION)
+
+
+def flight_key(*parts: Any) -> str:
+    raw = "\x1f".join(str(part) for part in parts)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class Flight:
+    def __init__(self, name: str):
+        self.name = name
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.updated = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self, item: Any):
+        self.items.append(item)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None):
+        self.done = True
+        self.error = error
+        self._notify()
+
+    def _notify(self):
+        updated, self.updated = self.updated, asyncio.Event()
+        updated.set()
+
+
+class SingleFlight:
+    def __init__(self):
+        self._flights: Dict[str, Flight] = {}
+
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def _pump(self, key: str, flight: Flight, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                flight.publish(item)
+        except asyncio.CancelledError:
+            flight.finish(asyncio.CancelledError())
+            raise
+        except Exception as e:
+            flight.finish(e)
+        else:
+            flight.finish()
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def stream(
+        self,
+        key: str,
+        factory: Callable[[], AsyncIterator[Any]],
+        name: str = "default",
+        admission: Optional[Admission] = None
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Subscribe to the flight for ``key``, starting it with ``factory``
+        if none is running.
+
+        The flight runs in its own task, so it keeps going for the remaining
+        subscribers when the request that started it disconnects. It is
+        cancelled once the last subscriber leaves.
+
+        ``admission`` is the place the caller reserved on arrival. A flight
+        started here takes it over (``factory`` should generate with it) and
+        gives it back when it ends; a subscriber joining a running flight
+        does not generate, so its place is released right away.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = Flight(name)
+            flight.task = asyncio.create_task(self._pump(key, flight, factory()))
+            if admission:
+                # Also covers a flight cancelled before it reached the model
+                flight.task.add_done_callback(lambda _: admission.release())
+            metrics.incr(f"single_flight.leaders.{name}")
+        else:
+            if admission:
+                admission.release()
+            metrics.incr(f"single_flight.followers.{name}")
+            if flight.items:
+                metrics.incr(f"single_flight.replayed_items.{name}", len(flight.items))
+
+        flight.subscribers += 1
+        index = 0
+        try:
+            while True:
+                while index < len(flight.items):
+                    yield flight.items[index]
+                    index += 1
+                if flight.done:
+                    if flight.error:
+                        raise flight.error
+                    return
+                await flight.updated.wait()
+        finally:
+            flight.subscribers -= 1
+            if flight.subscribers == 0 and not flight.done:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+                flight.task.cancel()
+                metrics.incr(f"single_flight.abandoned.{name}")
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], name: str = "default") -> Any:
+        """
+        Await ``fn()`` once for all concurrent callers with the same key.
+        """
+        async def once():
+            yield await fn()
+
+        subscription = self.stream(key, once, name=name)
+        try:
+            async for result in subscription:
+                return result
+        finally:
+            await subscription.aclose()
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,253 @@
+"""
+Shared helpers for the server-sent event (SSE) routes.
+"""
+
+import asyncio
+import json
+import logging
+from functools import lru_cache
+from typing import Any, AsyncGenerator, AsyncIterator, Dict
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+from brain.scheduler import SchedulerBusyError
+from configs.runtime_config import (
+    LLM_BUSY_RETRY_AFTER_SECONDS,
+    SSE_COALESCE_BYTES,
+    SSE_COALESCE_MS,
+    SSE_DISCONNECT_POLL_SECONDS,
+)
+from modules.metrics.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BUSY_MESSAGE = "Krishi Sakha is busy right now. Please try again in a few seconds."
+
+
+# ----------------------------------------------------------------------
+# Event encoding
+# ----------------------------------------------------------------------
+def _dumps(payload: Dict[str, Any]) -> str:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(payload).decode("utf-8")
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+
+
+def sse_event(payload: Dict[str, Any]) -> str:
+    """
+    Encode one SSE frame: ``data: {...}\\n\\n``.
+    """
+    return f"data: {_dumps(payload)}\n\n"
+
+
+@lru_cache(maxsize=256)
+def status_event(message: str) -> str:
+    """
+    Pre-encoded status frame; the status messages are a small fixed set.
+    """
+    return sse_event({"type": "status", "message": message})
+
+
+COMPLETE_EVENT = sse_event({"type": "complete"})
+
+
+def text_event(chunk: str) -> str:
+    return sse_event({"type": "text", "chunk": chunk})
+
+
+def sentence_event(sentence: str) -> str:
+    return sse_event({"type": "sentence", "chunk": sentence})
+
+
+def error_event(message: str) -> str:
+    return sse_event({"type": "error", "message": message})
+
+
+async def coalesce(
+    chunks: AsyncIterator[str],
+    max_delay_ms: float = SSE_COALESCE_MS,
+    max_bytes: int = SSE_COALESCE_BYTES
+) -> AsyncGenerator[str, None]:
+    """
+    Merge small text chunks so each SSE frame carries more than one token.
+
+    A merged chunk is flushed once it holds ``max_bytes`` bytes or its
+    oldest part is ``max_delay_ms`` old. The very first chunk is passed
+    through immediately so time-to-first-token does not change.
+    """
+    if max_delay_ms <= 0 and max_bytes <= 1:
+        async for chunk in chunks:
+            yield chunk
+        return
+
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def pump():
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(finished)
+
+    pump_task = asyncio.create_task(pump())
+    buffer = []
+    buffered_bytes = 0
+    flush_at = 0.0
+    first = True
+    try:
+        while True:
+            if buffer:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(0.0, flush_at - loop.time()))
+                except asyncio.TimeoutError:
+                    yield "".join(buffer)
+                    buffer, buffered_bytes = [], 0
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is finished or isinstance(item, Exception):
+                if buffer:
+                    yield "".join(buffer)
+                if item is finished:
+                    return
+                raise item
+
+            if not item:
+                continue
+            if first:
+                first = False
+                yield item
+                continue
+
+            if not buffer:
+                flush_at = loop.time() + max_delay_ms / 1000
+            buffer.append(item)
+            buffered_bytes += len(item.encode("utf-8"))
+            metrics.incr("sse.chunks_in")
+            if buffered_bytes >= max_bytes:
+                yield "".join(buffer)
+                buffer, buffered_bytes = [], 0
+    finally:
+        if not pump_task.done():
+            pump_task.cancel()
+            await asyncio.gather(pump_task, return_exceptions=True)
+
+
+async def text_events(chunks: AsyncIterator[str]) -> AsyncGenerator[str, None]:
+    """
+    Coalesced ``{'type': 'text', 'chunk': ...}`` frames for a token stream.
+    """
+    async for text in coalesce(chunks):
+        metrics.incr("sse.text_frames")
+        yield text_event(text)
+
+
+def busy_response(error: SchedulerBusyError) -> StreamingResponse:
+    """
+    Fast 429 reply carrying a single SSE error event, so clients that only
+    read the event stream still see why the request was refused.
+    """
+    frame = sse_event({'type': 'error', 'code': 'busy', 'message': BUSY_MESSAGE})
+    return StreamingResponse(
+        iter([frame]),
+        status_code=429,
+        media_type="text/event-stream",
+        headers={"Retry-After": str(LLM_BUSY_RETRY_AFTER_SECONDS)},
+    )
+
+
+async def started(items: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    """
+    Wait for the first item of ``items`` and return an iterator over all of
+    them. A SchedulerBusyError raised before the first item (no slot freed
+    up in time) surfaces here, while the route can still answer 429; other
+    errors are raised again from the returned iterator.
+    """
+    iterator = items.__aiter__()
+    first, error = [], None
+    try:
+        first.append(await iterator.__anext__())
+    except StopAsyncIteration:
+        pass
+    except SchedulerBusyError:
+        raise
+    except Exception as e:
+        error = e
+
+    async def replay():
+        try:
+            if error:
+                raise error
+            for item in first:
+                yield item
+            if first:
+                async for item in iterator:
+                    yield item
+        finally:
+            if hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+    return replay()
+
+
+async def guard_disconnect(
+    request: Request,
+    events: AsyncIterator[str],
+    name: str,
+    poll_interval: float = SSE_DISCONNECT_POLL_SECONDS
+) -> AsyncGenerator[str, None]:
+    """
+    Drive an SSE generator in its own task and cancel it once the client
+    disconnects.
+
+    The disconnect is noticed even while the pipeline is between events
+    (routing, scraping, waiting for the first token), and cancellation
+    propagates into the model stream and any in-flight scrape.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=64)
+    finished = object()
+
+    async def produce():
+        try:
+            async for event in events:
+                await queue.put(event)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(finished)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), poll_interval)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    metrics.incr(f"sse.disconnects.{name}")
+                    logger.info(f"Client disconnected from /{name}, cancelling pipeline")
+                    return
+                continue
+
+            if item is finished:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        # Covers both our own disconnect check and the server closing the stream
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
@@ -0,0 +1,28 @@
+import asyncio
+
+from fastapi import APIRouter, Depends
+
+from brain.brain_init import backend_pool
+from brain.degradation import degradation
+from modules.metrics.metrics import metrics
+from modules.scrapper.browser_pool import browser_pool
+from modules.scrapper.request_policy import request_policy
+from modules.scrapper.scrapper import tiered_fetcher
+from modules.search.searxng_json import searxng_client
+from routes.middlewares.auth_middleware import require_admin
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def metrics_endpoint(user=Depends(require_admin)):
+    # Admins only: the snapshot carries backend URLs, error text and file paths
+    snapshot = metrics.snapshot()
+    snapshot["backends"] = backend_pool.status()
+    snapshot["degradation"] = degradation.status()
+    snapshot["browser_pool"] = browser_pool.status()
+    # Counts the page cache's sqlite rows, so off the event loop
+    snapshot["scraper"] = await asyncio.to_thread(tiered_fetcher.status)
+    snapshot["request_policy"] = request_policy.status()
+    snapshot["searxng"] = searxng_client.status()
+    return snapshot
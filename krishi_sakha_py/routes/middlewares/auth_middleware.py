@@ -3,6 +3,7 @@ from fastapi import Request, HTTPException
 from routes.middlewares.check_jwt import verify_supabase_jwt
 from fastapi import Request, HTTPException, Depends
 from routes.middlewares.check_jwt import verify_supabase_jwt
+from configs.runtime_config import ADMIN_USER_IDS
 
 async def supabase_jwt_middleware(request: Request):
     auth_header = request.headers.get("Authorization")
@@ -15,3 +16,12 @@ async def supabase_jwt_middleware(request: Request):
         raise HTTPException(status_code=401, detail="Invalid JWT token")
 
     return payload
+
+
+async def require_admin(user=Depends(supabase_jwt_middleware)):
+    """
+    Only the Supabase users listed in ADMIN_USER_IDS.
+    """
+    if user.get("sub") not in ADMIN_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+    return user
@@ -1,73 +1,96 @@
-from modules.scrapper.scrapper import json_scrapped
-from modules.youtube.youtube_search import search_youtube
+from modules.search.search_orchestrator import SearchResults, search_web
 from fastapi import APIRouter, Request
 from brain.model_run import model_runner
 from fastapi.responses import StreamingResponse
-import json
+import asyncio
+from typing import AsyncGenerator, Optional
 from routes.helpers.quer_processor import preprocess_query
+from routes.helpers.streaming import (
+    busy_response, guard_disconnect, text_events,
+    sse_event, status_event, error_event, COMPLETE_EVENT
+)
+from routes.helpers.single_flight import single_flight, flight_key, normalize_prompt
+from brain.scheduler import Admission, SchedulerBusyError, llm_scheduler
+from configs.runtime_config import SEARCH_TTFT_SLO_SECONDS
+from routes.helpers.deadline import Deadline
+from brain.degradation import degradation
+from brain.passage_selector import build_search_context
+from modules.metrics.metrics import metrics
 import logging
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+async def search_pipeline(
+    query: str, deadline: Optional[Deadline] = None, admission: Optional[Admission] = None
+) -> AsyncGenerator[str, None]:
+    """
+    Preprocess, scrape, look up YouTube and answer within the deadline;
+    yields SSE frames.
+    """
+    yield status_event('Processing query...')
+    # Under load, expensive stages are scaled down for this request
+    policy = degradation.policy()
+    if policy.message:
+        yield status_event(policy.message)
+        metrics.incr(f"degradation.requests.{policy.name}")
+
+    preprocessed_query = await preprocess_query(query, deadline=deadline)
+    search_query = preprocessed_query.get("search", query)
+    yield status_event('Searching for results...')
+    scrapped_data = ""
+    async for event in search_web(
+        search_query,
+        youtube_limit=5 if policy.youtube else 0,
+        max_pages=policy.max_pages,
+        deadline=deadline,
+        # /search has no model-only route, so the last level reads caches only too
+        cache_only=policy.cache_only or policy.search_as_general
+    ):
+        if isinstance(event, SearchResults):
+            scrapped_data = await asyncio.to_thread(
+                build_search_context, query, event.documents, policy.context_chars
+            )
+        else:
+            yield sse_event(event)
+    yield status_event('Scraped data retrieved.')
+
+    yield status_event('Processing model response...')
+    # Stream model response directly (no collection needed)
+    async for frame in text_events(model_runner.run_rag(query, scrapped_data, admission=admission, deadline=deadline)):
+        yield frame
+   
+    yield COMPLETE_EVENT
+
+
 @router.post("/search")
 async def search(request: Request):
+    deadline = Deadline(SEARCH_TTFT_SLO_SECONDS, name="search")
     data = await request.json()
     query = data.get("query")
 
+    try:
+        admission = llm_scheduler.admit("search")
+    except SchedulerBusyError as busy:
+        logger.warning(f"Rejecting search request: {busy}")
+        return busy_response(busy)
+
+    # Identical searches share one pipeline run. The request that starts it
+    # hands its reservation over, since the run may outlive it; requests
+    # that join give theirs back.
+    frames = single_flight.stream(
+        flight_key("search", normalize_prompt(query)),
+        lambda: search_pipeline(query, deadline, admission),
+        name="search",
+        admission=admission
+    )
+
     async def event_stream():
         try:
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Processing query...'})}\n\n"
-            preprocessed_query = preprocess_query(query)
-            search_query = preprocessed_query.get("search", query)
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Searching for results...'})}\n\n"
-            scrapped_data = await json_scrapped(search_query)
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Scraped data retrieved.'})}\n\n"
-            
-            # Extract and send URLs immediately
-            urls = []
-            for item in scrapped_data:
-                if "url" in item:
-                    if isinstance(item["url"], list):
-                        urls.extend(item["url"])
-                    else:
-                        urls.append(item["url"])
-            
-            # Send URLs as separate event
-            yield f"data: {json.dumps({'type': 'urls', 'urls': urls})}\n\n"
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Searching YouTube results...'})}\n\n"
-            youtube_results = search_youtube(search_query, limit=5)  # Limit to 5 results to avoid large payloads
-            yield f"data: {json.dumps({'type': 'status', 'message': 'YouTube results retrieved.'})}\n\n"
-            
-            # Send YouTube results as separate event - ensure it's properly serialized
-            try:
-                # Clean the YouTube results to ensure JSON compatibility
-                cleaned_results = []
-                for result in youtube_results:
-                    cleaned_result = {}
-                    for key, value in result.items():
-                        if isinstance(value, str):
-                            # Ensure proper encoding and remove any problematic characters
-                            cleaned_result[key] = value.encode('utf-8', 'ignore').decode('utf-8')
-                        else:
-                            cleaned_result[key] = value
-                    cleaned_results.append(cleaned_result)
-                
-                youtube_json = json.dumps({'type': 'youtube', 'results': cleaned_results}, ensure_ascii=False)
-                yield f"data: {youtube_json}\n\n"
-            except Exception as json_error:
-                logger.error(f"Error serializing YouTube results: {json_error}")
-                yield f"data: {json.dumps({'type': 'youtube', 'results': []})}\n\n"
-            
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Processing model response...'})}\n\n"
-            # Stream model response directly (no collection needed)
-            async for chunk in model_runner.run_rag(query, scrapped_data):
-                yield f"data: {json.dumps({'type': 'text', 'chunk': chunk})}\n\n"
-           
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            async for frame in frames:
+                yield frame
         except Exception as e:
             logger.error(f"General error in search endpoint: {str(e)}", exc_info=True)
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield error_event(str(e))
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return StreamingResponse(guard_disconnect(request, event_stream(), "search"), media_type="text/event-stream")
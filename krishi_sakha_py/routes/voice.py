@@ -1,39 +1,83 @@
-from fastapi import APIRouter, Form, Depends
+from fastapi import APIRouter, Form, Depends, Request
 from fastapi.responses import StreamingResponse
 from typing import Optional, List, Any
-import json
 import logging
+import time
 
 from routes.middlewares.auth_middleware import supabase_jwt_middleware
 from brain.model_run import model_runner
 from routes.helpers.router_picker import route_question
 from data.functions.add_to_vector_db import PDFVectorDBManager
+from routes.helpers.streaming import (
+    busy_response, guard_disconnect, started, text_events, sentence_event, error_event, COMPLETE_EVENT
+)
+from routes.helpers.sentence_stream import sentences
+from modules.metrics.metrics import metrics
+from routes.helpers.single_flight import single_flight, flight_key, normalize_prompt
+from brain.scheduler import SchedulerBusyError, llm_scheduler
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# "tokens" forwards raw model fragments, "sentences" emits one
+# {'type': 'sentence'} event per complete speakable sentence
+VOICE_STREAM_MODES = ("tokens", "sentences")
+
 
 router = APIRouter()
 @router.post("/voice")
 async def voice_endpoint(
+    request: Request,
     prompt: str = Form(...),
+    mode: str = Form("tokens"),
     user=Depends(supabase_jwt_middleware)
 ):
+    request_started = time.perf_counter()
     user_id = user.get("sub")
-    logger.info(f"[VOICE] user={user_id}, prompt={prompt}")
+    logger.info(f"[VOICE] user={user_id}, mode={mode}, prompt={prompt}")
+    if mode not in VOICE_STREAM_MODES:
+        mode = "tokens"
+
+    try:
+        admission = llm_scheduler.admit("voice")
+    except SchedulerBusyError as busy:
+        logger.warning(f"[VOICE] rejecting request: {busy}")
+        return busy_response(busy)
+
+    # Identical questions share one generation. The request that starts it
+    # hands its reservation over, since the generation may outlive it;
+    # requests that join give theirs back.
+    chunks = single_flight.stream(
+        flight_key("voice", normalize_prompt(prompt)),
+        lambda: model_runner.generate_voice(question=prompt, admission=admission),
+        name="voice",
+        admission=admission
+    )
+    try:
+        chunks = await started(chunks)
+    except SchedulerBusyError as busy:
+        logger.warning(f"[VOICE] no generation slot: {busy}")
+        return busy_response(busy)
 
     async def event_stream():
         try:
-            async for chunk in model_runner.generate_voice(
-                question=prompt,
-            ):
-                yield f"data: {json.dumps({'type': 'text', 'chunk': chunk})}\n\n"
+            if mode == "sentences":
+                first = True
+                async for sentence in sentences(chunks):
+                    if first:
+                        first = False
+                        metrics.observe("voice.first_sentence_seconds", time.perf_counter() - request_started)
+                    metrics.incr("voice.sentences")
+                    yield sentence_event(sentence)
+            else:
+                async for frame in text_events(chunks):
+                    yield frame
 
             # when loop ends, send a single "complete"
-            yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+            yield COMPLETE_EVENT
 
         except Exception as e:
             logger.error(f"Voice endpoint error: {e}", exc_info=True)
-            yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+            yield error_event(str(e))
 
-    return StreamingResponse(event_stream(), media_type="text/event-stream")
+    return StreamingResponse(guard_disconnect(request, event_stream(), "voice"), media_type="text/event-stream")
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML main-text extractors on a saved corpus of pages.
+
+Times every installed extractor (trafilatura, selectolax, lxml, bs4) on
+each fixture, then compares extracting the whole corpus inline on the
+event loop with extracting it through the scraper's process pool,
+reporting throughput and the longest event-loop stall of each.
+
+Fixtures are plain .html files. Save real result pages with --collect,
+or generate synthetic article pages with --synthetic when offline.
+
+Usage Examples:
+    python scripts/bench_extractors.py --collect https://agricoop.nic.in https://icar.org.in
+    python scripts/bench_extractors.py
+    python scripts/bench_extractors.py --fixtures /tmp/pages --iterations 5 --workers 4
+    python scripts/bench_extractors.py --synthetic 40
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import asyncio
+import hashlib
+import random
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from modules.scrapper.extraction import ExtractionPool, available_extractors, extract_text
+
+DEFAULT_FIXTURES = project_root / "data" / "html_fixtures"
+
+
+def collect(urls, fixtures: Path):
+    import httpx
+    from modules.scrapper.browser_pool import USER_AGENT
+
+    fixtures.mkdir(parents=True, exist_ok=True)
+    with httpx.Client(follow_redirects=True, timeout=15, headers={"User-Agent": USER_AGENT}) as client:
+        for url in urls:
+            try:
+                response = client.get(url)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"❌ {url}: {e}")
+                continue
+            name = f"{urlsplit(url).hostname}-{hashlib.sha1(url.encode()).hexdigest()[:8]}.html"
+            (fixtures / name).write_text(response.text, encoding="utf-8")
+            print(f"✅ {url} -> {name} ({len(response.text) // 1024} KB)")
+
+
+def synthetic_page(rng: random.Random, paragraphs: int) -> str:
+    words = ("wheat rice mandi price quintal farmer scheme kisan soil irrigation fertilizer urea "
+             "monsoon rainfall district yield hectare crop insurance subsidy seed variety").split()
+    nav = "".join(f"<li><a href='/p{i}'>Menu {i}</a></li>" for i in range(60))
+    scripts = "".join(f"<script>var tracker{i} = {{id: {i}, events: []}};</script>" for i in range(20))
+    body = "".join(
+        "<p>" + " ".join(rng.choice(words) for _ in range(rng.randint(40, 120))) + ".</p>"
+        for _ in range(paragraphs)
+    )
+    return (f"<html><head><title>Synthetic page</title>{scripts}</head><body>"
+            f"<header><nav><ul>{nav}</ul></nav></header><main><article><h1>Advisory</h1>{body}</article></main>"
+            f"<footer>{nav}</footer></body></html>")
+
+
+def load_fixtures(fixtures: Path, synthetic: int):
+    if synthetic:
+        rng = random.Random(7)
+        return [(f"synthetic-{i}", synthetic_page(rng, rng.choice([5, 20, 80, 300]))) for i in range(synthetic)]
+    return [(path.name, path.read_text(encoding="utf-8", errors="replace")) for path in sorted(fixtures.glob("*.html"))]
+
+
+def bench_extractors(pages, iterations: int):
+    total_mb = sum(len(html) for _, html in pages) / (1024 * 1024)
+    print(f"\n=== Extractors: {len(pages)} pages, {total_mb:.1f} MB, {iterations} iteration(s) ===")
+    print(f"{'extractor':<12} {'pages/s':>9} {'MB/s':>8} {'mean ms':>9} {'p95 ms':>9} {'chars':>8} {'empty':>6}")
+    for name, extractor in available_extractors().items():
+        samples, chars, empty = [], [], 0
+        for _ in range(iterations):
+            for _, html in pages:
+                start = time.perf_counter()
+                try:
+                    text = extractor(html)
+                except Exception:
+                    text = ""
+                samples.append(time.perf_counter() - start)
+                chars.append(len(text))
+                empty += not text
+        elapsed = sum(samples)
+        ordered = sorted(samples)
+        print(f"{name:<12} {len(samples) / elapsed:9.1f} {total_mb * iterations / elapsed:8.2f} "
+              f"{1000 * statistics.mean(samples):9.2f} {1000 * ordered[int(0.95 * (len(ordered) - 1))]:9.2f} "
+              f"{int(statistics.mean(chars)):8d} {empty:6d}")
+
+
+async def _max_stall(work) -> tuple:
+    """
+    Run ``work`` while a 10 ms ticker measures how late the loop wakes it.
+    """
+    stall = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal stall
+        loop = asyncio.get_running_loop()
+        while not done.is_set():
+            expected = loop.time() + 0.01
+            await asyncio.sleep(0.01)
+            stall = max(stall, loop.time() - expected)
+
+    tick = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    await work
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, stall
+
+
+async def bench_loop(pages, iterations: int, workers: int):
+    htmls = [html for _, html in pages] * iterations
+    print(f"\n=== On the event loop: {len(htmls)} extractions ===")
+
+    async def inline():
+        for html in htmls:
+            extract_text(html)
+            await asyncio.sleep(0)
+
+    pool = ExtractionPool(workers=workers, max_pending=max(1, workers * 4))
+
+    async def pooled():
+        await asyncio.gather(*(pool.extract(html) for html in htmls))
+
+    # Start the workers before timing
+    await pool.extract(htmls[0])
+    for label, work in (("inline", inline()), (f"pool x{workers}", pooled())):
+        elapsed, stall = await _max_stall(work)
+        print(f"{label:<12} {len(htmls) / elapsed:9.1f} pages/s   max loop stall {1000 * stall:8.1f} ms")
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark HTML extractors and the extraction pool",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--fixtures", type=Path, default=DEFAULT_FIXTURES,
+                        help=f"Directory of .html fixtures (default: {DEFAULT_FIXTURES})")
+    parser.add_argument("--collect", nargs="+", metavar="URL", help="Download these pages into --fixtures and exit")
+    parser.add_argument("--synthetic", type=int, default=0, help="Benchmark N generated pages instead of fixtures")
+    parser.add_argument("--iterations", type=int, default=3, help="Passes over the corpus (default: 3)")
+    parser.add_argument("--workers", type=int, default=4, help="Extraction pool workers (default: 4)")
+    args = parser.parse_args()
+
+    if args.collect:
+        collect(args.collect, args.fixtures)
+        return
+
+    pages = load_fixtures(args.fixtures, args.synthetic)
+    if not pages:
+        print(f"❌ No fixtures in {args.fixtures}; save some with --collect or use --synthetic N")
+        sys.exit(1)
+
+    bench_extractors(pages, args.iterations)
+    asyncio.run(bench_loop(pages, args.iterations, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the per-request prompt-build overhead of ModelRun.generate.
+
+Compares the legacy path (build a ChatPromptTemplate and a
+template | model | parser chain on every request, history injected as
+template strings) with the precompiled chains (history passed as message
+objects through a MessagesPlaceholder). Only prompt construction and
+formatting are timed; no model call is made.
+
+Usage Examples:
+    python scripts/bench_prompt_build.py
+    python scripts/bench_prompt_build.py --turns 12 --iterations 5000
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import statistics
+import time
+
+from langchain.prompts import ChatPromptTemplate
+from langchain.schema.output_parser import StrOutputParser
+
+from brain.brain_init import default_model
+from brain.prompts import CONTEXT_INSTRUCTION, build_chat_prompt, history_to_messages
+from configs.model_config import DEFAULT_SYSTEM_MESSAGE
+
+
+def sample_history(turns: int):
+    history = []
+    for i in range(turns):
+        history.append({"role": "user", "content": f"Mere gehun ke khet {i} mein peele patte aa rahe hain, kya karun?"})
+        history.append({"role": "assistant", "content": f"Urea 40 kg prati acre dein aur sinchai ka dhyan rakhein. Step {i}."})
+    return history
+
+
+def legacy_build(question: str, context: str, history):
+    messages = [("system", DEFAULT_SYSTEM_MESSAGE + CONTEXT_INSTRUCTION)]
+    for turn in history:
+        messages.append(("human" if turn["role"] == "user" else "ai", turn["content"]))
+    messages.append(("human", "{question}"))
+
+    template = ChatPromptTemplate.from_messages(messages)
+    chain = template | default_model | StrOutputParser()
+    return chain.first.invoke({"question": question, "context": context})
+
+
+def precompiled_build(chain, question: str, context: str, history):
+    return chain.first.invoke({
+        "question": question,
+        "context": context,
+        "history": history_to_messages("", history),
+    })
+
+
+def run(label: str, fn, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    print(f"{label:<12} mean={statistics.mean(samples):8.1f}us  "
+          f"p50={samples[len(samples) // 2]:8.1f}us  p95={samples[int(len(samples) * 0.95)]:8.1f}us")
+    return statistics.mean(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark prompt construction in ModelRun.generate",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--turns", type=int, default=6, help="History turn pairs (default: 6)")
+    parser.add_argument("--iterations", type=int, default=2000, help="Iterations per variant (default: 2000)")
+    args = parser.parse_args()
+
+    question = "Dhan mein bhura phudka ka upay batayein"
+    context = "Internet web scrapper result : [{\"url\": \"https://icar.org.in\", \"content\": \"...\"}]"
+    history = sample_history(args.turns)
+
+    chain = build_chat_prompt(DEFAULT_SYSTEM_MESSAGE, with_context=True) | default_model | StrOutputParser()
+
+    # Warm up both paths
+    legacy_build(question, context, history)
+    precompiled_build(chain, question, context, history)
+
+    print(f"History: {len(history)} messages, {args.iterations} iterations")
+    before = run("legacy", lambda: legacy_build(question, context, history), args.iterations)
+    after = run("precompiled", lambda: precompiled_build(chain, question, context, history), args.iterations)
+    print(f"Speed-up: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
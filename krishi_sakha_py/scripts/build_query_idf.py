@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Build the IDF table used by the local search-query rewriter.
+
+Each question/answer pair in the Kisan datasets (instruction, input and
+output fields) is treated as one document. Terms that appear in fewer than
+--min-df documents are dropped; the rewriter treats unseen terms as rare,
+so nothing is lost by pruning them.
+
+Usage Examples:
+    python scripts/build_query_idf.py
+    python scripts/build_query_idf.py --datasets ../notebook/data/datasets/refined_datasets --min-df 3
+    python scripts/build_query_idf.py --output data/query_rewriter/idf.json
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import math
+from collections import Counter
+
+from routes.helpers.keywords import STOPWORDS, tokenize
+
+DEFAULT_DATASETS = project_root.parent / "notebook" / "data" / "datasets" / "refined_datasets"
+DEFAULT_OUTPUT = project_root / "data" / "query_rewriter" / "idf.json"
+
+
+def iter_documents(datasets_dir: Path):
+    for path in sorted(datasets_dir.glob("*.json")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                rows = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️  Skipping {path.name}: {e}")
+            continue
+        for row in rows:
+            yield " ".join(str(row.get(field) or "") for field in ("instruction", "input", "output"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build the query rewriter IDF table from the Kisan datasets",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--datasets", type=str, default=str(DEFAULT_DATASETS),
+                        help="Directory of *_refined.json files")
+    parser.add_argument("--output", type=str, default=str(DEFAULT_OUTPUT), help="Where to write idf.json")
+    parser.add_argument("--min-df", type=int, default=3, help="Drop terms seen in fewer documents (default: 3)")
+    args = parser.parse_args()
+
+    document_frequency = Counter()
+    documents = 0
+    for text in iter_documents(Path(args.datasets)):
+        documents += 1
+        document_frequency.update(
+            token for token in set(tokenize(text))
+            if token not in STOPWORDS and not token.isdigit() and len(token) > 1
+        )
+
+    if not documents:
+        print(f"❌ No documents found in {args.datasets}")
+        return 1
+
+    idf = {
+        token: round(math.log((1 + documents) / (1 + df)) + 1, 3)
+        for token, df in sorted(document_frequency.items())
+        if df >= args.min_df
+    }
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({"documents": documents, "min_df": args.min_df, "idf": idf}, f, ensure_ascii=False, separators=(",", ":"))
+
+    print(f"✅ {len(idf)} terms from {documents} documents written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Offline evaluation of the question routers on a labeled sample.
+
+Runs the local embedding router, the Gemini router and the hybrid used by
+/chat (local first, Gemini only below ROUTER_MIN_MARGIN) over a JSONL file
+of {"question": ..., "domain": ...} rows, and reports accuracy, a
+confusion matrix and latency for each.
+
+Usage Examples:
+    python scripts/evaluate_router.py
+    python scripts/evaluate_router.py --skip-gemini
+    python scripts/evaluate_router.py --dataset data/router/router_eval.jsonl --min-margin 0.1
+"""
+
+import sys
+from pathlib import Path
+
+# Add the project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import argparse
+import json
+import statistics
+import time
+from collections import Counter
+
+from routes.helpers.local_router import DOMAINS, local_router
+from routes.helpers.router_picker import route_question_gemini
+
+
+def load_dataset(path: Path, limit: int = None):
+    rows = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                rows.append(json.loads(line))
+    return rows[:limit] if limit else rows
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def report(name: str, rows, predictions, latencies, extra: str = ""):
+    correct = sum(1 for row, predicted in zip(rows, predictions) if row["domain"] == predicted)
+    print(f"\n=== {name} ===")
+    print(f"Accuracy: {correct}/{len(rows)} ({100 * correct / len(rows):.1f}%)")
+    print(
+        f"Latency:  mean {1000 * statistics.mean(latencies):.1f} ms, "
+        f"p50 {1000 * percentile(latencies, 50):.1f} ms, "
+        f"p95 {1000 * percentile(latencies, 95):.1f} ms"
+    )
+    if extra:
+        print(extra)
+
+    confusion = Counter((row["domain"], predicted) for row, predicted in zip(rows, predictions))
+    width = max(len(domain) for domain in DOMAINS) + 2
+    print("Confusion (rows = expected, columns = predicted):")
+    print(" " * width + "".join(domain.rjust(width) for domain in DOMAINS))
+    for expected in DOMAINS:
+        cells = "".join(str(confusion[(expected, predicted)]).rjust(width) for predicted in DOMAINS)
+        print(expected.ljust(width) + cells)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Evaluate the local and Gemini question routers",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--dataset", type=str, default=str(project_root / "data" / "router" / "router_eval.jsonl"),
+                        help="Labeled JSONL sample (default: data/router/router_eval.jsonl)")
+    parser.add_argument("--limit", type=int, help="Only evaluate the first N rows")
+    parser.add_argument("--min-margin", type=float, help="Override ROUTER_MIN_MARGIN for the hybrid")
+    parser.add_argument("--skip-gemini", action="store_true", help="Do not call Gemini (local router only)")
+    parser.add_argument("--show-errors", action="store_true", help="Print misrouted questions")
+    args = parser.parse_args()
+
+    from configs.runtime_config import ROUTER_MIN_MARGIN
+    min_margin = ROUTER_MIN_MARGIN if args.min_margin is None else args.min_margin
+
+    rows = load_dataset(Path(args.dataset), args.limit)
+    print(f"Loaded {len(rows)} labeled questions from {args.dataset}")
+
+    started = time.perf_counter()
+    if not local_router.load():
+        print("❌ Local router could not be loaded (is sentence-transformers installed?)")
+        return 1
+    print(f"Local router loaded in {time.perf_counter() - started:.1f}s")
+
+    local_results, local_latencies = [], []
+    for row in rows:
+        started = time.perf_counter()
+        local_results.append(local_router.classify(row["question"]))
+        local_latencies.append(time.perf_counter() - started)
+    local_predictions = [result["domain"] for result in local_results]
+    report("Local router", rows, local_predictions, local_latencies)
+
+    if args.show_errors:
+        for row, result in zip(rows, local_results):
+            if result["domain"] != row["domain"]:
+                print(f"  ✗ {row['question']} → {result['domain']} (expected {row['domain']}, margin {result['confidence']})")
+
+    if args.skip_gemini:
+        confident = sum(1 for result in local_results if result["confidence"] >= min_margin)
+        print(f"\nWould consult Gemini for {len(rows) - confident}/{len(rows)} questions at margin {min_margin}")
+        return 0
+
+    gemini_predictions, gemini_latencies = [], []
+    for row in rows:
+        started = time.perf_counter()
+        gemini_predictions.append(route_question_gemini(row["question"]).get("domain", "general"))
+        gemini_latencies.append(time.perf_counter() - started)
+    report("Gemini router", rows, gemini_predictions, gemini_latencies)
+
+    # The hybrid reuses the measurements above instead of calling again
+    hybrid_predictions, hybrid_latencies, fallbacks = [], [], 0
+    for result, local_latency, gemini_prediction, gemini_latency in zip(
+        local_results, local_latencies, gemini_predictions, gemini_latencies
+    ):
+        if result["confidence"] >= min_margin:
+            hybrid_predictions.append(result["domain"])
+            hybrid_latencies.append(local_latency)
+        else:
+            fallbacks += 1
+            hybrid_predictions.append(gemini_prediction)
+            hybrid_latencies.append(local_latency + gemini_latency)
+    report(
+        f"Hybrid (min margin {min_margin})", rows, hybrid_predictions, hybrid_latencies,
+        extra=f"Gemini consulted: {fallbacks}/{len(rows)} ({100 * fallbacks / len(rows):.1f}%)"
+    )
+
+    agreement = sum(1 for a, b in zip(local_predictions, gemini_predictions) if a == b)
+    print(f"\nLocal/Gemini agreement: {agreement}/{len(rows)} ({100 * agreement / len(rows):.1f}%)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Minimal stand-in for an Ollama server, for exercising the backend pool
+without GPUs.
+
+Implements the endpoints the app uses: GET /api/tags and /api/version for
+health probes, and POST /api/chat with NDJSON streaming. Latency and
+failures can be injected to test least-loaded routing, ejection and
+failover.
+
+Usage Examples:
+    # Two healthy backends
+    python scripts/ollama_stub.py --port 11435 &
+    python scripts/ollama_stub.py --port 11436 --token-delay 0.05 &
+    OLLAMA_BASE_URLS=http://localhost:11435,http://localhost:11436 uvicorn main:app
+
+    # A backend that fails every other chat request
+    python scripts/ollama_stub.py --port 11437 --fail-rate 0.5
+
+    # A backend whose health probe fails
+    python scripts/ollama_stub.py --port 11438 --unhealthy
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = (
+    "Gehun mein peele patte aksar nitrogen ki kami se hote hain. "
+    "Urea ki halki matra dein aur khet mein pani ka dhyan rakhein."
+)
+
+
+class StubState:
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.active = 0
+        self.served = 0
+
+
+def make_handler(state: StubState):
+    args = state.args
+
+    class OllamaStubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, fmt, *log_args):
+            if args.verbose:
+                super().log_message(fmt, *log_args)
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if args.unhealthy:
+                self._send_json(503, {"error": "stub marked unhealthy"})
+            elif self.path == "/api/tags":
+                self._send_json(200, {"models": [{"name": args.model, "model": args.model}]})
+            elif self.path == "/api/version":
+                self._send_json(200, {"version": "0.0.0-stub"})
+            elif self.path == "/stats":
+                self._send_json(200, {"active": state.active, "served": state.served})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+
+            if self.path != "/api/chat":
+                self._send_json(404, {"error": "not found"})
+                return
+            if random.random() < args.fail_rate:
+                self._send_json(500, {"error": "injected failure"})
+                return
+
+            with state.lock:
+                state.active += 1
+            try:
+                time.sleep(args.first_token_delay)
+                words = [word + " " for word in REPLY.split()]
+                if request.get("stream", True):
+                    self._stream(request, words)
+                else:
+                    time.sleep(args.token_delay * len(words))
+                    self._send_json(200, self._chunk(request, "".join(words), done=True))
+            finally:
+                with state.lock:
+                    state.active -= 1
+                    state.served += 1
+
+        def _chunk(self, request: dict, content: str, done: bool) -> dict:
+            chunk = {
+                "model": request.get("model", args.model),
+                "created_at": datetime.now(timezone.utc).isoformat(),
+                "message": {"role": "assistant", "content": content},
+                "done": done,
+            }
+            if done:
+                chunk.update({"done_reason": "stop", "eval_count": len(REPLY.split()), "total_duration": 0})
+            return chunk
+
+        def _stream(self, request: dict, words):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for word in words:
+                    self._write_chunk(json.dumps(self._chunk(request, word, done=False)) + "\n")
+                    time.sleep(args.token_delay)
+                self._write_chunk(json.dumps(self._chunk(request, "", done=True)) + "\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Client went away mid-stream, just like a cancelled generation
+                pass
+
+        def _write_chunk(self, text: str):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return OllamaStubHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stub Ollama server for backend pool testing",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=11435, help="Port to listen on (default: 11435)")
+    parser.add_argument("--model", type=str, default="gemma3:4b", help="Model name to advertise")
+    parser.add_argument("--first-token-delay", type=float, default=0.2, help="Seconds before the first token")
+    parser.add_argument("--token-delay", type=float, default=0.03, help="Seconds between tokens")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of chat requests answered with 500")
+    parser.add_argument("--unhealthy", action="store_true", help="Fail health probes")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(StubState(args)))
+    print(f"Ollama stub listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
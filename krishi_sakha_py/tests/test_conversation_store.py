@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("supabase")
+
+from routes.helpers.conversation_store import ConversationStore
+
+
+class _Table:
+    """
+    chat_messages rows for ``_fetch_rows``, recording each read.
+    """
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.reads = []
+        self.fail = False
+
+    def fetch(self, user_id, conversation_id, after_id):
+        self.reads.append((user_id, conversation_id, after_id))
+        if self.fail:
+            raise ConnectionError("supabase unreachable")
+        return [
+            row for row in self.rows
+            if row["user_id"] == user_id and row["conversation_id"] == conversation_id and row["id"] > after_id
+        ]
+
+
+def _row(row_id, sender, message, user_id="u1", conversation_id="c1"):
+    return {"id": row_id, "sender": sender, "message": message, "user_id": user_id, "conversation_id": conversation_id}
+
+
+def _store(monkeypatch, table, **kwargs):
+    store = ConversationStore(**kwargs)
+    monkeypatch.setattr(store, "_fetch_rows", table.fetch)
+    return store
+
+
+def test_cached_history_is_read_once_and_tail_loaded_past_the_cursor(monkeypatch):
+    table = _Table([_row(1, "user", "hello"), _row(2, "assistant", "namaste")])
+    store = _store(monkeypatch, table)
+
+    async def scenario():
+        first = await store.get_history("u1", "c1")
+        again = await store.get_history("u1", "c1", since=2)
+        table.rows.append(_row(3, "user", "mandi price?"))
+        tail = await store.get_history("u1", "c1", since=3)
+        return first, again, tail
+
+    first, again, tail = asyncio.run(scenario())
+    assert first == again == [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "namaste"}]
+    assert tail[-1] == {"role": "user", "content": "mandi price?"}
+    assert table.reads == [("u1", "c1", 0), ("u1", "c1", 2)]
+
+
+def test_expired_conversation_is_read_again(monkeypatch):
+    table = _Table([_row(1, "user", "hello")])
+    store = _store(monkeypatch, table, ttl_seconds=-1)
+
+    async def scenario():
+        await store.get_history("u1", "c1")
+        await store.get_history("u1", "c1")
+
+    asyncio.run(scenario())
+    assert table.reads == [("u1", "c1", 0), ("u1", "c1", 0)]
+
+
+def test_conversations_are_scoped_to_their_owner(monkeypatch):
+    table = _Table([_row(1, "user", "my farm", user_id="u1"), _row(2, "user", "their farm", user_id="u2")])
+    store = _store(monkeypatch, table)
+
+    async def scenario():
+        mine = await store.get_history("u1", "c1")
+        store.append("u1", "c1", "assistant", "answer")
+        theirs = await store.get_history("u2", "c1")
+        return mine, theirs
+
+    mine, theirs = asyncio.run(scenario())
+    assert mine == [{"role": "user", "content": "my farm"}]
+    assert theirs == [{"role": "user", "content": "their farm"}]
+
+
+def test_prompt_is_recorded_once_per_turn(monkeypatch):
+    table = _Table([_row(1, "user", "hello")])
+    store = _store(monkeypatch, table)
+
+    async def scenario():
+        # The client's insert of this prompt is already visible
+        before_read_back = await store.history_for_turn("u1", "c1", "hello")
+        new_turn = await store.history_for_turn("u1", "c1", "what about rain?")
+        cached = await store.get_history("u1", "c1")
+        return before_read_back, new_turn, cached
+
+    before_read_back, new_turn, cached = asyncio.run(scenario())
+    assert before_read_back == []
+    assert new_turn == [{"role": "user", "content": "hello"}]
+    assert cached[-1] == {"role": "user", "content": "what about rain?"}
+
+
+def test_unreadable_supabase_falls_back_to_cached_turns(monkeypatch):
+    table = _Table([_row(1, "user", "hello")])
+    store = _store(monkeypatch, table, ttl_seconds=-1)
+
+    async def scenario():
+        await store.get_history("u1", "c1")
+        table.fail = True
+        cached = await store.get_history("u1", "c1")
+        empty = await store.get_history("u1", "c2")
+        return cached, empty
+
+    cached, empty = asyncio.run(scenario())
+    assert cached == [{"role": "user", "content": "hello"}]
+    assert empty == []
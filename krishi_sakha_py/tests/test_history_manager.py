@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip("langchain")
+pytest.importorskip("langchain_ollama")
+pytest.importorskip("httpx")
+
+from brain.history_manager import HistoryManager, SummaryEntry, turn_fingerprint
+
+
+class _NoBackends:
+    backends = []
+
+
+def _turns(count):
+    return [
+        {"role": "user" if index % 2 == 0 else "assistant", "content": f"message {index}"}
+        for index in range(count)
+    ]
+
+
+def _manager(**kwargs):
+    kwargs.setdefault("max_turns", 2)
+    kwargs.setdefault("token_budget", 1000)
+    return HistoryManager(pool=_NoBackends(), **kwargs)
+
+
+def test_short_history_is_replayed_verbatim():
+    summary, recent = _manager().window("u1", "c1", _turns(2))
+    assert summary == ""
+    assert recent == _turns(2)
+
+
+def test_window_keeps_latest_turns_and_drops_empty_ones():
+    history = _turns(5) + [{"role": "assistant", "content": ""}, {"role": "system", "content": "x"}]
+    summary, recent = _manager().window("u1", "c1", history)
+    assert summary == ""
+    assert recent == _turns(5)[-2:]
+
+
+def test_token_budget_always_keeps_the_latest_turn():
+    history = [{"role": "user", "content": "a" * 400}, {"role": "assistant", "content": "b" * 400}]
+    _, recent = _manager(max_turns=10, token_budget=10).window("u1", "c1", history)
+    assert recent == history[-1:]
+
+
+def test_summary_is_scoped_to_its_owner():
+    manager = _manager()
+    manager._summaries[("u1", "c1")] = SummaryEntry("earlier: wheat sowing", turn_fingerprint(_turns(3)[-1]), 0)
+
+    assert manager.window("u1", "c1", _turns(5))[0] == "earlier: wheat sowing"
+    assert manager.window("u2", "c1", _turns(5))[0] == ""
+    # Nothing to summarize without a conversation id
+    assert manager.window("u1", "", _turns(5))[0] == ""
+
+
+def test_unsummarized_starts_after_the_last_folded_turn():
+    manager = _manager()
+    older = _turns(4)
+    entry = SummaryEntry("s", turn_fingerprint(older[1]), 0)
+    assert manager._unsummarized(older, entry) == older[2:]
+    assert manager._unsummarized(older, None) == older
+    # The folded turn scrolled out of the supplied history
+    gone = SummaryEntry("s", turn_fingerprint({"role": "user", "content": "old"}), 0)
+    assert manager._unsummarized(older, gone) == older
@@ -0,0 +1,113 @@
+import pytest
+
+import modules.scrapper.host_scoreboard as host_scoreboard_module
+from modules.scrapper.host_scoreboard import MAX_PENALTY, HostScoreboard
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(host_scoreboard_module, "time", clock)
+    monkeypatch.setattr(host_scoreboard_module, "HOST_BREAKER_FAILURES", 3)
+    monkeypatch.setattr(host_scoreboard_module, "HOST_BREAKER_COOLDOWN_SECONDS", 30)
+    monkeypatch.setattr(host_scoreboard_module, "HOST_BREAKER_MAX_COOLDOWN_SECONDS", 100)
+    return clock
+
+
+def _board(tmp_path):
+    return HostScoreboard(path=str(tmp_path / "hosts.json"), save_every=1000)
+
+
+def _fail(board, host, times=1):
+    for _ in range(times):
+        board.record(host, False, 1.0)
+
+
+def test_circuit_opens_after_consecutive_failures(tmp_path, clock):
+    board = _board(tmp_path)
+    _fail(board, "slow.example", 2)
+    assert board.allow("slow.example")
+    _fail(board, "slow.example")
+    assert board.is_open("slow.example")
+    assert not board.allow("slow.example")
+    assert board.penalty("slow.example") == MAX_PENALTY
+    assert board.allow("other.example")
+
+
+def test_one_trial_after_the_cool_down_and_doubling_on_failure(tmp_path, clock):
+    board = _board(tmp_path)
+    _fail(board, "h", 3)
+    clock.now += 31
+    assert board.allow("h")
+    # Only one trial at a time
+    assert not board.allow("h")
+
+    _fail(board, "h")
+    assert board.is_open("h")
+    clock.now += 31
+    assert not board.allow("h")
+    clock.now += 30
+    assert board.allow("h")
+
+    board.record("h", True, 0.5, text_chars=2000)
+    assert not board.is_open("h")
+    assert board.allow("h") and board.allow("h")
+    assert board.status()["hosts"]["h"]["circuit"] == "closed"
+
+
+def test_cool_down_is_capped(tmp_path, clock):
+    board = _board(tmp_path)
+    _fail(board, "h", 3)
+    for _ in range(5):
+        clock.now += 101
+        assert board.allow("h")
+        _fail(board, "h")
+    clock.now += 101
+    assert board.allow("h")
+
+
+def test_unrecorded_trial_lets_another_through(tmp_path, clock):
+    board = _board(tmp_path)
+    _fail(board, "h", 3)
+    clock.now += 31
+    assert board.allow("h")
+    clock.now += host_scoreboard_module.TRIAL_SECONDS
+    assert board.allow("h")
+
+
+def test_slow_and_failing_hosts_are_penalised(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(host_scoreboard_module, "HOST_SLOW_SECONDS", 2.0)
+    board = _board(tmp_path)
+    for _ in range(3):
+        board.record("fast", True, 0.3, 1000)
+        board.record("slow", True, 4.0, 1000)
+    board.record("flaky", True, 0.3, 1000)
+    _fail(board, "flaky", 2)
+    board.record("flaky", True, 0.3, 1000)
+    _fail(board, "flaky", 2)
+    assert board.penalty("fast") == 0.0
+    assert board.penalty("slow") == pytest.approx(0.2)
+    assert 0 < board.penalty("flaky") <= MAX_PENALTY
+    assert board.penalty("unknown") == 0.0
+
+
+def test_scoreboard_survives_a_restart_and_can_be_reset(tmp_path, clock):
+    board = _board(tmp_path)
+    _fail(board, "h", 3)
+    board.record("ok", True, 0.2, 500)
+    board.save()
+
+    reloaded = _board(tmp_path)
+    assert reloaded.is_open("h")
+    assert reloaded.status()["hosts"]["ok"]["avg_text_chars"] == 500
+    assert reloaded.reset("h")
+    assert not reloaded.reset("h")
+    assert reloaded.allow("h")
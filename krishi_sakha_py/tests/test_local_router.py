@@ -0,0 +1,103 @@
+import asyncio
+import time
+
+import pytest
+
+from routes.helpers.local_router import LocalRouter
+
+
+class _Vectors(list):
+    def tolist(self):
+        return list(self)
+
+
+class _Embedder:
+    """
+    Maps each known question to a fixed unit vector.
+    """
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def encode(self, texts, normalize_embeddings=True):
+        return _Vectors(self.vectors[text] for text in texts)
+
+
+def _router(vectors):
+    router = LocalRouter()
+    router.model = _Embedder(vectors)
+    router.centroids = {
+        "annual_report": [1.0, 0.0, 0.0],
+        "general": [0.0, 1.0, 0.0],
+        "search": [0.0, 0.0, 1.0],
+    }
+    return router
+
+
+def test_classify_reports_the_margin_over_the_runner_up():
+    router = _router({"how do I make compost?": [0.1, 0.9, 0.3]})
+    result = router.classify("how do I make compost?")
+    assert result["domain"] == "general"
+    assert result["source"] == "local"
+    assert result["confidence"] == pytest.approx(0.6)
+
+
+def test_rule_cues_boost_their_domain(monkeypatch):
+    import routes.helpers.local_router as local_router_module
+
+    monkeypatch.setattr(local_router_module, "ROUTER_RULE_BOOST", 0.2)
+    router = _router({"wheat mandi price": [0.0, 0.55, 0.5]})
+    result = router.classify("wheat mandi price")
+    assert result["domain"] == "search"
+    assert result["query"]
+
+
+def test_unavailable_router_returns_none():
+    router = LocalRouter()
+    router._load_failed = True
+    assert router.classify("anything") is None
+
+
+def _picker(monkeypatch, local, remote, delay=0.0):
+    pytest.importorskip("google.generativeai")
+    import routes.helpers.router_picker as router_picker
+
+    calls = []
+
+    def gemini(question):
+        calls.append(question)
+        time.sleep(delay)
+        return remote
+
+    monkeypatch.setattr(router_picker.local_router, "classify", lambda question: local)
+    monkeypatch.setattr(router_picker, "route_question_gemini", gemini)
+    monkeypatch.setattr(router_picker, "ROUTER_MIN_MARGIN", 0.1)
+    monkeypatch.setattr(router_picker, "ROUTER_GEMINI_TIMEOUT_SECONDS", 0.2)
+    return router_picker, calls
+
+
+def _local(confidence):
+    return {"domain": "general", "reason": "local", "year": 2023, "keywords": ["wheat"],
+            "confidence": confidence, "source": "local"}
+
+
+def test_confident_local_route_skips_gemini(monkeypatch):
+    router_picker, calls = _picker(monkeypatch, _local(0.3), None)
+    assert asyncio.run(router_picker.route_question("q"))["source"] == "local"
+    assert calls == []
+
+
+def test_low_margin_asks_gemini_and_keeps_local_year_and_keywords(monkeypatch):
+    remote = {"domain": "search", "reason": "news", "year": None, "keywords": []}
+    router_picker, calls = _picker(monkeypatch, _local(0.02), remote)
+    result = asyncio.run(router_picker.route_question("q"))
+    assert calls == ["q"]
+    assert result["domain"] == "search"
+    assert result["source"] == "gemini"
+    assert (result["year"], result["keywords"]) == (2023, ["wheat"])
+
+
+def test_slow_gemini_falls_back_to_the_local_route(monkeypatch):
+    remote = {"domain": "search", "reason": "news", "year": None, "keywords": []}
+    router_picker, _ = _picker(monkeypatch, _local(0.02), remote, delay=0.5)
+    assert asyncio.run(router_picker.route_question("q"))["source"] == "local"
@@ -0,0 +1,112 @@
+import asyncio
+import time
+
+import pytest
+
+from modules.scrapper.page_cache import PageCache, ttl_for
+
+PAGE = {"url": "https://agri.gov.in/final", "title": "Wheat", "content": "Sow wheat in November.", "fetched_by": "http"}
+
+
+def _cache(tmp_path, **kwargs):
+    return PageCache(path=str(tmp_path / "pages.sqlite3"), **kwargs)
+
+
+def test_ttl_follows_the_most_specific_configured_domain():
+    ttls = {"gov.in": 600, "mausam.imd.gov.in": 60}
+    assert ttl_for("mausam.imd.gov.in", ttls, default=3600) == 60
+    assert ttl_for("agri.gov.in", ttls, default=3600) == 600
+    assert ttl_for("example.com", ttls, default=3600) == 3600
+
+
+def test_pages_are_read_back_from_disk(tmp_path):
+    cache = _cache(tmp_path, hot_size=1)
+    cache.put("https://agri.gov.in/a", PAGE, ttl=60, etag='"v1"')
+    cache.put("https://agri.gov.in/b", PAGE, ttl=60)
+    cache.close()
+
+    page = _cache(tmp_path).get("https://agri.gov.in/a")
+    assert page.content == PAGE["content"]
+    assert page.final_url == PAGE["url"]
+    assert page.fresh and page.revalidatable
+    assert page.as_result()["fetched_by"] == "cache"
+    assert _cache(tmp_path).get("https://agri.gov.in/missing") is None
+
+
+def test_expired_page_is_stale_until_the_grace_period_ends(tmp_path, monkeypatch):
+    import modules.scrapper.page_cache as page_cache_module
+
+    monkeypatch.setattr(page_cache_module, "PAGE_CACHE_STALE_SECONDS", 100)
+    page = _cache(tmp_path).put("https://agri.gov.in/a", PAGE, ttl=-10)
+    assert not page.fresh
+    assert page.usable_stale
+    assert not page.revalidatable
+
+    old = _cache(tmp_path).put("https://agri.gov.in/b", PAGE, ttl=-200)
+    assert not old.usable_stale
+
+
+def test_refresh_extends_a_revalidated_page(tmp_path):
+    cache = _cache(tmp_path)
+    page = cache.put("https://agri.gov.in/a", PAGE, ttl=-10, last_modified="Mon, 01 Jan 2024 00:00:00 GMT")
+    cache.refresh(page, ttl=60)
+    cache.close()
+
+    reread = _cache(tmp_path).get("https://agri.gov.in/a")
+    assert reread.fresh
+    assert reread.expires_at == pytest.approx(time.time() + 60, abs=5)
+
+
+class _Http:
+    def __init__(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.calls = []
+
+    async def fetch(self, url, timeout, etag=None, last_modified=None):
+        self.calls.append({"etag": etag, "last_modified": last_modified})
+        if self.error:
+            raise self.error
+        return self.result
+
+
+class _Browser:
+    async def scrape_multiple(self, urls, main_selector=None, timeout=None):
+        return [{"url": urls[0], "success": False, "error": "Timeout"}]
+
+
+def _fetcher(tmp_path, http):
+    for module in ("playwright", "httpx", "requests", "trafilatura", "bs4"):
+        pytest.importorskip(module)
+    from modules.scrapper.host_scoreboard import HostScoreboard
+    from modules.scrapper.scrapper import TieredFetcher
+
+    cache = _cache(tmp_path)
+    scoreboard = HostScoreboard(path=str(tmp_path / "hosts.json"))
+    return TieredFetcher(http=http, browser=_Browser(), cache=cache, scoreboard=scoreboard), cache
+
+
+def test_expired_page_is_revalidated_with_a_conditional_get(tmp_path):
+    http = _Http(result={"url": PAGE["url"], "not_modified": True})
+    fetcher, cache = _fetcher(tmp_path, http)
+    cache.put("https://agri.gov.in/a", PAGE, ttl=-10, etag='"v1"')
+
+    result = asyncio.run(fetcher.fetch_one("https://agri.gov.in/a"))
+    assert http.calls == [{"etag": '"v1"', "last_modified": None}]
+    assert result["content"] == PAGE["content"]
+    assert cache.get("https://agri.gov.in/a").fresh
+
+
+def test_fresh_page_skips_the_network_and_stale_page_covers_an_outage(tmp_path):
+    http = _Http(error=ConnectionError("origin down"))
+    fetcher, cache = _fetcher(tmp_path, http)
+    cache.put("https://agri.gov.in/fresh", PAGE, ttl=60)
+    cache.put("https://agri.gov.in/expired", PAGE, ttl=-10)
+
+    fresh = asyncio.run(fetcher.fetch_one("https://agri.gov.in/fresh"))
+    assert fresh["fetched_by"] == "cache"
+    assert http.calls == []
+
+    stale = asyncio.run(fetcher.fetch_one("https://agri.gov.in/expired"))
+    assert stale["fetched_by"] == "stale"
+    assert stale["content"] == PAGE["content"]
@@ -0,0 +1,63 @@
+import pytest
+
+import brain.passage_selector as passage_selector
+from brain.passage_selector import approx_tokens, build_search_context, select_passages, split_passages
+
+FILLER = "Farmers in the district follow the advice of the local agriculture office every season. " * 4
+
+
+def _overlap(query, texts):
+    words = set(query.lower().split())
+    return [len(words & set(text.lower().split())) / len(words) for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def _word_overlap_scores(monkeypatch):
+    monkeypatch.setattr(passage_selector, "text_similarity", _overlap)
+
+
+def _para(lead):
+    # Long enough that two paragraphs are never merged into one passage
+    return f"{lead}. {FILLER}".strip()
+
+
+def _page(url, *leads):
+    return {"url": url, "title": url.rsplit("/", 1)[-1], "content": "\n".join(map(_para, leads)), "success": True}
+
+
+def test_split_merges_short_paragraphs_and_cuts_long_ones():
+    text = "Wheat needs water.\nSow in November.\n" + "Long sentence about irrigation. " * 10
+    passages = split_passages(text, max_chars=80, min_chars=10)
+    assert passages[0] == "Wheat needs water. Sow in November."
+    assert all(len(passage) <= 80 for passage in passages)
+    assert split_passages("ok", max_chars=80, min_chars=10) == []
+
+
+def test_best_passages_win_within_the_token_budget():
+    documents = [
+        _page("https://a/1", "wheat sowing time is november", "cattle feed prices rose"),
+        _page("https://a/2", "wheat sowing needs moist soil"),
+        {"url": "https://a/3", "content": _para("wheat sowing time"), "success": False},
+    ]
+    budget = approx_tokens(_para("wheat sowing time is november")) + approx_tokens(_para("wheat sowing needs moist soil"))
+    selected = select_passages("wheat sowing time", documents, token_budget=budget, per_page=3)
+    assert [(p["source"], p["position"]) for p in selected] == [(1, 0), (2, 0)]
+
+
+def test_passages_per_page_are_capped_and_duplicates_dropped():
+    documents = [
+        _page("https://a/1", "wheat sowing time is november", "wheat sowing time varies", "wheat sowing needs rain"),
+        _page("https://a/2", "wheat sowing time in punjab"),
+        _page("https://a/3", "wheat sowing time in punjab"),
+    ]
+    selected = select_passages("wheat sowing time", documents, token_budget=10000, per_page=2)
+    assert [p["source"] for p in selected] == [1, 1, 2]
+
+
+def test_context_lists_cited_sources_and_degraded_budget_shrinks_it():
+    documents = [_page("https://a/wheat", "wheat sowing time is november")]
+    context = build_search_context("wheat sowing time", documents)
+    assert "[1] wheat - https://a/wheat" in context
+    assert "[1] wheat sowing time is november" in context
+
+    assert build_search_context("wheat sowing time", documents, context_chars=40) == "No relevant web results were found."
@@ -0,0 +1,38 @@
+import json
+
+from routes.helpers.query_rewriter import QueryRewriter
+
+
+def _rewriter(tmp_path, idf, max_terms=3):
+    path = tmp_path / "idf.json"
+    path.write_text(json.dumps({"idf": idf}), encoding="utf-8")
+    return QueryRewriter(idf_path=path, max_terms=max_terms)
+
+
+def test_terms_keep_the_rarest_words_in_question_order(tmp_path):
+    rewriter = _rewriter(tmp_path, {"gehu": 4.0, "buvai": 3.0, "time": 1.2, "punjab": 3.5, "wheat": 2.0})
+    assert rewriter.terms("Gehu ki buvai kab karein, time in Punjab for wheat?") == ["gehu", "buvai", "punjab"]
+
+
+def test_stopwords_digits_and_duplicates_are_dropped(tmp_path):
+    rewriter = _rewriter(tmp_path, {"urea": 3.0}, max_terms=5)
+    assert rewriter.terms("urea urea kab 2023 in the") == ["urea"]
+
+
+def test_unseen_terms_rank_as_rare(tmp_path):
+    rewriter = _rewriter(tmp_path, {"fasal": 2.0, "bima": 1.6}, max_terms=2)
+    assert rewriter.terms("fasal bima yojana") == ["fasal", "yojana"]
+
+
+def test_common_terms_are_kept_when_nothing_is_salient(tmp_path):
+    rewriter = _rewriter(tmp_path, {"information": 0.5, "detail": 0.4})
+    assert rewriter.terms("information detail") == ["information", "detail"]
+
+
+def test_rewrite_adds_the_year_and_survives_a_missing_table(tmp_path):
+    rewriter = QueryRewriter(idf_path=tmp_path / "missing.json", max_terms=3)
+    assert rewriter.rewrite("PM Kisan kisht 2024 kab aayegi?") == {
+        "query": "PM Kisan kisht 2024 kab aayegi?",
+        "search": "pm kisan kisht 2024",
+    }
+    assert rewriter.rewrite("kab?")["search"] == ""
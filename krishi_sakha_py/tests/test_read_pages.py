@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+for _module in ("playwright", "httpx", "requests", "trafilatura", "bs4"):
+    pytest.importorskip(_module)
+
+import modules.search.search_orchestrator as orchestrator
+from modules.search.search_orchestrator import read_pages
+
+GOOD = "Wheat is sown in November after the paddy harvest. " * 10
+
+
+class _Fetcher:
+    """
+    fetch_one stand-in: each URL takes its own time and returns its own page.
+    """
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.started = []
+        self.cancelled = []
+
+    async def fetch_one(self, url, main_selector=None, timeout=None, cache_only=False):
+        self.started.append(url)
+        seconds, content = self.pages[url]
+        try:
+            await asyncio.sleep(seconds)
+        except asyncio.CancelledError:
+            self.cancelled.append(url)
+            raise
+        return {"url": url, "success": bool(content), "content": content}
+
+
+def _setup(monkeypatch, pages, wanted, hedge_after=10.0):
+    fetcher = _Fetcher(pages)
+    monkeypatch.setattr(orchestrator, "tiered_fetcher", fetcher)
+    monkeypatch.setattr(orchestrator, "SEARCH_MIN_GOOD_PAGES", wanted)
+    monkeypatch.setattr(orchestrator, "SCRAPER_MIN_TEXT_CHARS", 100)
+    monkeypatch.setattr(orchestrator, "hedge_delay", lambda: hedge_after)
+    return fetcher, [{"url": url} for url in pages]
+
+
+def test_slow_page_is_hedged_with_the_next_hit(monkeypatch):
+    fetcher, hits = _setup(monkeypatch, {"a": (5.0, GOOD), "b": (0.01, GOOD), "c": (0.01, GOOD)},
+                           wanted=1, hedge_after=0.05)
+    documents = asyncio.run(read_pages(hits, 1))
+    assert [document["url"] for document in documents] == ["b"]
+    assert fetcher.started == ["a", "b"]
+    assert fetcher.cancelled == ["a"]
+
+
+def test_failed_page_is_replaced_and_results_keep_rank_order(monkeypatch):
+    fetcher, hits = _setup(monkeypatch, {"a": (0.03, GOOD), "b": (0.01, ""), "c": (0.01, GOOD), "d": (0.01, GOOD)},
+                           wanted=2)
+    documents = asyncio.run(read_pages(hits, 2))
+    assert [document["url"] for document in documents] == ["a", "b", "c"]
+    assert fetcher.started == ["a", "b", "c"]
+
+
+def test_pages_still_loading_at_the_timeout_are_abandoned(monkeypatch):
+    fetcher, hits = _setup(monkeypatch, {"a": (5.0, GOOD), "b": (5.0, GOOD)}, wanted=2)
+    documents = asyncio.run(read_pages(hits, 2, timeout=0.05))
+    assert documents == []
+    assert sorted(fetcher.cancelled) == ["a", "b"]
@@ -0,0 +1,113 @@
+import asyncio
+
+from modules.scrapper.request_policy import RequestPolicy, _PageLoad, domain_of
+
+SITE = "https://www.krishi.gov.in/schemes"
+
+
+class _Frame:
+    def __init__(self, page, parent=None, url=SITE):
+        self.page = page
+        self.parent_frame = parent
+        self.url = url
+
+
+class _Page:
+    def __init__(self):
+        self.main_frame = _Frame(self)
+
+
+class _Request:
+    def __init__(self, page, url, resource_type, navigation=False, frame=None):
+        self.frame = frame or page.main_frame
+        self.url = url
+        self.resource_type = resource_type
+        self._navigation = navigation
+
+    def is_navigation_request(self):
+        return self._navigation
+
+
+class _Route:
+    def __init__(self):
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = "continued"
+
+    async def abort(self):
+        self.outcome = "aborted"
+
+
+def _policy(**kwargs):
+    kwargs.setdefault("enabled", True)
+    kwargs.setdefault("blocked_types", ["image", "font", "stylesheet", "media"])
+    kwargs.setdefault("third_party_types", ["xhr", "fetch", "ping"])
+    kwargs.setdefault("blocked_domains", ["ads.example"])
+    kwargs.setdefault("page_max_bytes", 1000)
+    kwargs.setdefault("holdout", 0.0)
+    return RequestPolicy(**kwargs)
+
+
+def test_domain_of_keeps_country_second_level_domains():
+    assert domain_of("https://www.krishi.gov.in/a") == "krishi.gov.in"
+    assert domain_of("https://cdn.example.com/x.js") == "example.com"
+    assert domain_of("https://timesofindia.indiatimes.com/") == "indiatimes.com"
+
+
+def test_verdicts():
+    policy, page = _policy(), _Page()
+    load = _PageLoad()
+
+    def verdict(url, resource_type, **kwargs):
+        return policy.verdict(_Request(page, url, resource_type, **kwargs), load)
+
+    assert verdict(SITE, "document", navigation=True) is None
+    assert verdict("https://krishi.gov.in/logo.png", "image") == "resource_type"
+    assert verdict("https://www.googletagmanager.com/gtm.js", "script") == "blocklist"
+    assert verdict("https://cdn.ads.example/a.js", "script") == "blocklist"
+    assert verdict("https://api.other.com/data", "xhr") == "third_party"
+    assert verdict("https://api.krishi.gov.in/data", "xhr") is None
+    assert verdict("https://krishi.gov.in/app.js", "script") is None
+
+    # An iframe's document is a sub-request like any other
+    iframe = _Frame(page, parent=page.main_frame)
+    assert verdict("https://www.googletagmanager.com/ns.html", "document", navigation=True, frame=iframe) == "blocklist"
+
+    load.bytes = 1000
+    assert verdict("https://krishi.gov.in/app.js", "script") == "byte_cap"
+    assert verdict(SITE, "document", navigation=True) is None
+
+
+def test_handle_counts_blocked_requests_and_skips_held_out_loads():
+    policy, page = _policy(), _Page()
+
+    async def handle(url, resource_type):
+        route = _Route()
+        await policy.handle(route, _Request(page, url, resource_type))
+        return route.outcome
+
+    policy.begin(page)
+    assert asyncio.run(handle("https://krishi.gov.in/logo.png", "image")) == "aborted"
+    assert asyncio.run(handle("https://krishi.gov.in/app.js", "script")) == "continued"
+    assert policy.blocked == {"resource_type": 1}
+    assert policy.allowed == 1
+    assert policy.bytes_saved > 0
+
+    held_out = _policy(holdout=1.0)
+    held_out.begin(page)
+    route = _Route()
+    asyncio.run(held_out.handle(route, _Request(page, "https://krishi.gov.in/logo.png", "image")))
+    assert route.outcome == "continued"
+
+
+def test_disabled_policy_installs_nothing():
+    class _Context:
+        routed = False
+
+        async def route(self, pattern, handler):
+            self.routed = True
+
+    context = _Context()
+    asyncio.run(_policy(enabled=False).install(context))
+    assert not context.routed
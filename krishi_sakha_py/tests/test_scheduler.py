@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+import routes.helpers.deadline as deadline_module
+from brain.scheduler import LLMScheduler, SchedulerBusyError
+from routes.helpers.deadline import Deadline
+
+
+async def _generate(scheduler, deadline):
+    # What ModelRun._run does: the wait for a slot is bounded by the deadline
+    admission = scheduler.admit("chat")
+    admission.wait_timeout = deadline.queue_budget()
+    async with admission:
+        await asyncio.sleep(0)
+
+
+def test_lane_recovers_after_requests_outlive_their_deadline(monkeypatch):
+    monkeypatch.setattr(deadline_module, "DEADLINE_MIN_QUEUE_WAIT_SECONDS", 0.05)
+
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, lane_limits={"chat": 4})
+        holder = scheduler.admit("chat")
+        await holder.acquire()
+
+        expired = [asyncio.create_task(_generate(scheduler, Deadline(0.01))) for _ in range(2)]
+        cancelled = asyncio.create_task(_generate(scheduler, Deadline(None)))
+        await asyncio.sleep(0.01)
+        cancelled.cancel()
+        results = await asyncio.gather(*expired, cancelled, return_exceptions=True)
+
+        assert [type(r) for r in results[:2]] == [SchedulerBusyError, SchedulerBusyError]
+        assert isinstance(results[2], asyncio.CancelledError)
+        assert scheduler.queue_depth("chat") == 0
+
+        holder.release()
+        assert scheduler.in_flight == 0
+        # The lane still admits and runs new requests
+        await _generate(scheduler, Deadline(1))
+        assert scheduler.queue_depth("chat") == 0
+        assert scheduler.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_rejects_only_when_the_lane_is_really_full():
+    scheduler = LLMScheduler(max_in_flight=1, lane_limits={"chat": 2})
+    first, second = scheduler.admit("chat"), scheduler.admit("chat")
+    with pytest.raises(SchedulerBusyError):
+        scheduler.admit("chat")
+    first.release()
+    second.release()
+    scheduler.admit("chat").release()
+    assert scheduler.queue_depth("chat") == 0
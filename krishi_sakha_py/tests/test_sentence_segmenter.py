@@ -0,0 +1,67 @@
+import asyncio
+
+from routes.helpers.sentence_stream import SentenceSegmenter, sentences
+
+
+def _segment(fragments, **kwargs):
+    kwargs.setdefault("max_chars", 200)
+    kwargs.setdefault("min_chars", 1)
+    segmenter = SentenceSegmenter(**kwargs)
+    out = []
+    for fragment in fragments:
+        out.extend(segmenter.feed(fragment))
+    return out, segmenter.flush()
+
+
+def test_danda_ends_a_sentence_without_a_following_space():
+    done, rest = _segment(["गेहूं की बुवाई नवंबर में करें।", "सिंचाई समय पर करें॥"])
+    assert done == ["गेहूं की बुवाई नवंबर में करें।", "सिंचाई समय पर करें॥"]
+    assert rest == []
+
+
+def test_english_full_stop_needs_whitespace_after_it():
+    done, rest = _segment(["Use 2.5 kg per acre. See www.", "krishi.gov.in for ", "details"])
+    assert done == ["Use 2.5 kg per acre."]
+    assert rest == ["See www.krishi.gov.in for details"]
+
+
+def test_sentence_split_across_fragments_waits_for_the_next_one():
+    segmenter = SentenceSegmenter(max_chars=200, min_chars=1)
+    assert segmenter.feed("Water the field today.") == []
+    assert segmenter.feed(" Then") == ["Water the field today."]
+
+
+def test_closing_quotes_and_brackets_stay_with_their_sentence():
+    done, rest = _segment(['He said "sow now." ', "(Rain is due.) Next"])
+    assert done == ['He said "sow now."', "(Rain is due.)"]
+    assert rest == ["Next"]
+
+
+def test_short_fragments_are_joined_up_to_min_chars():
+    done, _ = _segment(["Yes. ", "Apply urea now. "], min_chars=10)
+    assert done == ["Yes. Apply urea now."]
+
+
+def test_long_sentence_is_cut_at_a_clause_break_then_a_space():
+    done, rest = _segment(["Apply urea, potash and zinc sulphate before the first irrigation"],
+                          max_chars=30, min_chars=5)
+    assert done[0] == "Apply urea,"
+    assert all(len(sentence) <= 30 for sentence in done + rest)
+    assert " ".join(done + rest) == "Apply urea, potash and zinc sulphate before the first irrigation"
+
+
+def test_text_without_breaks_is_hard_cut_at_max_chars():
+    done, rest = _segment(["x" * 25], max_chars=10, min_chars=2)
+    assert done == ["x" * 10, "x" * 10]
+    assert rest == ["x" * 5]
+
+
+def test_sentences_streams_from_async_fragments():
+    async def fragments():
+        for fragment in ["पानी दें। ", "Done"]:
+            yield fragment
+
+    async def collect():
+        return [sentence async for sentence in sentences(fragments(), max_chars=200, min_chars=1)]
+
+    assert asyncio.run(collect()) == ["पानी दें।", "Done"]
@@ -0,0 +1,103 @@
+import asyncio
+
+from brain.scheduler import LLMScheduler
+from routes.helpers.single_flight import SingleFlight, flight_key, normalize_prompt
+
+
+async def _collect(subscription):
+    return [item async for item in subscription]
+
+
+def test_normalized_duplicates_share_a_key():
+    assert normalize_prompt("  Gehu ki  BUVAI kab karein? ") == normalize_prompt("gehu ki buvai kab karein।")
+    assert flight_key("voice", "a") != flight_key("search", "a")
+
+
+def test_concurrent_subscribers_share_one_run_and_replay():
+    calls = []
+
+    async def source():
+        calls.append(1)
+        for item in range(4):
+            await asyncio.sleep(0.01)
+            yield item
+
+    async def scenario():
+        flights = SingleFlight()
+        leader = asyncio.create_task(_collect(flights.stream("k", source)))
+        await asyncio.sleep(0.025)
+        # Joins after the first items were produced; they are replayed
+        follower = await _collect(flights.stream("k", source))
+        assert await leader == [0, 1, 2, 3]
+        assert follower == [0, 1, 2, 3]
+        assert calls == [1]
+        assert flights.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_flight_survives_its_starter_and_is_cancelled_after_the_last_leaves():
+    cancelled = asyncio.Event()
+
+    async def source():
+        try:
+            for item in range(100):
+                await asyncio.sleep(0.01)
+                yield item
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def take(subscription, count):
+        items = []
+        async for item in subscription:
+            items.append(item)
+            if len(items) == count:
+                break
+        await subscription.aclose()
+        return items
+
+    async def scenario():
+        flights = SingleFlight()
+        starter = asyncio.create_task(take(flights.stream("k", source), 1))
+        await asyncio.sleep(0)
+        other = asyncio.create_task(take(flights.stream("k", source), 3))
+        assert await starter == [0]
+        assert not cancelled.is_set()
+        assert await other == [0, 1, 2]
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert flights.in_flight() == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_goes_to_the_leader_and_back_from_joiners():
+    async def source(admission):
+        async with admission:
+            await asyncio.sleep(0.01)
+            yield "answer"
+
+    async def scenario():
+        scheduler = LLMScheduler(max_in_flight=1, lane_limits={"voice": 2})
+        flights = SingleFlight()
+        first, second = scheduler.admit("voice"), scheduler.admit("voice")
+        leader = asyncio.create_task(_collect(
+            flights.stream("k", lambda: source(first), admission=first)
+        ))
+        await asyncio.sleep(0)
+        joiner = await _collect(flights.stream("k", lambda: source(second), admission=second))
+        assert await leader == joiner == ["answer"]
+        assert second.state == "done"
+
+        # A flight cancelled before it reached the model still gives its place back
+        third = scheduler.admit("voice")
+        abandoned = asyncio.create_task(_collect(
+            flights.stream("j", lambda: source(third), admission=third)
+        ))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.sleep(0.01)
+        assert scheduler.queue_depth("voice") == 0
+        assert scheduler.in_flight == 0
+
+    asyncio.run(scenario())
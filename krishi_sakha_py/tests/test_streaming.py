@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from routes.helpers.streaming import coalesce
+
+
+async def _chunks(items, delay=0.0, error=None):
+    for item in items:
+        if delay:
+            await asyncio.sleep(delay)
+        yield item
+    if error:
+        raise error
+
+
+async def _collect(frames):
+    return [frame async for frame in frames]
+
+
+def test_first_chunk_is_flushed_alone_and_the_rest_merged_by_size():
+    frames = asyncio.run(_collect(coalesce(_chunks(["Na", "ma", "st", "e!", ""]), max_delay_ms=1000, max_bytes=4)))
+    assert frames == ["Na", "mast", "e!"]
+
+
+def test_slow_tokens_are_flushed_after_the_delay():
+    async def scenario():
+        received = []
+        async for frame in coalesce(_chunks(["a", "b", "c"], delay=0.03), max_delay_ms=10, max_bytes=1000):
+            received.append(frame)
+        return received
+
+    # Each token arrives after the previous merge window has closed
+    assert asyncio.run(scenario()) == ["a", "b", "c"]
+
+
+def test_buffered_text_is_flushed_before_an_error():
+    async def scenario():
+        received = []
+        with pytest.raises(RuntimeError):
+            async for frame in coalesce(_chunks(["a", "b", "c"], error=RuntimeError("model died")),
+                                        max_delay_ms=1000, max_bytes=1000):
+                received.append(frame)
+        return received
+
+    assert asyncio.run(scenario()) == ["a", "bc"]
+
+
+def test_disabled_coalescing_passes_chunks_through():
+    frames = asyncio.run(_collect(coalesce(_chunks(["a", "b"]), max_delay_ms=0, max_bytes=0)))
+    assert frames == ["a", "b"]